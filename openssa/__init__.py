@@ -13,6 +13,7 @@ import tomllib
 
 from .core.agent.dana import DANA
 
+from .core.program_store.persistent_program_store import PersistentProgramStore
 from .core.program_store.program_store import ProgramStore
 from .core.programming.hierarchical.plan import HTP
 from .core.programming.hierarchical.planner import HTPlanner
@@ -15,23 +15,51 @@ using an applicable execution engine/mechanism.
 
 By default, `OpenSSA`'s Programs take the form of Hierarchical Task Plans (HTPs),
 with their execution performed by an Observe-Orient-Decide-Act (OODA) reasoning mechanism.
+
+Multiple Problems can also be solved concurrently, with results streamed in completion order,
+sharing the agent's Knowledge, Resources, Program Store, Programmer & LM clients,
+while each Problem gets its own Task & Program state.
+
+Optionally, each solve can memoize sub-task results,
+so that sub-tasks repeated within the same solve are answered only once.
+
+With a Knowledge selector, only the chunks of large Knowledge pieces relevant to each Problem & sub-task
+are injected into LM calls, rather than all Knowledge in full.
+
+If tracing is enabled, each solve is traced as a span nesting all the work done for it.
+
+Solving can also be streamed as execution events (e.g., plans created, sub-tasks started & finished,
+and partial tokens of result syntheses), for user interfaces to show progress as it happens.
 """
 
 
 from __future__ import annotations
 
+from collections.abc import Callable, Iterable, Iterator
+from concurrent.futures import Future, ThreadPoolExecutor, wait, FIRST_COMPLETED
+from contextvars import copy_context
 from dataclasses import dataclass, field
+from queue import SimpleQueue
+from threading import Event as ThreadingEvent
 from typing import Any, TYPE_CHECKING
 
+from loguru import logger
+
 from openssa.core.program_store.program_store import ProgramStore
+from openssa.core.programming.hierarchical.events import HTPExecutionCancelled
 from openssa.core.programming.hierarchical.planner import HTPlanner
 from openssa.core.task.task import Task
+from openssa.core.util.tracing import SpanKind, traced
 
 if TYPE_CHECKING:
     from openssa.core.programming.base.program import BaseProgram
     from openssa.core.programming.base.programmer import BaseProgrammer
+    from openssa.core.programming.hierarchical.events import HTPEvent
+    from openssa.core.programming.hierarchical.memo import SubTaskMemo
     from openssa.core.knowledge.base import Knowledge
+    from openssa.core.knowledge.selection import KnowledgeSelector
     from openssa.core.resource.base import BaseResource
+    from openssa.core.util.misc import AskAnsPair
 
 
 @dataclass
@@ -78,6 +106,33 @@ class DANA:
                                          metadata=None,
                                          kw_only=False)
 
+    # factory of per-solve memos of sub-task results, e.g., `SubTaskMemo` or `partial(SubTaskMemo, embed_model=...)`
+    # (default: None, i.e., no memoization)
+    sub_task_memo_factory: Callable[[], SubTaskMemo] | None = field(default=None,
+                                                                    init=True,
+                                                                    repr=False,
+                                                                    hash=None,
+                                                                    compare=False,
+                                                                    metadata=None,
+                                                                    kw_only=False)
+
+    # selector of Knowledge relevant to each Problem & sub-task, for injecting only relevant chunks of large Knowledge
+    # (default: None, i.e., all Knowledge is injected in full)
+    knowledge_selector: KnowledgeSelector | None = field(default=None,
+                                                         init=True,
+                                                         repr=False,
+                                                         hash=None,
+                                                         compare=False,
+                                                         metadata=None,
+                                                         kw_only=False)
+
+    def __post_init__(self):
+        """Share Knowledge selector with Program Store & Programmer, unless they have their own."""
+        if self.knowledge_selector:
+            for component in (self.program_store, self.programmer):
+                if getattr(component, 'knowledge_selector', False) is None:
+                    component.knowledge_selector: KnowledgeSelector = self.knowledge_selector
+
     def add_knowledge(self, *new_knowledge: Knowledge):
         """Add new Knowledge piece(s) stored in string(s)."""
         self.knowledge.update(new_knowledge)
@@ -86,15 +141,24 @@ class DANA:
         """Add new Resource(s)."""
         self.resources.update(new_resources)
 
+    @traced('dana.solve', SpanKind.AGENT, attributes=lambda self, problem, *args, **kwargs: {'problem': problem})
     def solve(self, problem: str, adaptations_from_known_programs: dict[str, Any] | None = None,
-              allow_reject: bool = False) -> str:
+              allow_reject: bool = False, **execution_kwargs: Any) -> str:
         """Solve the posed Problem.
 
         First either find from the Program Store a solution Program suitable for the Problem,
         or create by the Programmer such a Program if there is no existing one.
 
         Then execute the found or created Program using an applicable execution engine/mechanism.
+
+        Additional keyword arguments are passed on to Program execution
+        (e.g., `max_workers` & `sequential_sharing` for concurrent execution of HTPs).
+
+        If a sub-task memo factory is set, a fresh memo is used for each solve.
         """
+        if self.sub_task_memo_factory and ('sub_task_memo' not in execution_kwargs):
+            execution_kwargs['sub_task_memo'] = self.sub_task_memo_factory()
+
         task: Task = Task(ask=problem, resources=self.resources)
 
         program: BaseProgram = (
@@ -104,4 +168,102 @@ class DANA:
             self.programmer.create_program(task=task, knowledge=self.knowledge)
         )
 
-        return program.execute(knowledge=self.knowledge, allow_reject=allow_reject)
+        return program.execute(knowledge=self.knowledge, allow_reject=allow_reject, **execution_kwargs)
+
+    def solve_stream(self, problem: str, adaptations_from_known_programs: dict[str, Any] | None = None,
+                     allow_reject: bool = False, **execution_kwargs: Any) -> Iterator[HTPEvent]:
+        """Solve the posed Problem as per `.solve(...)`, yielding execution events as they happen.
+
+        The last event is the top-level Task's `TASK_FINISHED` event, with the solution as data.
+        Errors in solving are raised after all preceding events have been yielded.
+
+        Partial tokens are only streamed from syntheses of results of Tasks having sub-tasks;
+        Tasks solved directly by Reasoner (including the top-level Task if not decomposed)
+        only report their results in their `TASK_FINISHED` events.
+
+        If the consumer stops early (e.g., closing the event iterator or breaking out of its loop),
+        solving is cancelled at its next event, i.e., once LM calls already in flight have returned.
+        """
+        events: SimpleQueue[HTPEvent | None] = SimpleQueue()
+        cancelled: ThreadingEvent = ThreadingEvent()
+
+        def put_event(event: HTPEvent):
+            if cancelled.is_set():
+                raise HTPExecutionCancelled(f'solving "{problem}" cancelled by event stream consumer')
+            events.put(event)
+
+        # note: executor is not used as context manager, so that consumer stopping early does not wait for solving
+        executor: ThreadPoolExecutor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='DANA')
+        try:
+            future: Future[str] = executor.submit(copy_context().run, self.solve, problem,
+                                                  adaptations_from_known_programs=adaptations_from_known_programs,
+                                                  allow_reject=allow_reject, event_callback=put_event,
+                                                  **execution_kwargs)
+            future.add_done_callback(lambda _: events.put(None))
+
+            while (event := events.get()) is not None:
+                yield event
+
+            future.result()
+
+        finally:
+            cancelled.set()
+            executor.shutdown(wait=False)
+
+    def solve_many(self, problems: Iterable[str], max_concurrency: int = 8,
+                   adaptations_from_known_programs: dict[str, Any] | None = None,
+                   allow_reject: bool = False, return_exceptions: bool = False,
+                   **execution_kwargs: Any) -> Iterator[AskAnsPair | tuple[str, Exception]]:
+        # pylint: disable=too-many-arguments
+        """Solve multiple posed Problems concurrently, yielding (Problem, solution) pairs in completion order.
+
+        At most `max_concurrency` Problems are in flight at any time,
+        each solved as per `.solve(...)` with its own Task & Program state.
+
+        Resource overviews are created upfront (concurrently), so that concurrent Problems do not duplicate such work.
+
+        With `return_exceptions` enabled, a Problem's error is yielded in place of its solution
+        rather than raised, so that other Problems keep being solved.
+        """
+        problems: Iterator[str] = iter(problems)
+        pending: dict[Future[str], str] = {}
+
+        with ThreadPoolExecutor(max_workers=max_concurrency, thread_name_prefix='DANA') as executor:
+            for overview_future in [executor.submit(copy_context().run, getattr, resource, 'overview')
+                                    for resource in self.resources]:
+                overview_future.result()
+
+            def submit_next() -> bool:
+                if (problem := next(problems, None)) is None:
+                    return False
+
+                pending[executor.submit(copy_context().run, self.solve, problem,
+                                        adaptations_from_known_programs=adaptations_from_known_programs,
+                                        allow_reject=allow_reject, **execution_kwargs)]: str = problem
+                return True
+
+            try:
+                while (len(pending) < max_concurrency) and submit_next():
+                    pass
+
+                while pending:
+                    done, _ = wait(pending, timeout=None, return_when=FIRST_COMPLETED)
+
+                    for future in done:
+                        problem: str = pending.pop(future)
+                        submit_next()
+
+                        if (error := future.exception()) is None:
+                            yield problem, future.result()
+
+                        elif return_exceptions:
+                            logger.warning(f'ERROR SOLVING PROBLEM "{problem}": {error!r}')
+                            yield problem, error
+
+                        else:
+                            raise error
+
+            finally:
+                # stop starting new Problems if consumer stops early or an error is raised
+                for future in pending:
+                    future.cancel()
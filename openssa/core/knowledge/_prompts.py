@@ -1,6 +1,12 @@
-from openssa.core.util.lm.base import LMChatHist
+from __future__ import annotations
 
-from .base import Knowledge
+from typing import TYPE_CHECKING
+
+from openssa.core.util.lm.history import ChatHistory
+
+if TYPE_CHECKING:
+    from .base import Knowledge
+    from .selection import KnowledgeSelector
 
 
 KNOWLEDGE_INJECTION_PROMPT_TEMPLATE: str = \
@@ -18,8 +24,14 @@ START OF KNOWLEDGE PIECE >>>
 """  # noqa: E122
 
 
-def knowledge_injection_lm_chat_msgs(knowledge: set[Knowledge]) -> LMChatHist:
+def knowledge_injection_lm_chat_msgs(knowledge: set[Knowledge], query: str | None = None,
+                                     selector: KnowledgeSelector | None = None) -> ChatHistory:
     assert isinstance(knowledge, set | list | tuple), TypeError('*** KNOWLEDGE MUST BE COLLECTION OF STRINGS ***')
 
-    return [{'role': 'system', 'content': KNOWLEDGE_INJECTION_PROMPT_TEMPLATE.format(knowledge=k)}
-            for k in knowledge]
+    # note: Knowledge is injected in canonical order, so that injected messages stay byte-identical across calls
+    # (and across processes, unlike iteration order of string sets), letting LM services' prompt caching reuse them;
+    # injected messages form an immutable history, shared as prefix by calls & retries without copying or mutation
+    return ChatHistory({'role': 'system', 'content': KNOWLEDGE_INJECTION_PROMPT_TEMPLATE.format(knowledge=k)}
+                       for k in (selector.select(knowledge, query=query)
+                                 if selector and query
+                                 else sorted(knowledge)))
@@ -0,0 +1,150 @@
+"""
+===================
+KNOWLEDGE SELECTION
+===================
+
+`KnowledgeSelector` keeps large Knowledge pieces (e.g., expert-knowledge files of many kilobytes)
+from being injected in full into every LM call,
+by chunking & embedding them once and selecting only the chunks most relevant to each call's question/task.
+
+Knowledge pieces no longer than a chunk are always injected in full, ahead of any selected chunks,
+and everything is injected in a canonical order,
+so that the stable prefix of LM calls' messages stays byte-identical across calls
+(letting LM services' prompt caching reuse it).
+"""
+
+
+from __future__ import annotations
+
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from hashlib import sha256
+from threading import Lock
+from typing import TYPE_CHECKING
+
+from llama_index.core.base.embeddings.base import BaseEmbedding as LlamaIndexEmbedModel
+import numpy as np
+
+if TYPE_CHECKING:
+    from .base import Knowledge
+
+
+def chunk_knowledge(knowledge: Knowledge, chunk_size: int = 2000) -> list[str]:
+    """Split Knowledge piece into chunks of at most `chunk_size` characters, on paragraph boundaries if possible."""
+    chunks: list[str] = []
+    current_chunk: str = ''
+
+    for paragraph in (paragraph.strip() for paragraph in knowledge.split('\n\n')):
+        if not paragraph:
+            continue
+
+        if current_chunk and (len(current_chunk) + 2 + len(paragraph) <= chunk_size):
+            current_chunk += f'\n\n{paragraph}'
+            continue
+
+        if current_chunk:
+            chunks.append(current_chunk)
+
+        # hard-split paragraphs longer than a chunk
+        while len(paragraph) > chunk_size:
+            chunks.append(paragraph[:chunk_size])
+            paragraph: str = paragraph[chunk_size:]
+
+        current_chunk: str = paragraph
+
+    if current_chunk:
+        chunks.append(current_chunk)
+
+    return chunks
+
+
+@dataclass
+class KnowledgeSelector:  # pylint: disable=too-many-instance-attributes
+    """Selector of Knowledge chunks relevant to questions/tasks."""
+
+    # embedding model for matching Knowledge chunks to questions/tasks
+    embed_model: LlamaIndexEmbedModel = field(init=True,
+                                              repr=False,
+                                              hash=None,
+                                              compare=True,
+                                              metadata=None,
+                                              kw_only=False)
+
+    # maximum number of characters per chunk
+    # (Knowledge pieces no longer than this are always injected in full)
+    chunk_size: int = 2000
+
+    # maximum number of selected chunks per question/task
+    n_selected_chunks: int = 8
+
+    # minimum similarity for chunks to be selected
+    min_similarity: float = 0.
+
+    # maximum number of cached question/task embeddings, least recently used ones being evicted first
+    max_cached_queries: int = 1024
+
+    def __post_init__(self):
+        """Initialize caches of chunk & question/task embeddings."""
+        self._lock: Lock = Lock()
+        self._chunks: dict[str, tuple[list[str], np.ndarray]] = {}
+        self._query_embeddings: OrderedDict[str, np.ndarray] = OrderedDict()
+
+    @staticmethod
+    def _normalized(embeddings: list[list[float]]) -> np.ndarray:
+        embeddings: np.ndarray = np.asarray(embeddings, dtype=np.float32)
+        return embeddings / np.maximum(np.linalg.norm(embeddings, axis=-1, keepdims=True), 1e-12)
+
+    def _chunks_and_embeddings(self, knowledge: Knowledge) -> tuple[list[str], np.ndarray]:
+        """Return chunks of Knowledge piece and their normalized embeddings, computed only once per piece."""
+        key: str = sha256(knowledge.encode()).hexdigest()
+
+        with self._lock:
+            if (cached := self._chunks.get(key)) is not None:
+                return cached
+
+        chunks: list[str] = chunk_knowledge(knowledge, chunk_size=self.chunk_size)
+        chunks_and_embeddings: tuple[list[str], np.ndarray] = (
+            chunks, self._normalized(self.embed_model.get_text_embedding_batch(chunks)))
+
+        with self._lock:
+            self._chunks[key]: tuple[list[str], np.ndarray] = chunks_and_embeddings
+
+        return chunks_and_embeddings
+
+    def _query_embedding(self, query: str) -> np.ndarray:
+        with self._lock:
+            if (embedding := self._query_embeddings.get(query)) is not None:
+                self._query_embeddings.move_to_end(query)
+                return embedding
+
+        embedding: np.ndarray = self._normalized(self.embed_model.get_query_embedding(query))
+
+        with self._lock:
+            self._query_embeddings[query]: np.ndarray = embedding
+            while len(self._query_embeddings) > self.max_cached_queries:
+                self._query_embeddings.popitem(last=False)
+
+        return embedding
+
+    def select(self, knowledge: set[Knowledge], query: str) -> list[Knowledge]:
+        """Select Knowledge relevant to question/task, in canonical order:
+        short Knowledge pieces in full (sorted), then selected chunks of long pieces (in document order).
+        """
+        pieces: list[Knowledge] = sorted(knowledge)
+        short_pieces: list[Knowledge] = [piece for piece in pieces if len(piece) <= self.chunk_size]
+
+        chunks: list[str] = []
+        embeddings: list[np.ndarray] = []
+        for piece in (piece for piece in pieces if len(piece) > self.chunk_size):
+            piece_chunks, piece_embeddings = self._chunks_and_embeddings(piece)
+            chunks.extend(piece_chunks)
+            embeddings.append(piece_embeddings)
+
+        if len(chunks) <= self.n_selected_chunks:
+            return short_pieces + chunks
+
+        similarities: np.ndarray = np.vstack(embeddings) @ self._query_embedding(query)
+        selected_indices: list[int] = [int(index) for index in np.argsort(-similarities)[:self.n_selected_chunks]
+                                       if similarities[index] >= self.min_similarity]
+
+        return short_pieces + [chunks[index] for index in sorted(selected_indices)]
@@ -0,0 +1,129 @@
+"""
+======================================================================
+PERSISTENT PROGRAM STORE containing versioned problem-solving Programs
+======================================================================
+
+`PersistentProgramStore` keeps serialized Hierarchical Task Plans (HTPs) in a SQLite database,
+appending a new version of a Program whenever it is added or updated with a different description or content.
+
+Only the latest versions' descriptions are loaded eagerly;
+Programs are only deserialized when they are selected (or otherwise accessed),
+so that start-up cost does not grow with the size of the Program library.
+"""
+
+
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+import json
+from pathlib import Path
+import sqlite3
+import time
+from typing import TYPE_CHECKING
+
+from openssa.core.programming.hierarchical.plan import HTP
+
+from .program_store import ProgramStore
+
+if TYPE_CHECKING:
+    from collections.abc import Callable
+    from openssa.core.programming.base.program import BaseProgram
+
+
+_SQLITE_SCHEMA: str = """
+CREATE TABLE IF NOT EXISTS programs (
+    name TEXT NOT NULL,
+    version INTEGER NOT NULL,
+    description TEXT NOT NULL,
+    program TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    PRIMARY KEY (name, version)
+);
+"""
+
+
+class _LazyPrograms(dict):
+    """Dictionary of Programs deserializing missing ones on access."""
+
+    def __init__(self, load: Callable[[str], BaseProgram]):
+        super().__init__()
+        self._load: Callable[[str], BaseProgram] = load
+
+    def __missing__(self, name: str) -> BaseProgram:
+        program: BaseProgram = self._load(name)
+        self[name]: BaseProgram = program
+        return program
+
+
+@dataclass
+class PersistentProgramStore(ProgramStore):
+    """Program Store persisting versioned HTPs in SQLite database, deserializing them lazily."""
+
+    # path to SQLite database file
+    path: Path | str = field(default='.openssa/program-store.db',
+                             init=True,
+                             repr=True,
+                             hash=None,
+                             compare=True,
+                             metadata=None,
+                             kw_only=True)
+
+    def __post_init__(self):
+        """Open database and load latest Program descriptions, persisting any initially given Programs."""
+        super().__post_init__()
+
+        Path(self.path).parent.mkdir(parents=True, exist_ok=True)
+        self._db: sqlite3.Connection = sqlite3.connect(database=str(self.path), check_same_thread=False)
+        self._db.execute('PRAGMA journal_mode=WAL')  # allow concurrent readers across processes
+        self._db.executescript(_SQLITE_SCHEMA)
+
+        initial_descriptions, initial_programs = self.descriptions, self.programs  # pylint: disable=access-member-before-definition
+
+        # note: SQLite returns bare columns from the row having the maximum version
+        self.descriptions: dict[str, str] = {
+            name: description
+            for name, description, _ in self._db.execute('SELECT name, description, MAX(version) FROM programs '
+                                                         'GROUP BY name')}
+        self.programs: _LazyPrograms = _LazyPrograms(load=self.get_program)
+
+        for name, program in initial_programs.items():
+            self.add_or_update_program(name=name, description=initial_descriptions[name], program=program)
+
+    def _latest_version(self, name: str) -> tuple[int, str, str] | None:
+        return self._db.execute('SELECT version, description, program FROM programs WHERE name = ? '
+                                'ORDER BY version DESC LIMIT 1', (name,)).fetchone()
+
+    def add_or_update_program(self, name: str, description: str, program: HTP):
+        """Add or update an HTP, persisting it as a new version if it differs from the latest one."""
+        serialized_program: str = json.dumps(program.to_dict(), ensure_ascii=False)
+
+        with self._lock:
+            latest_version: tuple[int, str, str] | None = self._latest_version(name)
+
+            if (latest_version is None) or (latest_version[1:] != (description, serialized_program)):
+                with self._db:
+                    self._db.execute('INSERT INTO programs VALUES (?, ?, ?, ?, ?)',
+                                     (name, (latest_version[0] + 1) if latest_version else 1,
+                                      description, serialized_program, time.time()))
+
+            super().add_or_update_program(name=name, description=description, program=program)
+
+    def get_program(self, name: str, version: int | None = None) -> HTP:
+        """Deserialize a Program's given version (default: latest version)."""
+        with self._lock:
+            row: tuple[str] | None = (self._db.execute('SELECT program FROM programs WHERE name = ? AND version = ?',
+                                                       (name, version)).fetchone()
+                                      if version is not None
+                                      else (latest_version[2:] if (latest_version := self._latest_version(name))
+                                            else None))
+
+        if row is None:
+            raise KeyError(f'*** NO PROGRAM "{name}"' + (f' VERSION {version}' if version is not None else '') + ' ***')
+
+        return HTP.from_dict(json.loads(row[0]))
+
+    def versions(self, name: str) -> list[int]:
+        """List versions of a Program."""
+        with self._lock:
+            return [version for (version,) in self._db.execute(
+                'SELECT version FROM programs WHERE name = ? ORDER BY version', (name,))]
@@ -2,6 +2,13 @@
 ============================================================
 PROGRAM STORE containing searchable problem-solving Programs
 ============================================================
+
+By default, an LM searches among all stored Programs' descriptions for a suitable one for each posed Problem.
+
+In indexed mode (i.e., when an embedding model is given), Program descriptions are embedded into a vector index
+as they are added or updated, and the LM only adjudicates among a shortlist of the Programs most similar to the
+posed Problem, or is skipped altogether when the most similar Program is similar enough,
+so that searching remains cheap for large collections of Programs.
 """
 
 
@@ -9,15 +16,25 @@ from __future__ import annotations
 
 from dataclasses import dataclass, field
 import json
+from threading import RLock
 from typing import Any, TYPE_CHECKING
 
+from llama_index.core.base.embeddings.base import BaseEmbedding as LlamaIndexEmbedModel
+from llama_index.core.schema import TextNode
+from llama_index.core.vector_stores.types import VectorStoreQuery, VectorStoreQueryResult
+from loguru import logger
+
 from openssa.core.knowledge._prompts import knowledge_injection_lm_chat_msgs
+from openssa.core.resource.numpy_vector_store import NumpyVectorStore
 from openssa.core.util.lm.openai import OpenAILM
+from openssa.core.util.retry import RetryPolicy
+from openssa.core.util.tracing import SpanKind, set_span_attributes, traced
 
 from ._prompts import PROGRAM_SEARCH_PROMPT_TEMPLATE
 
 if TYPE_CHECKING:
     from openssa.core.knowledge.base import Knowledge
+    from openssa.core.knowledge.selection import KnowledgeSelector
     from openssa.core.programming.base.program import BaseProgram
     from openssa.core.resource.base import BaseResource
     from openssa.core.task.task import Task
@@ -25,7 +42,7 @@ if TYPE_CHECKING:
 
 
 @dataclass
-class ProgramStore:
+class ProgramStore:  # pylint: disable=too-many-instance-attributes
     """Program Store containing searchable problem-solving Programs."""
 
     # informative descriptions of stored problem-solving Programs, indexed by name
@@ -55,33 +72,139 @@ class ProgramStore:
                        metadata=None,
                        kw_only=False)
 
+    # policy for retrying Program search until LM response is a valid Program name (or NONE)
+    retry_policy: RetryPolicy = field(default_factory=RetryPolicy,
+                                      init=True,
+                                      repr=False,
+                                      hash=None,
+                                      compare=False,
+                                      metadata=None,
+                                      kw_only=False)
+
+    # embedding model for indexing Program descriptions, so that LM only adjudicates among most similar Programs
+    # (default: None, i.e., LM searches among all stored Programs)
+    embed_model: LlamaIndexEmbedModel | None = field(default=None,
+                                                     init=True,
+                                                     repr=False,
+                                                     hash=None,
+                                                     compare=False,
+                                                     metadata=None,
+                                                     kw_only=False)
+
+    # number of most similar Programs shortlisted for LM adjudication in indexed mode
+    n_shortlisted_programs: int = 5
+
+    # minimum similarity for Programs to be shortlisted in indexed mode
+    min_similarity: float = 0.
+
+    # similarity at & above which the most similar Program is selected without LM adjudication in indexed mode
+    # (None: always adjudicate by LM)
+    lm_skipping_similarity: float | None = None
+
+    # selector of Knowledge relevant to each posed Problem, for injecting only relevant chunks of large Knowledge pieces
+    # (default: None, i.e., all Knowledge is injected in full)
+    knowledge_selector: KnowledgeSelector | None = field(default=None,
+                                                         init=True,
+                                                         repr=False,
+                                                         hash=None,
+                                                         compare=False,
+                                                         metadata=None,
+                                                         kw_only=False)
+
+    def __post_init__(self):
+        """Initialize index of Program descriptions."""
+        self._lock: RLock = RLock()
+        self._index: NumpyVectorStore = NumpyVectorStore()
+        self._indexed_descriptions: dict[str, str] = {}
+
     def add_or_update_program(self, name: str, description: str, program: BaseProgram):
         """Add or update a Program with its unique identifying name & informative description."""
         self.descriptions[name]: str = description
         self.programs[name]: BaseProgram = program
 
+        if self.embed_model is not None:
+            self._update_index()
+
+    def _update_index(self):
+        """Embed new or updated Program descriptions into index, and remove removed Programs from index."""
+        with self._lock:
+            stale_names: list[str] = [name for name, description in self._indexed_descriptions.items()
+                                      if self.descriptions.get(name) != description]
+            new_names: list[str] = [name for name, description in self.descriptions.items()
+                                    if self._indexed_descriptions.get(name) != description]
+
+            if stale_names:
+                self._index.delete_nodes(node_ids=stale_names)
+                for name in stale_names:
+                    del self._indexed_descriptions[name]
+
+            if new_names:
+                embeddings: list[list[float]] = self.embed_model.get_text_embedding_batch(
+                    [self.descriptions[name] for name in new_names])
+                self._index.add([TextNode(id_=name, embedding=embedding)
+                                 for name, embedding in zip(new_names, embeddings)])
+                self._indexed_descriptions.update({name: self.descriptions[name] for name in new_names})
+
+    def _shortlist(self, task: Task) -> dict[str, float]:
+        """Shortlist Programs most similar to posed Problem, with their similarities in descending order."""
+        self._update_index()
+
+        result: VectorStoreQueryResult = self._index.query(
+            VectorStoreQuery(query_embedding=self.embed_model.get_query_embedding(task.ask),
+                             similarity_top_k=self.n_shortlisted_programs))
+
+        return {name: similarity for name, similarity in zip(result.ids, result.similarities)
+                if similarity >= self.min_similarity}
+
+    @traced('program_store.find_program', SpanKind.PROGRAM_SEARCH,
+            attributes=lambda self, task, *args, **kwargs: {'ask': task.ask})
     def find_program(self, task: Task, knowledge: set[Knowledge] | None = None,
                      adaptations_from_known_programs: dict[str, Any] | None = None) -> BaseProgram | None:
         """Find a suitable Program for the posed Problem, or return None."""
-        knowledge_lm_hist: LMChatHist | None = (knowledge_injection_lm_chat_msgs(knowledge=knowledge)
+        if self.embed_model is None:
+            candidate_descriptions: dict[str, str] = self.descriptions
+
+        else:
+            if not (shortlist := self._shortlist(task)):
+                return None
+
+            top_program_name, top_similarity = next(iter(shortlist.items()))
+            if (self.lm_skipping_similarity is not None) and (top_similarity >= self.lm_skipping_similarity):
+                logger.debug(f'PROGRAM SEARCH: SELECTED "{top_program_name}" (SIMILARITY {top_similarity:.3f})')
+                return self._adapt(top_program_name, task, adaptations_from_known_programs)
+
+            candidate_descriptions: dict[str, str] = {name: self.descriptions[name] for name in shortlist}
+
+        knowledge_lm_hist: LMChatHist | None = (knowledge_injection_lm_chat_msgs(knowledge=knowledge, query=task.ask,
+                                                                                 selector=self.knowledge_selector)
                                                 if knowledge
                                                 else None)
 
-        valid_responses: set[str] = set(self.descriptions)
+        valid_responses: set[str] = set(candidate_descriptions)
         valid_responses.add('NONE')
 
-        matching_program_name: str = ''
-        while matching_program_name not in valid_responses:
-            matching_program_name: str = self.lm.get_response(
-                prompt=PROGRAM_SEARCH_PROMPT_TEMPLATE.format(problem=task.ask,
-                                                             resource_overviews={resource.unique_name: resource.overview
-                                                                                 for resource in task.resources},
-                                                             program_descriptions=self.descriptions),
-                history=knowledge_lm_hist)
+        def validate(program_name: str) -> str:
+            if program_name not in valid_responses:
+                raise ValueError(f'response must be exactly one of {sorted(valid_responses)}')
+            return program_name
+
+        matching_program_name: str = self.retry_policy.get_valid_lm_response(
+            lm=self.lm,
+            prompt=PROGRAM_SEARCH_PROMPT_TEMPLATE.format(problem=task.ask,
+                                                         resource_overviews={resource.unique_name: resource.overview
+                                                                             for resource in task.resources},
+                                                         program_descriptions=candidate_descriptions),
+            parse=validate, name='PROGRAM SEARCH', history=knowledge_lm_hist,
+            fallback=lambda _: 'NONE')
 
         if matching_program_name == 'NONE':
             return None
 
-        adapted_program: BaseProgram = self.programs[matching_program_name].adapt(**(adaptations_from_known_programs or {}))
+        return self._adapt(matching_program_name, task, adaptations_from_known_programs)
+
+    def _adapt(self, program_name: str, task: Task,
+               adaptations_from_known_programs: dict[str, Any] | None = None) -> BaseProgram:
+        set_span_attributes(program=program_name)
+        adapted_program: BaseProgram = self.programs[program_name].adapt(**(adaptations_from_known_programs or {}))
         adapted_program.task: Task = task
         return adapted_program
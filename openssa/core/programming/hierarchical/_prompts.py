@@ -137,6 +137,33 @@ Please return ONLY the SEQUENCE OF SENTENCES/PARAGRAPHS WITH SUCH HEADERS, and n
 )
 
 
+STRUCTURED_DECOMPOSITION_PROMPT_TEMPLATE: str = (
+RESOURCE_OVERVIEW_PROMPT_SECTION +  # noqa: E122
+"""and consider that you are trying to solve the following top-level question/problem/task:
+
+```
+{problem}
+```
+
+please return a JSON dictionary with key "sub-tasks" mapping to a list of 1 to {max_subtasks_per_decomp} strings,
+each describing a sub-question/problem/task into which such top-level question/problem/task could/should be decomposed,
+per the following template:
+
+```json
+{{
+    "sub-tasks": [
+        "<textual description of 1st sub-question/problem/task to answer/solve>",
+        "<textual description of 2nd sub-question/problem/task to answer/solve>",
+        ...
+    ]
+}}
+```
+
+Please return ONLY the JSON DICTIONARY and no other text, not even the "```json" wrapping!
+"""  # noqa: E122
+)
+
+
 HTP_RESULTS_SYNTH_PROMPT_TEMPLATE: str = (
 """Synthesize an answer/solution for the following question/problem/task:
 
@@ -156,3 +183,17 @@ please DO NOT USE GENERIC NAMES/NUMBERS TO REFER TO SUPPORTING DETAILS
 because such generic referencing names could get very confusing when presented in larger conversations.
 """  # noqa: E122
 )
+
+
+SPECULATIVE_DIRECT_ATTEMPT_PROMPT_TEMPLATE: str = (
+"""Without consulting any informational resources,
+please briefly give your best preliminary answer/solution for the following question/problem/task:
+
+```
+{ask}
+```
+
+Please state any key assumptions and uncertainties, as such preliminary answer/solution
+will later be checked against more reliable supporting results.
+"""  # noqa: E122
+)
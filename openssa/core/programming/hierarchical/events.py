@@ -0,0 +1,60 @@
+"""
+====================
+HTP EXECUTION EVENTS
+====================
+
+`HTPEvent`s report the progress of HTP execution as it happens
+(plans created, tasks started & finished, and partial tokens of result syntheses),
+so that user interfaces can show progress long before the final result is complete.
+
+Event callbacks can stop HTP execution by raising `HTPExecutionCancelled`,
+which takes effect at the next event (LM calls already in flight cannot be aborted).
+"""
+
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+from enum import StrEnum
+from typing import Any, TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from collections.abc import Callable
+
+
+class HTPExecutionCancelled(Exception):
+    """Raised by event callbacks to stop HTP execution."""
+
+
+class HTPEventType(StrEnum):
+    """Type of HTP execution event."""
+
+    # task started being executed
+    TASK_STARTED: str = 'task-started'
+
+    # plan of sub-tasks created (or found pre-created) for task, with HTP dictionary as data
+    PLAN_CREATED: str = 'plan-created'
+
+    # partial tokens of task's result synthesized from sub-tasks' results, with partial tokens as data
+    # (note: results of tasks solved directly by Reasoner are not streamed, but only reported upon finishing)
+    SYNTHESIS_TOKEN: str = 'synthesis-token'
+
+    # task finished being executed, with result as data
+    TASK_FINISHED: str = 'task-finished'
+
+
+@dataclass(frozen=True)
+class HTPEvent:
+    """HTP execution event."""
+
+    type: HTPEventType
+
+    # question/problem/task concerned, and its depth in executed HTP (root being 0)
+    ask: str
+    depth: int = 0
+
+    # event-specific data
+    data: Any = None
+
+
+type HTPEventCallback = Callable[[HTPEvent], None]
@@ -0,0 +1,209 @@
+"""
+================================
+SUB-TASK RESULT MEMO (PER-SOLVE)
+================================
+
+`SubTaskMemo` lets overlapping sub-tasks arising at different places within an HTP run
+(e.g., "What was total revenue in FY2022?" supporting several parent tasks at different depths)
+be answered once, with later occurrences reusing the already-computed result.
+
+Sub-tasks are matched by normalized ask & set of Resources,
+falling back to embedding similarity among asks for the same set of Resources if an embedding model is given.
+
+Sub-tasks being computed are claimed, so that concurrent occurrences of the same sub-task
+wait for the first one's result instead of computing it again,
+except where waiting could deadlock (e.g., a sub-task recurring among its own sub-tasks),
+in which case they are computed independently.
+
+A memo is meant to live for a single solve, as results depend on that solve's Knowledge & Resources.
+"""
+
+
+from __future__ import annotations
+
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar, Token
+from dataclasses import dataclass, field
+from threading import Event, Lock
+from typing import TYPE_CHECKING
+
+from llama_index.core.base.embeddings.base import BaseEmbedding as LlamaIndexEmbedModel, similarity
+from loguru import logger
+
+if TYPE_CHECKING:
+    from collections.abc import Iterator
+    from openssa.core.task.task import Task
+
+
+type SubTaskKey = tuple[str, frozenset[str]]
+
+
+# keys of sub-tasks claimed by current execution path (i.e., the current sub-task & its ancestors)
+_CLAIMED_KEYS: ContextVar[frozenset[SubTaskKey]] = ContextVar('openssa_sub_task_memo_claimed_keys',
+                                                              default=frozenset())
+
+
+@dataclass
+class SubTaskMemo:  # pylint: disable=too-many-instance-attributes
+    """Memo of sub-task results keyed by normalized ask & set of Resources."""
+
+    # embedding model for matching near-duplicate asks
+    # (None: exact matching of normalized asks only)
+    embed_model: LlamaIndexEmbedModel | None = field(default=None,
+                                                     init=True,
+                                                     repr=False,
+                                                     hash=None,
+                                                     compare=True,
+                                                     metadata=None,
+                                                     kw_only=False)
+
+    # minimum embedding similarity between asks for near-duplicate matching
+    similarity_threshold: float = 0.95
+
+    def __post_init__(self):
+        """Initialize memo table & in-flight claims."""
+        self._lock: Lock = Lock()
+        self._results: dict[SubTaskKey, str] = {}
+        self._embeddings: dict[str, list[float]] = {}
+
+        # events set once claimed sub-tasks are finished (successfully or not)
+        self._in_flight: dict[SubTaskKey, Event] = {}
+
+        # (waiting claimed key, awaited key) pairs, for detecting would-be deadlocks
+        self._waits: Counter[tuple[SubTaskKey, SubTaskKey]] = Counter()
+
+        self.hits: int = 0
+        self.similar_hits: int = 0
+        self.misses: int = 0
+
+    @staticmethod
+    def key(task: Task) -> SubTaskKey:
+        """Return memo key of normalized ask & Resources' unique names."""
+        return (' '.join(task.ask.lower().split()).rstrip(' .?!'),
+                frozenset(resource.unique_name for resource in task.resources))
+
+    def _embedding(self, normalized_ask: str) -> list[float]:
+        with self._lock:
+            embedding: list[float] | None = self._embeddings.get(normalized_ask)
+
+        if embedding is None:
+            # note: embedding is computed outside lock, so concurrent callers may compute same embedding
+            embedding: list[float] = self.embed_model.get_text_embedding(normalized_ask)
+            with self._lock:
+                embedding: list[float] = self._embeddings.setdefault(normalized_ask, embedding)
+
+        return embedding
+
+    def _lookup(self, task: Task) -> tuple[str | None, bool]:
+        """Return memoized result of same or near-duplicate sub-task (or None), and whether it is near-duplicate."""
+        normalized_ask, resource_names = key = self.key(task)
+
+        with self._lock:
+            if (result := self._results.get(key)) is not None:
+                return result, False
+
+            candidate_keys: list[SubTaskKey] = [candidate_key for candidate_key in self._results
+                                                if candidate_key[1] == resource_names]
+
+        if (self.embed_model is not None) and candidate_keys:
+            embedding: list[float] = self._embedding(normalized_ask)
+
+            best_similarity, best_key = max((similarity(embedding, self._embedding(candidate_key[0])), candidate_key)
+                                            for candidate_key in candidate_keys)
+
+            if best_similarity >= self.similarity_threshold:
+                logger.debug(f'SUB-TASK MEMO: "{task.ask}" ~ "{best_key[0]}" (SIMILARITY {best_similarity:.3f})')
+                with self._lock:
+                    return self._results[best_key], True
+
+        return None, False
+
+    def _count(self, result: str | None, similar: bool):
+        with self._lock:
+            if result is None:
+                self.misses += 1
+            elif similar:
+                self.similar_hits += 1
+            else:
+                self.hits += 1
+
+    def get(self, task: Task) -> str | None:
+        """Return memoized result of same or near-duplicate sub-task, or None."""
+        result, similar = self._lookup(task)
+        self._count(result, similar)
+        return result
+
+    def put(self, task: Task, result: str):
+        """Memoize sub-task result."""
+        with self._lock:
+            self._results[self.key(task)]: str = result
+
+    def _awaits_transitively(self, key: SubTaskKey, claimed_keys: frozenset[SubTaskKey]) -> bool:
+        """Check (with lock held) whether finishing claimed sub-task of `key` awaits any of `claimed_keys`."""
+        awaited_keys: set[SubTaskKey] = {key}
+        to_check: list[SubTaskKey] = [key]
+        while to_check:
+            waiting_key: SubTaskKey = to_check.pop()
+            for waiter, awaited_key in self._waits:
+                if (waiter == waiting_key) and (awaited_key not in awaited_keys):
+                    awaited_keys.add(awaited_key)
+                    to_check.append(awaited_key)
+        return not awaited_keys.isdisjoint(claimed_keys)
+
+    @contextmanager
+    def claim(self, task: Task) -> Iterator[str | None]:
+        """Yield memoized result of same or near-duplicate sub-task, if any,
+        after waiting for same sub-task being computed elsewhere (unless such waiting could deadlock);
+        or else yield None, with sub-task claimed for caller to compute & `.put(...)` its result within context.
+        """
+        key: SubTaskKey = self.key(task)
+        claimed_keys: frozenset[SubTaskKey] = _CLAIMED_KEYS.get()
+
+        while True:
+            result, similar = self._lookup(task)
+            if result is not None:
+                self._count(result, similar)
+                yield result
+                return
+
+            with self._lock:
+                if (result := self._results.get(key)) is not None:  # finished since lookup
+                    event: Event | None = None
+
+                elif (event := self._in_flight.get(key)) is None:
+                    self._in_flight[key]: Event = Event()
+                    break
+
+                # wait for same sub-task computed elsewhere only if it does not itself await current one's ancestors,
+                # or else compute it independently, without claiming it
+                elif self._awaits_transitively(key, claimed_keys):
+                    logger.debug(f'SUB-TASK MEMO: "{task.ask}" COMPUTED INDEPENDENTLY TO AVOID DEADLOCK')
+                    event: Event | None = None
+
+                else:
+                    waits: list[tuple[SubTaskKey, SubTaskKey]] = [(claimed_key, key) for claimed_key in claimed_keys]
+                    self._waits.update(waits)
+
+            # note: yielding only after releasing lock, as caller may use memo within context
+            if event is None:
+                self._count(result, similar=False)
+                yield result
+                return
+
+            # if computation elsewhere fails, look up & possibly claim sub-task again
+            try:
+                event.wait()
+            finally:
+                with self._lock:
+                    self._waits -= Counter(waits)
+
+        self._count(None, similar=False)
+        token: Token = _CLAIMED_KEYS.set(claimed_keys | {key})
+        try:
+            yield None
+
+        finally:
+            _CLAIMED_KEYS.reset(token)
+            with self._lock:
+                self._in_flight.pop(key).set()
@@ -13,14 +13,38 @@ to work through sub-tasks from the lowest levels and roll up results up to the t
 
 There is also a horizontal results-sharing mechanism
 to enable the execution of a subsequent HTP node to benefit from results from earlier nodes at the same depth level.
+
+Alternatively, when horizontal results-sharing is not needed,
+sibling sub-HTPs at the same depth level can be executed concurrently,
+on a bounded `HTPWorkerPool` shared by the whole solve (so that concurrency does not multiply with depth).
+
+With a per-solve `SubTaskMemo`, sub-tasks repeated (or nearly repeated) within the same HTP run
+reuse already-computed results instead of being reasoned through again.
+
+For pre-decomposed HTPs (e.g., expert Programs), a `DirectAttemptPolicy` controls whether each internal node's
+direct solution attempt runs before its sub-HTPs (default), concurrently with them, only as a cheap speculative
+LM-only check, or not at all.
+
+Optionally, Tasks that the Reasoner cannot resolve confidently are dynamically decomposed by the Programmer
+(within its remaining depth) into sub-HTPs executed in turn.
+For latency-sensitive upper levels of HTPs, such decomposition can be started speculatively
+concurrently with direct solution attempts, its resulting plan being discarded if direct solutions are confident
+(at the cost of the decomposition's LM call(s), which cannot be aborted once started).
+
+Progress can be followed through `HTPEvent`s reported to an event callback as execution proceeds,
+including streamed partial tokens of result syntheses.
+
+If tracing is enabled, each HTP node's execution is traced as a span, nesting its Reasoner, Resource & LM calls.
 """
 
 from __future__ import annotations
 
+from concurrent.futures import Future, as_completed
 from dataclasses import dataclass, field, replace
+from enum import StrEnum
 from pprint import pformat
 from types import SimpleNamespace
-from typing import TypedDict, Required, NotRequired, TYPE_CHECKING
+from typing import Any, TypedDict, Required, NotRequired, TYPE_CHECKING
 
 from loguru import logger
 from openssa.core.knowledge._prompts import knowledge_injection_lm_chat_msgs
@@ -28,21 +52,45 @@ from openssa.core.programming.base.program import BaseProgram
 from openssa.core.reasoning.ooda.ooda_reasoner import OodaReasoner
 from openssa.core.task.status import TaskStatus
 from openssa.core.task.task import Task, TaskDict
+from openssa.core.util.token_budget import PromptSection
+from openssa.core.util.tracing import SpanKind, set_span_attributes, traced
 from tqdm import tqdm
 
-from ._prompts import HTP_RESULTS_SYNTH_PROMPT_TEMPLATE
+from .events import HTPEvent, HTPEventType
+from .workers import HTPWorkerPool
+from ._prompts import HTP_RESULTS_SYNTH_PROMPT_TEMPLATE, SPECULATIVE_DIRECT_ATTEMPT_PROMPT_TEMPLATE
 
 if TYPE_CHECKING:
     from openssa.core.reasoning.base import BaseReasoner
     from openssa.core.resource.base import BaseResource
+    from openssa.core.resource.router import BaseResourceRouter
     from openssa.core.knowledge.base import Knowledge
+    from openssa.core.util.lm.base import LMChatHist
     from openssa.core.util.misc import AskAnsPair
+    from .events import HTPEventCallback
+    from .memo import SubTaskMemo
 
 type HTPDict = TypedDict('HTPDict', {'task': Required[TaskDict | str],
                                      'sub-htps': NotRequired[list[HTPDict]]},
                          total=False)
 
 
+class DirectAttemptPolicy(StrEnum):
+    """Policy for direct solution attempts at HTP nodes that already have sub-HTPs."""
+
+    # attempt direct solution with Reasoner before executing sub-HTPs
+    ALWAYS: str = 'always'
+
+    # attempt direct solution with Reasoner concurrently with executing sub-HTPs
+    PARALLEL: str = 'parallel'
+
+    # skip direct solution attempt, synthesizing result from sub-HTPs' results only
+    SKIP: str = 'skip'
+
+    # only get cheap speculative preliminary solution from LM, without Reasoner querying Resources
+    SPECULATIVE: str = 'speculative'
+
+
 class PLAN(SimpleNamespace):
     pass  # namespace class just for pretty-printing
 
@@ -102,12 +150,19 @@ class HTP(BaseProgram):
         return {'task': self.task.to_json_dict(),
                 'sub-htps': [sub_htp.to_dict() for sub_htp in self.sub_htps]}
 
-    def fill_missing_resources(self):
-        """Fix missing Resources in HTP."""
+    def fill_missing_resources(self, resource_router: BaseResourceRouter | None = None):
+        """Fix missing Resources in HTP.
+
+        Sub-tasks missing Resources are assigned either all of their parent tasks' Resources,
+        or, if a Resource Router is given, only those most relevant to them.
+        """
         for sub_htp in self.sub_htps:
             if not sub_htp.task.resources:
-                sub_htp.task.resources: set[BaseResource] = self.task.resources
-            sub_htp.fill_missing_resources()
+                sub_htp.task.resources: set[BaseResource] = (resource_router.route(ask=sub_htp.task.ask,
+                                                                                   resources=self.task.resources)
+                                                             if resource_router
+                                                             else self.task.resources)
+            sub_htp.fill_missing_resources(resource_router=resource_router)
 
     def adapt(self, **kwargs: str):
         """Return adapted copy."""
@@ -115,18 +170,113 @@ class HTP(BaseProgram):
                        task=replace(self.task, ask=self.task.ask.format(**kwargs)),
                        sub_htps=[sub_htp.adapt(**kwargs) for sub_htp in self.sub_htps])
 
+    @traced('htp.execute', SpanKind.HTP,
+            attributes=lambda self, *args, depth=0, **kwargs: {'ask': self.task.ask, 'depth': depth})
     def execute(self, knowledge: set[Knowledge] | None = None, other_results: list[AskAnsPair] | None = None,
-                allow_reject: bool = False) -> str:
-        # pylint: disable=arguments-differ
+                allow_reject: bool = False, max_workers: int = 1, sequential_sharing: bool = True,
+                sub_task_memo: SubTaskMemo | None = None,
+                direct_attempt: DirectAttemptPolicy | str = DirectAttemptPolicy.ALWAYS,
+                dynamic_decomposition: bool = False, speculative_decomposition_depth: int = 0, depth: int = 0,
+                event_callback: HTPEventCallback | None = None, worker_pool: HTPWorkerPool | None = None) -> str:
+        # pylint: disable=arguments-differ,too-many-arguments
         """Execute and return string result, using specified Reasoner to work through involved Task & Sub-Tasks.
 
         Execution also optionally takes into account domain-specific Knowledge and/or potentially elevant other results.
+
+        By default, sibling sub-HTPs are executed one after another,
+        each taking into account results from earlier siblings (horizontal results-sharing).
+        With `sequential_sharing` disabled and `max_workers` > 1,
+        sibling sub-HTPs are instead executed independently & concurrently,
+        by at most `max_workers` threads (including the calling thread) for the whole solve across all depth levels,
+        with results still integrated in sibling order.
+
+        With a `sub_task_memo`, Tasks already solved earlier in the same run are not solved again,
+        and Tasks being solved concurrently elsewhere in the same run are waited for rather than solved again.
+
+        For nodes that already have sub-HTPs, `direct_attempt` policy controls their direct solution attempts.
+
+        With `dynamic_decomposition` enabled, nodes without sub-HTPs whose direct solutions are not confident
+        are decomposed by Programmer (within its remaining depth) into sub-HTPs, which are then executed.
+        (note: disabled by default, as such decomposition never happened in earlier versions due to a bug)
+
+        With `dynamic_decomposition` enabled, for nodes at `depth` (root being 0) less than
+        `speculative_decomposition_depth`, decomposition by Programmer is started on a free worker (if any)
+        concurrently with direct solution attempt, and its resulting plan is only used if direct solution turns out
+        unsatisfactory. Otherwise, the plan is discarded, but its LM call(s) are still paid for
+        unless it has not started yet, as LM calls in flight cannot be aborted.
+
+        With an `event_callback`, progress is reported through `HTPEvent`s,
+        with result syntheses being streamed as partial tokens.
+
+        The solve-wide `worker_pool` is created at the top-level HTP node and passed down to sub-HTPs.
         """
-        self.fill_missing_resources()  # TODO: optimize to not always use all resources
+        execution_kwargs: dict[str, Any] = {'knowledge': knowledge, 'other_results': other_results,
+                                            'allow_reject': allow_reject, 'max_workers': max_workers,
+                                            'sequential_sharing': sequential_sharing, 'sub_task_memo': sub_task_memo,
+                                            'direct_attempt': direct_attempt, 'dynamic_decomposition': dynamic_decomposition,
+                                            'speculative_decomposition_depth': speculative_decomposition_depth,
+                                            'depth': depth, 'event_callback': event_callback}
+
+        if worker_pool is not None:
+            return self._execute(worker_pool=worker_pool, **execution_kwargs)
+
+        with HTPWorkerPool(max_workers=max_workers) as solve_worker_pool:
+            return self._execute(worker_pool=solve_worker_pool, **execution_kwargs)
+
+    def _execute(self, *, knowledge: set[Knowledge] | None, other_results: list[AskAnsPair] | None,
+                 allow_reject: bool, max_workers: int, sequential_sharing: bool, sub_task_memo: SubTaskMemo | None,
+                 direct_attempt: DirectAttemptPolicy | str, dynamic_decomposition: bool,
+                 speculative_decomposition_depth: int, depth: int,
+                 event_callback: HTPEventCallback | None, worker_pool: HTPWorkerPool) -> str:
+        # pylint: disable=too-many-arguments,too-many-locals
+        """Execute as per `.execute(...)`, with given solve-wide worker pool, reusing memoized results if any."""
+        self.fill_missing_resources(resource_router=getattr(self.programmer, 'resource_router', None))
+        self._notify(event_callback, HTPEventType.TASK_STARTED, depth=depth)
+
+        solving_kwargs: dict[str, Any] = {'knowledge': knowledge, 'other_results': other_results,
+                                          'allow_reject': allow_reject, 'max_workers': max_workers,
+                                          'sequential_sharing': sequential_sharing, 'sub_task_memo': sub_task_memo,
+                                          'direct_attempt': direct_attempt, 'dynamic_decomposition': dynamic_decomposition,
+                                          'speculative_decomposition_depth': speculative_decomposition_depth,
+                                          'depth': depth, 'event_callback': event_callback, 'worker_pool': worker_pool}
+
+        if sub_task_memo is None:
+            self._solve(**solving_kwargs)
+
+        # reuse result of same or near-duplicate Task already solved (or being solved) in the same run, if any
+        else:
+            with sub_task_memo.claim(self.task) as memoized_result:
+                if memoized_result is not None:
+                    logger.debug(f'\nREUSING MEMOIZED RESULT OF "{self.task.ask}"\n')
+                    self.task.result: str = memoized_result
+                    self.task.status: TaskStatus = TaskStatus.DONE
+                    set_span_attributes(memo_hit=True)
+
+                else:
+                    sub_task_memo.put(self.task, self._solve(**solving_kwargs))
+
+        self._notify(event_callback, HTPEventType.TASK_FINISHED, depth=depth, data=self.task.result)
+        return self.task.result
+
+    def _solve(self, *, knowledge: set[Knowledge] | None, other_results: list[AskAnsPair] | None,
+               allow_reject: bool, max_workers: int, sequential_sharing: bool, sub_task_memo: SubTaskMemo | None,
+               direct_attempt: DirectAttemptPolicy | str, dynamic_decomposition: bool,
+               speculative_decomposition_depth: int, depth: int,
+               event_callback: HTPEventCallback | None, worker_pool: HTPWorkerPool) -> str:
+        # pylint: disable=too-many-arguments,too-many-locals
+        """Solve Task directly and/or via (existing or dynamically decomposed) sub-HTPs, returning its result."""
+        planning_future: Future[HTP] | None = (self._start_speculative_decomposition(worker_pool=worker_pool,
+                                                                                     knowledge=knowledge)
+                                               if dynamic_decomposition and (depth < speculative_decomposition_depth)
+                                               else None)
 
         # first, attempt direct solution with Reasoner
-        reasoning_wo_sub_results: str = self.reasoner.reason(task=self.task, knowledge=knowledge,
-                                                             other_results=other_results)  # noqa: E501
+        # (or, for HTPs already having sub-HTPs, as per direct-attempt policy)
+        direct_attempt: DirectAttemptPolicy = DirectAttemptPolicy(direct_attempt)
+        reasoning_wo_sub_results, direct_attempt_future = self._attempt_directly(worker_pool=worker_pool,
+                                                                                 knowledge=knowledge,
+                                                                                 other_results=other_results,
+                                                                                 direct_attempt=direct_attempt)
 
         if self.sub_htps:
             decomposed_htp: HTP = self
@@ -134,60 +284,47 @@ class HTP(BaseProgram):
         # if Reasoner's result is unsatisfactory,
         # and if there is still allowed recursive depth,
         # use Programmer to decompose Problem into sub-HTPs
-        elif (self.task.is_attempted and not self.task.is_done) and (self.programmer and self.programmer.max_depth):
-            decomposed_htp: HTP = self.programmer.create_htp(task=self.task, knowledge=knowledge,
-                                                             reasoner=self.reasoner)
+        elif (dynamic_decomposition and (self.task.is_attempted() and not self.task.is_done()) and
+              (self.programmer and self.programmer.max_depth)):
+            decomposed_htp: HTP = (planning_future.result()
+                                   if planning_future
+                                   else self.programmer.create_htp(task=self.task, knowledge=knowledge,
+                                                                   reasoner=self.reasoner))
 
         else:
             decomposed_htp = None
 
+            # discard speculative decomposition, cancelling it if not yet started
+            # (note: if already started, its LM call(s) still run to completion & are paid for)
+            if planning_future:
+                planning_future.cancel()
+                logger.debug(f'\nDISCARDING SPECULATIVE DECOMPOSITION OF "{self.task.ask}"\n')
+
         # if there are sub-HTPs, recursively execute them and integrate their results
         if decomposed_htp:
             logger.info('\n'
                         'EXECUTING HIERACHICAL TASK PLAN (HTP)\n'
                         '=====================================\n'
                         f'\n{decomposed_htp.pformat}\n')
+            self._notify(event_callback, HTPEventType.PLAN_CREATED, depth=depth, data=decomposed_htp.to_dict())
+            set_span_attributes(n_sub_htps=len(decomposed_htp.sub_htps))
 
-            sub_results: list[AskAnsPair] = []
-            for sub_htp in tqdm(decomposed_htp.sub_htps):
-                sub_results.append((sub_htp.task.ask, sub_htp.execute(knowledge=knowledge, other_results=sub_results)))
-
-            # If the Reasoner allows for rejecting to answer due to lack of information
-            if allow_reject:
-                inputs: str = (
-                        "If supporting information request for clarification or more information, "
-                        "just request more information without doing any other thing. "
-                        + '\n\n'.join((f'SUPPORTING QUESTION/TASK #{i + 1}:\n{ask}\n'
-                                       '\n'
-                                       f'SUPPORTING RESULT #{i + 1}:\n{result}\n')
-                                      for i, (ask, result) in enumerate(sub_results)) +
-                        (('\n\n' +
-                          '\n\n'.join((f'OTHER QUESTION/TASK #{i + 1}:\n{ask}\n'
-                                       '\n'
-                                       f'OTHER RESULT #{i + 1}:\n{result}\n')
-                                      for i, (ask, result) in enumerate(other_results)))
-                         if other_results
-                         else ''))
-            else:
-                inputs: str = ('REASONING WITHOUT SUPPORTING/OTHER RESULTS '
-                               '(preliminary conclusions here can be overriden by more convincing supporting/other data):\n'
-                               f'{reasoning_wo_sub_results}\n'
-                               '\n\n' +
-                               '\n\n'.join((f'SUPPORTING QUESTION/TASK #{i + 1}:\n{ask}\n'
-                                            '\n'
-                                            f'SUPPORTING RESULT #{i + 1}:\n{result}\n')
-                                           for i, (ask, result) in enumerate(sub_results)) +
-                               (('\n\n' +
-                                 '\n\n'.join((f'OTHER QUESTION/TASK #{i + 1}:\n{ask}\n'
-                                              '\n'
-                                              f'OTHER RESULT #{i + 1}:\n{result}\n')
-                                             for i, (ask, result) in enumerate(other_results)))
-                                if other_results
-                                else ''))
+            sub_results: list[AskAnsPair] = self._execute_sub_htps(
+                sub_htps=decomposed_htp.sub_htps, knowledge=knowledge,
+                max_workers=max_workers, sequential_sharing=sequential_sharing,
+                sub_task_memo=sub_task_memo, direct_attempt=direct_attempt, dynamic_decomposition=dynamic_decomposition,
+                speculative_decomposition_depth=speculative_decomposition_depth, depth=depth + 1,
+                event_callback=event_callback, worker_pool=worker_pool)
+
+            if direct_attempt_future is not None:
+                reasoning_wo_sub_results: str = direct_attempt_future.result()
 
-            self.task.result: str = self.reasoner.lm.get_response(
-                prompt=HTP_RESULTS_SYNTH_PROMPT_TEMPLATE.format(ask=self.task.ask, info=inputs),
-                history=knowledge_injection_lm_chat_msgs(knowledge=knowledge) if knowledge else None)
+            inputs: str = self._synthesis_inputs(reasoning_wo_sub_results=reasoning_wo_sub_results,
+                                                 sub_results=sub_results, other_results=other_results,
+                                                 allow_reject=allow_reject)
+
+            self.task.result: str = self._synthesize(inputs=inputs, knowledge=knowledge,
+                                                     event_callback=event_callback, depth=depth)
 
             logger.debug('\n'
                          'TASK-LEVEL REASONING with Supporting/Other Results\n'
@@ -216,3 +353,133 @@ class HTP(BaseProgram):
 
         self.task.status: TaskStatus = TaskStatus.DONE
         return self.task.result
+
+    def _notify(self, event_callback: HTPEventCallback | None, event_type: HTPEventType, depth: int = 0,
+                data: Any = None):
+        if event_callback:
+            event_callback(HTPEvent(type=event_type, ask=self.task.ask, depth=depth, data=data))
+
+    def _synthesis_inputs(self, reasoning_wo_sub_results: str | None, sub_results: list[AskAnsPair],
+                          other_results: list[AskAnsPair] | None = None, allow_reject: bool = False) -> str:
+        """Assemble inputs for synthesizing result from supporting/other results,
+        fitted to Reasoner's token budget (if any), compressing other results first and supporting results last.
+        """
+        sections: list[PromptSection] = []
+
+        # If the Reasoner allows for rejecting to answer due to lack of information
+        if allow_reject:
+            preamble: str = ("If supporting information request for clarification or more information, "
+                             "just request more information without doing any other thing. ")
+
+        else:
+            preamble: str = ''
+
+            if reasoning_wo_sub_results is not None:
+                sections.append(PromptSection(
+                    header=('REASONING WITHOUT SUPPORTING/OTHER RESULTS '
+                            '(preliminary conclusions here can be overriden by more convincing supporting/other data):\n'),
+                    content=f'{reasoning_wo_sub_results}\n',
+                    priority=1))
+
+        sections.extend(PromptSection(header=(f'SUPPORTING QUESTION/TASK #{i + 1}:\n{ask}\n'
+                                              '\n'
+                                              f'SUPPORTING RESULT #{i + 1}:\n'),
+                                      content=f'{result}\n',
+                                      priority=2)
+                        for i, (ask, result) in enumerate(sub_results))
+
+        sections.extend(PromptSection(header=(f'OTHER QUESTION/TASK #{i + 1}:\n{ask}\n'
+                                              '\n'
+                                              f'OTHER RESULT #{i + 1}:\n'),
+                                      content=f'{result}\n',
+                                      priority=0)
+                        for i, (ask, result) in enumerate(other_results or []))
+
+        texts: list[str] = (self.reasoner.token_budget.fit(sections, query=self.task.ask)
+                            if self.reasoner.token_budget
+                            else [section.text for section in sections])
+
+        return preamble + '\n\n'.join(texts)
+
+    def _synthesize(self, inputs: str, knowledge: set[Knowledge] | None = None,
+                    event_callback: HTPEventCallback | None = None, depth: int = 0) -> str:
+        """Synthesize result from supporting/other results, streaming partial tokens to event callback if any."""
+        prompt: str = HTP_RESULTS_SYNTH_PROMPT_TEMPLATE.format(ask=self.task.ask, info=inputs)
+        history: LMChatHist | None = (knowledge_injection_lm_chat_msgs(knowledge=knowledge, query=self.task.ask,
+                                                                       selector=self.reasoner.knowledge_selector)
+                                      if knowledge
+                                      else None)
+
+        if not event_callback:
+            return self.reasoner.lm.get_response(prompt=prompt, history=history)
+
+        tokens: list[str] = []
+        for token in self.reasoner.lm.stream_response(prompt=prompt, history=history):
+            tokens.append(token)
+            self._notify(event_callback, HTPEventType.SYNTHESIS_TOKEN, depth=depth, data=token)
+
+        return ''.join(tokens)
+
+    def _attempt_directly(self, worker_pool: HTPWorkerPool,
+                          knowledge: set[Knowledge] | None = None, other_results: list[AskAnsPair] | None = None,
+                          direct_attempt: DirectAttemptPolicy = DirectAttemptPolicy.ALWAYS,
+                          ) -> tuple[str | None, Future[str] | None]:
+        """Attempt direct solution as per policy, returning its result (if already available) or its future."""
+        if not self.sub_htps or (direct_attempt == DirectAttemptPolicy.ALWAYS):
+            return self.reasoner.reason(task=self.task, knowledge=knowledge, other_results=other_results), None
+
+        match direct_attempt:
+            case DirectAttemptPolicy.PARALLEL:
+                # attempt on a free worker if any, or else right away before executing sub-HTPs
+                return None, worker_pool.submit(self.reasoner.reason,
+                                                task=self.task, knowledge=knowledge, other_results=other_results)
+
+            case DirectAttemptPolicy.SPECULATIVE:
+                return self.reasoner.lm.get_response(
+                    prompt=SPECULATIVE_DIRECT_ATTEMPT_PROMPT_TEMPLATE.format(ask=self.task.ask),
+                    history=(knowledge_injection_lm_chat_msgs(knowledge=knowledge, query=self.task.ask,
+                                                              selector=self.reasoner.knowledge_selector)
+                             if knowledge
+                             else None)), None
+
+            case _:
+                return None, None
+
+    def _start_speculative_decomposition(self, worker_pool: HTPWorkerPool,
+                                         knowledge: set[Knowledge] | None = None) -> Future[HTP] | None:
+        """Start decomposition by Programmer on a free worker, if applicable and if any worker is free."""
+        if self.sub_htps or not (self.programmer and self.programmer.max_depth):
+            return None
+
+        return worker_pool.try_submit(self.programmer.create_htp,
+                                      task=self.task, knowledge=knowledge, reasoner=self.reasoner)
+
+    @staticmethod
+    def _execute_sub_htps(sub_htps: list[HTP], worker_pool: HTPWorkerPool, knowledge: set[Knowledge] | None = None,
+                          max_workers: int = 1, sequential_sharing: bool = True,
+                          **execution_kwargs: Any) -> list[AskAnsPair]:
+        """Execute sibling sub-HTPs and return their results in order."""
+        sub_results: list[AskAnsPair] = []
+
+        if sequential_sharing or (max_workers < 2) or (len(sub_htps) < 2):
+            for sub_htp in tqdm(sub_htps):
+                sub_results.append((sub_htp.task.ask,
+                                    sub_htp.execute(knowledge=knowledge,
+                                                    other_results=sub_results if sequential_sharing else None,
+                                                    max_workers=max_workers, sequential_sharing=sequential_sharing,
+                                                    worker_pool=worker_pool, **execution_kwargs)))
+
+            return sub_results
+
+        # note: siblings not getting a free worker are executed right away in this thread
+        futures: list[Future[str]] = [worker_pool.submit(sub_htp.execute, knowledge=knowledge, other_results=None,
+                                                         max_workers=max_workers,
+                                                         sequential_sharing=sequential_sharing,
+                                                         worker_pool=worker_pool, **execution_kwargs)
+                                      for sub_htp in sub_htps]
+
+        for _ in tqdm(as_completed(futures), total=len(futures)):
+            pass
+
+        sub_results.extend((sub_htp.task.ask, future.result()) for sub_htp, future in zip(sub_htps, futures))
+        return sub_results
@@ -0,0 +1,234 @@
+"""
+==================================
+HIERARCHICAL TASK PLAN (HTP) CACHE
+==================================
+
+`PlanCache` lets `HTPlanner` reuse decompositions of same or similarly-shaped problems
+(e.g., questions differing only in company or period) instead of re-planning them from scratch.
+
+Problems are templatized by replacing their slot values
+(i.e., values containing digits such as years, fiscal periods & amounts,
+runs of capitalized words such as names (other than financial metric terms such as "Net Income"),
+as well as any explicitly given adaptation values) with `{placeholders}`,
+and HTPs are stored as dictionary trees with their asks templatized the same way.
+Automatic placeholders are named by value class & order of appearance within such class
+(e.g., `{_name_0}`, `{_period_0}`, `{_period_1}`), so that differently-ordered problems
+(e.g., "In FY2022, what was 3M's revenue?" vs. "What was 3M's revenue in FY2022?") get their values filled in right.
+
+Cached HTPs are looked up by exact hash of normalized problem template, planning scope & Knowledge fingerprint,
+falling back to embedding similarity among problem templates with the same placeholders if an embedding model is given,
+and are then re-instantiated for the posed problem via `HTP.adapt(...)`.
+"""
+
+
+from __future__ import annotations
+
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from hashlib import sha256
+import json
+import os
+from pathlib import Path
+import re
+from threading import Lock
+from typing import TypedDict, TYPE_CHECKING
+
+from llama_index.core.base.embeddings.base import BaseEmbedding as LlamaIndexEmbedModel, similarity
+from loguru import logger
+
+from .plan import HTP
+
+if TYPE_CHECKING:
+    from openssa.core.knowledge.base import Knowledge
+    from .plan import HTPDict
+
+
+# capitalized words of financial metrics & statements (e.g., "Net Income", "Free Cash Flow"), not to be taken as slots
+METRIC_TERMS: tuple[str, ...] = (
+    'Accounts', 'Adjusted', 'Amortization', 'Assets', 'Balance', 'Capex', 'Capital', 'Cash', 'Cost', 'Costs', 'Current',
+    'Debt', 'Depreciation', 'Diluted', 'Dividend', 'Dividends', 'EBIT', 'EBITDA', 'EPS', 'Earnings', 'Equity',
+    'Expenditure', 'Expenditures', 'Expense', 'Expenses', 'Flow', 'Flows', 'Free', 'Goods', 'Gross', 'Income',
+    'Interest', 'Inventory', 'Liabilities', 'Margin', 'Net', 'Operating', 'Payable', 'Profit', 'Quick', 'Ratio',
+    'Receivable', 'Return', 'Revenue', 'Revenues', 'Sales', 'Sheet', 'Sold', 'Statement', 'Tax', 'Total', 'Working',
+)
+
+_CAPITALIZED_WORD_PATTERN: str = rf"(?!(?:{'|'.join(METRIC_TERMS)})\b)[A-Z][A-Za-z&.-]*(?!\w)"
+
+# candidate slot values: tokens containing digits (e.g., "2018", "FY2022", "Q3", "3M", "$1.5B"),
+# and runs of capitalized non-metric words (e.g., "Johnson & Johnson"), the latter only if not starting sentences
+DEFAULT_SLOT_PATTERN: str = rf"\$?\b(?:\w*\d[\w.,%-]*|{_CAPITALIZED_WORD_PATTERN}(?:\s+(?:&\s+)?{_CAPITALIZED_WORD_PATTERN})*)"
+
+_SENTENCE_START_PATTERN: re.Pattern = re.compile(r'(?:^|[.?!:\n])\s*$')
+
+# value classes of slots, for naming their placeholders
+_PERIOD_PATTERN: re.Pattern = re.compile(r"(?:(?:FY|CY|[QH][1-4]\s*)'?)?(?:19|20)?\d{2}|[QH][1-4]", flags=re.IGNORECASE)
+_AMOUNT_PATTERN: re.Pattern = re.compile(r'\$[\d.,]*\d(?:\s*[KMBT]n?)?|[\d.,]*\d%?')
+
+_PLACEHOLDER_PATTERN: re.Pattern = re.compile(r'(?<!\{)\{(\w+)\}')
+
+
+class PlanCacheEntry(TypedDict):
+    scope_key: str
+    template: str
+    htp: HTPDict
+    embedding: list[float] | None
+
+
+def slot_class(value: str) -> str:
+    """Classify slot value as period (e.g., "2018", "FY2022", "Q3"), amount (e.g., "$1.5B", "10%") or name."""
+    if _PERIOD_PATTERN.fullmatch(value):
+        return 'period'
+    if _AMOUNT_PATTERN.fullmatch(value):
+        return 'amount'
+    return 'name'
+
+
+def knowledge_fingerprint(knowledge: set[Knowledge] | None = None) -> str:
+    """Return order-independent fingerprint of Knowledge."""
+    return sha256(json.dumps(sorted(knowledge or ())).encode()).hexdigest()
+
+
+@dataclass
+class PlanCache:  # pylint: disable=too-many-instance-attributes
+    """Cache of HTPs keyed by normalized problem template, planning scope & Knowledge fingerprint."""
+
+    # embedding model for similarity-based lookup fallback
+    # (None: exact lookup only)
+    embed_model: LlamaIndexEmbedModel | None = field(default=None,
+                                                     init=True,
+                                                     repr=False,
+                                                     hash=None,
+                                                     compare=True,
+                                                     metadata=None,
+                                                     kw_only=False)
+
+    # minimum embedding similarity between problem templates for similarity-based lookup
+    similarity_threshold: float = 0.95
+
+    # regular expression for automatically identifying slot values in problems
+    # (None: only explicitly given adaptation values are templatized)
+    slot_pattern: str | None = DEFAULT_SLOT_PATTERN
+
+    # maximum number of cached HTPs, least recently used ones being evicted first
+    max_entries: int = 10_000
+
+    # path to JSON file persisting cached HTPs
+    # (None: in-memory only)
+    path: Path | str | None = None
+
+    def __post_init__(self):
+        """Initialize cache, loading persisted entries if any."""
+        self._lock: Lock = Lock()
+        self._entries: OrderedDict[str, PlanCacheEntry] = OrderedDict()
+
+        self.hits: int = 0
+        self.similar_hits: int = 0
+        self.misses: int = 0
+
+        if self.path and os.path.isfile(self.path):
+            with open(self.path, encoding='utf-8') as f:
+                self._entries.update(json.load(f))
+
+    def slots(self, problem: str, adaptations: dict[str, str] | None = None) -> dict[str, str]:
+        """Identify slot values in problem, indexed by placeholder name (`_<value class>_<index within class>`)."""
+        slots: dict[str, str] = {name: value for name, value in (adaptations or {}).items() if value in problem}
+        n_slots_by_class: dict[str, int] = {}
+
+        if self.slot_pattern:
+            for match in re.finditer(self.slot_pattern, problem):
+                value: str = match.group().rstrip('.,-')
+
+                if (value and (value not in slots.values()) and
+                        (any(c.isdigit() for c in value) or not _SENTENCE_START_PATTERN.search(problem[:match.start()]))):
+                    value_class: str = slot_class(value)
+                    index: int = n_slots_by_class.get(value_class, 0)
+                    n_slots_by_class[value_class]: int = index + 1
+                    slots[f'_{value_class}_{index}']: str = value
+
+        return slots
+
+    @staticmethod
+    def templatize(text: str, slots: dict[str, str]) -> str:
+        """Replace slot values in text with placeholders, escaping other braces."""
+        text: str = text.replace('{', '{{').replace('}', '}}')
+
+        for name, value in sorted(slots.items(), key=lambda item: -len(item[1])):
+            escaped_value: str = value.replace('{', '{{').replace('}', '}}')
+            text: str = re.sub(rf'(?<![\w{{]){re.escape(escaped_value)}(?![\w}}])', f'{{{name}}}', text)
+
+        return text
+
+    @staticmethod
+    def _templatize_htp(htp: HTP, slots: dict[str, str]) -> HTPDict:
+        return {'task': PlanCache.templatize(htp.task.ask, slots),
+                'sub-htps': [PlanCache._templatize_htp(sub_htp, slots) for sub_htp in htp.sub_htps]}
+
+    @staticmethod
+    def _normalize(template: str) -> str:
+        return ' '.join(template.lower().split()).rstrip(' .?!')
+
+    def _key(self, template: str, knowledge: set[Knowledge] | None, scope: str) -> str:
+        return sha256(f'{scope}\n{knowledge_fingerprint(knowledge)}\n{self._normalize(template)}'.encode()).hexdigest()
+
+    def get(self, problem: str, knowledge: set[Knowledge] | None = None, scope: str = '',
+            adaptations: dict[str, str] | None = None) -> HTP | None:
+        """Return cached HTP adapted to posed problem, or None."""
+        slots: dict[str, str] = self.slots(problem, adaptations)
+        template: str = self.templatize(problem, slots)
+
+        with self._lock:
+            if (entry := self._entries.get(key := self._key(template, knowledge, scope))) is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return HTP.from_dict(entry['htp']).adapt(**slots)
+
+        if self.embed_model is not None:
+            embedding: list[float] = self.embed_model.get_query_embedding(self._normalize(template))
+            scope_key: str = self._key('', knowledge, scope)
+
+            with self._lock:
+                candidates: list[tuple[float, PlanCacheEntry]] = [
+                    (similarity(embedding, entry['embedding']), entry)
+                    for entry in self._entries.values()
+                    if entry['embedding'] and (entry['scope_key'] == scope_key)
+                    # only consider cached problem templates with same placeholders as posed problem's
+                    and set(_PLACEHOLDER_PATTERN.findall(entry['template'])) == set(slots)]
+
+            if candidates and (best := max(candidates, key=lambda candidate: candidate[0]))[0] >= self.similarity_threshold:  # noqa: E501
+                logger.debug(f'PLAN CACHE: SIMILAR PROBLEM TEMPLATE "{best[1]["template"]}" (SIMILARITY {best[0]:.3f})')
+                self.similar_hits += 1
+                return HTP.from_dict(best[1]['htp']).adapt(**slots)
+
+        self.misses += 1
+        return None
+
+    def put(self, problem: str, htp: HTP, knowledge: set[Knowledge] | None = None, scope: str = '',
+            adaptations: dict[str, str] | None = None):
+        """Cache HTP created for posed problem."""
+        slots: dict[str, str] = self.slots(problem, adaptations)
+        template: str = self.templatize(problem, slots)
+
+        entry: PlanCacheEntry = {'scope_key': self._key('', knowledge, scope),
+                                 'template': template,
+                                 'htp': self._templatize_htp(htp, slots),
+                                 'embedding': (self.embed_model.get_text_embedding(self._normalize(template))
+                                               if self.embed_model is not None
+                                               else None)}
+
+        with self._lock:
+            self._entries[key := self._key(template, knowledge, scope)]: PlanCacheEntry = entry
+            self._entries.move_to_end(key)
+
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+            if self.path:
+                self._save()
+
+    def _save(self):
+        Path(self.path).parent.mkdir(parents=True, exist_ok=True)
+
+        tmp_path: str = f'{self.path}.tmp'
+        with open(tmp_path, mode='w', encoding='utf-8') as f:
+            json.dump(self._entries, f, ensure_ascii=False)
+        os.replace(tmp_path, self.path)
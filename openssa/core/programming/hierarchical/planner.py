@@ -6,32 +6,57 @@ HIERARCHICAL TASK PLANNER
 `HTPlanner` is `OpenSSA`'s default Programmer using LMs
 to create problem-solving Programs in the form of Hierarchical Task Plans (HTPs),
 the complexity of which is controlled by 2 key parameters `max_depth` and `max_subtasks_per_decomp`.
+
+Decomposition responses not following the required sub-task format are retried within a bounded retry policy,
+falling back to an undecomposed HTP.
+
+In structured-output mode, decompositions are requested as JSON constrained by a JSON Schema
+(via the LM service's structured-output or grammar-constrained generation capabilities, if any),
+so that they almost always succeed in a single LM call.
+Responses are parsed & validated within the planner's own retry policy (one plain LM call per attempt),
+so that invalid JSON also falls back to an undecomposed HTP.
+
+With a `PlanCache`, decompositions of same or similarly-shaped problems
+(e.g., questions differing only in company or period) are reused instead of re-planned.
 """
 
 
 from __future__ import annotations
 
-from dataclasses import dataclass, replace
-from typing import TYPE_CHECKING
+from dataclasses import dataclass, field, replace
+import json
+from typing import Any, TYPE_CHECKING
 
 from openssa.core.programming.base.programmer import BaseProgrammer
 from openssa.core.knowledge._prompts import knowledge_injection_lm_chat_msgs
 from openssa.core.reasoning.ooda.ooda_reasoner import OodaReasoner
 from openssa.core.task.task import Task
+from openssa.core.util.retry import RetryPolicy
+from openssa.core.util.tracing import SpanKind, set_span_attributes, traced
 
 from .plan import HTP
-from ._prompts import SIMPLIFIED_DECOMPOSITION_PROMPT_TEMPLATE
+from .plan_cache import PlanCache
+from ._prompts import SIMPLIFIED_DECOMPOSITION_PROMPT_TEMPLATE, STRUCTURED_DECOMPOSITION_PROMPT_TEMPLATE
 
 if TYPE_CHECKING:
     from openssa.core.knowledge.base import Knowledge
+    from openssa.core.knowledge.selection import KnowledgeSelector
     from openssa.core.reasoning.base import BaseReasoner
     from openssa.core.resource.base import BaseResource
-    from openssa.core.util.lm.base import LMChatHist
+    from openssa.core.resource.router import BaseResourceRouter
     from .plan import HTPDict
 
 
 SUBTASK_HEADER: str = '[SUB-QUESTION/PROBLEM/TASK]\n'
 
+# JSON Schema of structured-output decompositions
+# (note: number of sub-tasks is validated locally, as not all LM services support array length constraints)
+SUBTASKS_KEY: str = 'sub-tasks'
+SUBTASKS_JSON_SCHEMA: dict[str, Any] = {'type': 'object',
+                                        'properties': {SUBTASKS_KEY: {'type': 'array', 'items': {'type': 'string'}}},
+                                        'required': [SUBTASKS_KEY],
+                                        'additionalProperties': False}
+
 
 @dataclass
 class HTPlanner(BaseProgrammer):
@@ -43,43 +68,142 @@ class HTPlanner(BaseProgrammer):
     # maximum number of sub-tasks per decomposition
     max_subtasks_per_decomp: int = 4
 
+    # Resource Router for assigning to each sub-task only the Resources most relevant to it
+    # (default: None, i.e., sub-tasks are assigned all of the parent task's Resources)
+    resource_router: BaseResourceRouter | None = None
+
+    # whether to request decompositions as JSON-Schema-constrained structured outputs
+    # rather than as free text with sub-task headers
+    structured_output: bool = False
+
+    # policy for retrying decomposition until LM response follows required sub-task format
+    retry_policy: RetryPolicy = field(default_factory=RetryPolicy,
+                                      init=True,
+                                      repr=False,
+                                      hash=None,
+                                      compare=False,
+                                      metadata=None,
+                                      kw_only=False)
+
+    # cache of decompositions, keyed by normalized problem template, planning scope & Knowledge
+    # (default: None, i.e., every problem is decomposed afresh)
+    plan_cache: PlanCache | None = field(default=None,
+                                         init=True,
+                                         repr=False,
+                                         hash=None,
+                                         compare=False,
+                                         metadata=None,
+                                         kw_only=False)
+
+    # selector of Knowledge relevant to each Task to decompose, for injecting only relevant chunks of large Knowledge pieces
+    # (default: None, i.e., all Knowledge is injected in full)
+    knowledge_selector: KnowledgeSelector | None = field(default=None,
+                                                         init=True,
+                                                         repr=False,
+                                                         hash=None,
+                                                         compare=False,
+                                                         metadata=None,
+                                                         kw_only=False)
+
+    @traced('htp.plan', SpanKind.PLANNING, attributes=lambda self, task, *args, **kwargs: {'ask': task.ask})
     def create_htp(self, task: Task, knowledge: set[Knowledge] | None = None, reasoner: BaseReasoner | None = None) -> HTP:  # noqa: E501
         """Construct HTP for solving posed Problem with given Knowledge and Resources."""
         if not reasoner:
-            reasoner: BaseReasoner = OodaReasoner(lm=self.lm)
+            reasoner: BaseReasoner = OodaReasoner(lm=self.lm, knowledge_selector=self.knowledge_selector)
 
         if self.max_depth > 0:
-            prompt: str = SIMPLIFIED_DECOMPOSITION_PROMPT_TEMPLATE.format(
-                problem=task.ask,
-                resource_overviews={resource.unique_name: resource.overview for resource in task.resources},
-                max_subtasks_per_decomp=self.max_subtasks_per_decomp)
-
-            knowledge_lm_hist: LMChatHist | None = (knowledge_injection_lm_chat_msgs(knowledge=knowledge)
-                                                    if knowledge
-                                                    else None)
+            # decompositions are only reusable among planners allowing same number of sub-tasks
+            plan_cache_scope: str = f'max_subtasks_per_decomp={self.max_subtasks_per_decomp}'
 
-            def split_if_valid(sub_task_descriptions_combined: list[str]) -> list[str] | None:
-                return (sub_task_descriptions_combined.split(sep=SUBTASK_HEADER, maxsplit=-1)[1:]
-                        if sub_task_descriptions_combined.startswith(SUBTASK_HEADER)
-                        else None)
+            if self.plan_cache and (cached_htp := self.plan_cache.get(problem=task.ask, knowledge=knowledge,
+                                                                      scope=plan_cache_scope)):
+                sub_task_descriptions: list[str] = [sub_htp.task.ask for sub_htp in cached_htp.sub_htps]
+                to_cache: bool = False
+                set_span_attributes(plan_cache_hit=True)
 
-            sub_task_descriptions: list[str] = []
-            while not sub_task_descriptions:
-                sub_task_descriptions: list[str] = split_if_valid(
-                    sub_task_descriptions_combined=self.lm.get_response(prompt=prompt, history=knowledge_lm_hist))
+            else:
+                sub_task_descriptions: list[str] = (self._decompose_structured(task=task, knowledge=knowledge)
+                                                    if self.structured_output
+                                                    else self._decompose(task=task, knowledge=knowledge))
+                to_cache: bool = bool(self.plan_cache and sub_task_descriptions)
 
             sub_htplanner: HTPlanner = replace(self, max_depth=self.max_depth - 1)
 
-            return HTP(task=task,
-                       programmer=self,
-                       sub_htps=[HTP(task=Task(ask=sub_task_description,
-                                               resources=task.resources),  # TODO: optimize to not always use all
-                                     programmer=sub_htplanner,
-                                     reasoner=reasoner)
-                                 for sub_task_description in sub_task_descriptions],
-                       reasoner=reasoner)
+            htp: HTP = HTP(task=task,
+                           programmer=self,
+                           sub_htps=[HTP(task=Task(ask=sub_task_description,
+                                                   resources=(self.resource_router.route(ask=sub_task_description,
+                                                                                         resources=task.resources)
+                                                              if self.resource_router
+                                                              else task.resources)),
+                                         programmer=sub_htplanner,
+                                         reasoner=reasoner)
+                                     for sub_task_description in sub_task_descriptions],
+                           reasoner=reasoner)
+
+            if to_cache:
+                self.plan_cache.put(problem=task.ask, htp=htp, knowledge=knowledge, scope=plan_cache_scope)
+
+            return htp
 
         return HTP(task=task, programmer=self, reasoner=reasoner)
 
+    def _decompose(self, task: Task, knowledge: set[Knowledge] | None = None) -> list[str]:
+        """Decompose Task into sub-task descriptions, from free-text LM response with sub-task headers."""
+        def split_if_valid(sub_task_descriptions_combined: str) -> list[str]:
+            if not sub_task_descriptions_combined.startswith(SUBTASK_HEADER):
+                raise ValueError(f'response must start with "{SUBTASK_HEADER.strip()}" header line, '
+                                 'with each sub-question/problem/task preceded by such header line')
+            return sub_task_descriptions_combined.split(sep=SUBTASK_HEADER, maxsplit=-1)[1:]
+
+        return self.retry_policy.get_valid_lm_response(
+            lm=self.lm,
+            prompt=SIMPLIFIED_DECOMPOSITION_PROMPT_TEMPLATE.format(
+                problem=task.ask,
+                resource_overviews={resource.unique_name: resource.overview for resource in task.resources},
+                max_subtasks_per_decomp=self.max_subtasks_per_decomp),
+            parse=split_if_valid, name='HTP DECOMPOSITION',
+            history=(knowledge_injection_lm_chat_msgs(knowledge=knowledge, query=task.ask,
+                                                      selector=self.knowledge_selector)
+                     if knowledge
+                     else None),
+            fallback=lambda _: [])
+
+    def _decompose_structured(self, task: Task, knowledge: set[Knowledge] | None = None) -> list[str]:
+        """Decompose Task into sub-task descriptions, from JSON-Schema-constrained LM response."""
+        def validate(response: str | dict[str, Any]) -> list[str]:
+            # note: invalid JSON raises `json.JSONDecodeError`, which is a `ValueError` to retry upon
+            decomposition: Any = json.loads(response) if isinstance(response, str) else response
+
+            if not (isinstance(decomposition, dict) and isinstance(decomposition.get(SUBTASKS_KEY), list)):
+                raise ValueError(f'response must be JSON dictionary with key "{SUBTASKS_KEY}" mapping to list')
+
+            sub_task_descriptions: list[str] = [sub_task_description.strip()
+                                                for sub_task_description in decomposition[SUBTASKS_KEY]
+                                                if isinstance(sub_task_description, str) and sub_task_description.strip()]  # noqa: E501
+
+            if not 0 < len(sub_task_descriptions) <= self.max_subtasks_per_decomp:
+                raise ValueError(f'"{SUBTASKS_KEY}" must list 1 to {self.max_subtasks_per_decomp} non-empty strings, '
+                                 f'not {len(sub_task_descriptions)}')
+
+            return sub_task_descriptions
+
+        return self.retry_policy.get_valid_lm_response(
+            lm=self.lm,
+            prompt=STRUCTURED_DECOMPOSITION_PROMPT_TEMPLATE.format(
+                problem=task.ask,
+                resource_overviews={resource.unique_name: resource.overview for resource in task.resources},
+                max_subtasks_per_decomp=self.max_subtasks_per_decomp),
+            parse=validate, name='STRUCTURED HTP DECOMPOSITION',
+            history=(knowledge_injection_lm_chat_msgs(knowledge=knowledge, query=task.ask,
+                                                      selector=self.knowledge_selector)
+                     if knowledge
+                     else None),
+            fallback=lambda _: [],
+            **({'response_format': response_format}
+               if (response_format := self.lm.json_schema_response_format(schema=SUBTASKS_JSON_SCHEMA,
+                                                                          name='decomposition'))
+               else {}))
+
     # alias
     create_program = create_htp
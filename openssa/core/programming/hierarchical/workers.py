@@ -0,0 +1,76 @@
+"""
+=====================
+HTP EXECUTION WORKERS
+=====================
+
+`HTPWorkerPool` bounds the concurrency of a whole HTP solve, across all of its depth levels:
+a single pool is created per solve and shared by all HTP nodes for their concurrent work
+(e.g., independent sibling sub-HTPs, parallel direct solution attempts & speculative decompositions).
+
+Work is handed to a worker thread only if one is free; otherwise, it is run in the submitting thread itself.
+Hence, at most `max_workers` threads (including the solving thread) work on a solve at any time,
+and nodes waiting for their sub-HTPs' results never deadlock waiting for busy workers.
+"""
+
+
+from __future__ import annotations
+
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextvars import copy_context
+from dataclasses import dataclass
+from threading import Semaphore
+from typing import Any, Self as SameType, TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from collections.abc import Callable
+
+
+@dataclass
+class HTPWorkerPool:
+    """Solve-wide bounded pool of worker threads for concurrent HTP execution."""
+
+    # maximum number of threads working on solve at once, including solving thread itself
+    max_workers: int = 1
+
+    def __post_init__(self):
+        """Initialize worker threads (other than solving thread) & their availability."""
+        self._free_workers: Semaphore = Semaphore(max(self.max_workers - 1, 0))
+        self._executor: ThreadPoolExecutor = ThreadPoolExecutor(max_workers=max(self.max_workers - 1, 1),
+                                                                thread_name_prefix='HTP')
+
+    def __enter__(self) -> SameType:
+        return self
+
+    def __exit__(self, *exc_info: Any):
+        self.shutdown()
+
+    def try_submit[T](self, func: Callable[..., T], /, *args: Any, **kwargs: Any) -> Future[T] | None:
+        """Run function on a free worker thread (in submitting thread's context), or return None if none is free."""
+        if not self._free_workers.acquire(blocking=False):  # pylint: disable=consider-using-with
+            return None
+
+        try:
+            future: Future[T] = self._executor.submit(copy_context().run, func, *args, **kwargs)
+        except BaseException:
+            self._free_workers.release()
+            raise
+
+        future.add_done_callback(lambda _: self._free_workers.release())
+        return future
+
+    def submit[T](self, func: Callable[..., T], /, *args: Any, **kwargs: Any) -> Future[T]:
+        """Run function on a free worker thread if any, or else right away in submitting thread."""
+        if (future := self.try_submit(func, *args, **kwargs)) is not None:
+            return future
+
+        future: Future[T] = Future()
+        try:
+            future.set_result(func(*args, **kwargs))
+        except Exception as err:  # pylint: disable=broad-exception-caught
+            future.set_exception(err)
+
+        return future
+
+    def shutdown(self):
+        """Release worker threads once their current work (if any) is done, without waiting for it."""
+        self._executor.shutdown(wait=False, cancel_futures=True)
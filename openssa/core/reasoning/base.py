@@ -21,8 +21,10 @@ from openssa.core.util.lm.openai import OpenAILM
 
 if TYPE_CHECKING:
     from openssa.core.knowledge.base import Knowledge
+    from openssa.core.knowledge.selection import KnowledgeSelector
     from openssa.core.task.task import Task
     from openssa.core.util.lm.base import BaseLM
+    from openssa.core.util.token_budget import TokenBudget
     from openssa.core.util.misc import AskAnsPair
 
 
@@ -39,6 +41,32 @@ class BaseReasoner(ABC):
                        metadata=None,
                        kw_only=False)
 
+    # selector of Knowledge relevant to each Task, for injecting only relevant chunks of large Knowledge pieces
+    # (default: None, i.e., all Knowledge is injected in full)
+    knowledge_selector: KnowledgeSelector | None = field(default=None,
+                                                         init=True,
+                                                         repr=False,
+                                                         hash=None,
+                                                         compare=False,
+                                                         metadata=None,
+                                                         kw_only=False)
+
+    # budget of prompt tokens for observations & results to reason through,
+    # for deduplicating & compressing them as needed to keep prompts from ballooning
+    # (default: None, i.e., no budgeting)
+    token_budget: TokenBudget | None = field(default=None,
+                                             init=True,
+                                             repr=False,
+                                             hash=None,
+                                             compare=False,
+                                             metadata=None,
+                                             kw_only=False)
+
+    # whether to present Resources compactly in prompts, i.e., referred to by short IDs in their answers,
+    # with their full names & overviews presented once in a single header block
+    # (rather than repeated with every answer)
+    compact_resource_presentation: bool = True
+
     @abstractmethod
     def reason(self, task: Task, *,
                knowledge: set[Knowledge], other_results: list[AskAnsPair] | None = None, n_words: int = 1000) -> str:
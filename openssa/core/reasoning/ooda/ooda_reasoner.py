@@ -8,11 +8,19 @@ following John Boyd's well-known Observe-Orient-Decide-Act (OODA) loop paradigm
 
 In the `Observe` step, the OODA reasoner gathers relevant available information from the task's resources,
 as well as other results (if given).
+Resources are queried concurrently,
+with failing resources and resources not observed within the observation timeout left out of the observations.
+By default, resources are presented compactly, i.e., referred to by short IDs in their answers,
+with their full names & overviews presented once in a single overview header block.
+
+If the OODA reasoner has a token budget, observations are deduplicated & compressed as needed to fit it.
 
 In the `Orient` & `Decide` steps, practically combined for efficiency in this implementation,
 the OODA reasoner evaluates whether a confident conclusion can be produced for the problem/question the task poses,
 as well as what the best possible answer can be;
 the OODA reasoner then decides to mark the task as either `DONE` or `NEEDING_DECOMPOSITION`.
+LM responses lacking the required confidence header are retried within a bounded retry policy,
+falling back to marking the task as `NEEDING_DECOMPOSITION`.
 
 In the `Act` step, the OODA reasoner updates the status of the task, per the previous step's decision.
 """
@@ -20,21 +28,32 @@ In the `Act` step, the OODA reasoner updates the status of the task, per the pre
 
 from __future__ import annotations
 
-from dataclasses import dataclass
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from contextvars import copy_context
+from dataclasses import dataclass, field
+import time
 from typing import TYPE_CHECKING
 
+from loguru import logger
+
 from openssa.core.knowledge._prompts import knowledge_injection_lm_chat_msgs
 from openssa.core.reasoning.base import BaseReasoner
+from openssa.core.resource.base import resource_overviews_lm_chat_msg, short_resource_ids
 from openssa.core.task.status import TaskStatus
+from openssa.core.util.lm.history import ChatHistory
 from openssa.core.util.misc import format_other_result
+from openssa.core.util.retry import RetryPolicy
+from openssa.core.util.token_budget import PromptSection
+from openssa.core.util.tracing import SpanKind, set_span_attributes, traced
 
 from ._prompts import ORIENT_PROMPT_TEMPLATE
 
 if TYPE_CHECKING:
     from openssa.core.knowledge.base import Knowledge
+    from openssa.core.resource.base import BaseResource
     from openssa.core.task.task import Task
-    from openssa.core.util.lm.base import LMChatHist
     from openssa.core.util.misc import AskAnsPair
+    from openssa.core.util.retry import RetryAttempt
 
 
 type Observation = str
@@ -49,6 +68,24 @@ UNCONFIDENT_HEADER: str = '[UNCONFIDENT]\n'
 class OodaReasoner(BaseReasoner):
     """OODA Reasoner."""
 
+    # maximum number of Informational Resources to observe concurrently
+    max_concurrent_observations: int = 8
+
+    # timeout (in seconds) for observing Informational Resources, counted from when their observations are submitted
+    # (i.e., including time queued for a free worker), beyond which Resources not yet observed are left out
+    # (None: no timeout)
+    observation_timeout: float | None = None
+
+    # policy for retrying orientation until LM response has valid confidence header
+    retry_policy: RetryPolicy = field(default_factory=RetryPolicy,
+                                      init=True,
+                                      repr=False,
+                                      hash=None,
+                                      compare=False,
+                                      metadata=None,
+                                      kw_only=False)
+
+    @traced('reasoner.reason', SpanKind.REASONING, attributes=lambda self, task, **kwargs: {'ask': task.ask})
     def reason(self, task: Task, *,
                knowledge: set[Knowledge], other_results: list[AskAnsPair] | None = None, n_words: int = 1000) -> str:
         """Work through Task and return conclusion in string.
@@ -59,41 +96,134 @@ class OodaReasoner(BaseReasoner):
         - Orient & Decide whether such results are adequate for confident answer/conclusion/solution
         - Act to update Task's status and result
         """
-        observations: set[Observation] = self._observe(task=task, other_results=other_results, n_words=n_words)
+        observations, resource_ids = self._observe(task=task, other_results=other_results, n_words=n_words)
 
         # note: Orient & Decide steps are practically combined to economize LM calls
-        orientation: Orientation = self._orient(task=task, observations=observations, knowledge=knowledge, n_words=n_words)  # noqa: E501
+        orientation: Orientation = self._orient(task=task, observations=observations, knowledge=knowledge,
+                                                n_words=n_words, resource_ids=resource_ids)
         decision: bool = self._decide(orientation=orientation)
 
         self._act(task=task, orientation=orientation, decision=decision)
 
         return task.result
 
-    def _observe(self, task: Task, other_results: list[AskAnsPair] | None = None, n_words: int = 1000) -> set[Observation]:  # noqa: E501
-        """Observe results from available Informational Resources as well as other results (if given)."""
-        observations: set[Observation] = {r.present_full_answer(question=task.ask, n_words=n_words) for r in task.resources}  # noqa: E501
+    def _observe(self, task: Task, other_results: list[AskAnsPair] | None = None, n_words: int = 1000,
+                 ) -> tuple[list[Observation], dict[BaseResource, str] | None]:
+        """Observe results from available Informational Resources as well as other results (if given).
+
+        In compact Resource presentation mode, Resources' answers refer to them by short IDs,
+        which are returned for observed Resources (None otherwise).
+        """
+        observations: list[Observation] = []
+        observed_resource_ids: dict[BaseResource, str] | None = None
+
+        if task.resources:
+            resource_ids: dict[BaseResource, str] | None = (short_resource_ids(task.resources)
+                                                            if self.compact_resource_presentation
+                                                            else None)
+
+            resource_observations: dict[BaseResource, Observation] = self._observe_resources(
+                task=task, n_words=n_words, resource_ids=resource_ids)
+
+            if resource_ids is None:
+                observations.extend(resource_observations.values())
+
+            elif resource_observations:
+                observed_resource_ids: dict[BaseResource, str] = {resource: resource_id
+                                                                  for resource, resource_id in resource_ids.items()
+                                                                  if resource in resource_observations}
+                observations.extend(resource_observations[resource] for resource in observed_resource_ids)
 
         if other_results:
-            observations |= {format_other_result(other_result) for other_result in other_results}
+            observations.extend(format_other_result(other_result) for other_result in other_results)
+
+        return observations, observed_resource_ids
+
+    def _observe_resources(self, task: Task, n_words: int = 1000,
+                           resource_ids: dict[BaseResource, str] | None = None) -> dict[BaseResource, Observation]:
+        """Observe results from available Informational Resources concurrently,
+        leaving out those failing or timing out.
+
+        All observations share one deadline set upon submission,
+        so that Resources queued behind hung ones (holding all workers) also time out rather than wait indefinitely.
+        """
+        def observe(resource: BaseResource) -> Observation:
+            if resource_ids is None:
+                return resource.present_full_answer(question=task.ask, n_words=n_words)
+
+            # note: overview is also created here, concurrently, for presenting in overview header block
+            _ = resource.overview
+            return resource.present_compact_answer(question=task.ask, resource_id=resource_ids[resource],
+                                                   n_words=n_words)
+
+        executor: ThreadPoolExecutor = ThreadPoolExecutor(
+            max_workers=min(self.max_concurrent_observations, len(task.resources)),
+            thread_name_prefix='OODA-Observe')
+        resources: dict[Future[Observation], BaseResource] = {
+            executor.submit(copy_context().run, observe, resource): resource for resource in task.resources}
+
+        deadline: float | None = (None
+                                  if self.observation_timeout is None
+                                  else time.monotonic() + self.observation_timeout)
+
+        observations: dict[BaseResource, Observation] = {}
+        pending: set[Future[Observation]] = set(resources)
+        while pending:
+            done, pending = wait(pending,
+                                 timeout=None if deadline is None else max(deadline - time.monotonic(), 0),
+                                 return_when=FIRST_COMPLETED)
+
+            for future in done:
+                try:
+                    observations[resources[future]]: Observation = future.result()
+                except Exception as err:  # pylint: disable=broad-exception-caught
+                    logger.warning(f'OBSERVATION FAILED for {resources[future].full_name}: {err!r}')
+
+            if pending and (deadline is not None) and (time.monotonic() >= deadline):
+                for future in pending:
+                    logger.warning(f'OBSERVATION TIMED OUT for {resources[future].full_name}')
+                break
+
+        # do not wait for timed-out observations to finish
+        executor.shutdown(wait=False, cancel_futures=True)
 
         return observations
 
-    def _orient(self, task: Task, observations: set[Observation],
-                knowledge: set[Knowledge] | None = None, n_words: int = 1000) -> Orientation:
-        """Orient whether observed results are adequate for directly resolving Task."""
+    def _orient(self, task: Task, observations: list[Observation],
+                knowledge: set[Knowledge] | None = None, n_words: int = 1000,
+                resource_ids: dict[BaseResource, str] | None = None) -> Orientation:
+        """Orient whether observed results are adequate for directly resolving Task.
+
+        Resources referred to by short IDs in observations are presented in an overview header block
+        following Knowledge (if any) in chat history, so that it stays byte-identical across calls.
+        """
+        if self.token_budget:
+            observations: list[Observation] = self.token_budget.fit([PromptSection(content=observation)
+                                                                     for observation in observations],
+                                                                    query=task.ask)
+
         prompt: str = ORIENT_PROMPT_TEMPLATE.format(question=task.ask, n_words=n_words, observations='\n\n'.join(observations))  # noqa: E501
 
-        def is_valid(orientation: Orientation) -> bool:
-            return orientation.startswith((CONFIDENT_HEADER, UNCONFIDENT_HEADER))
+        def validate(orientation: Orientation) -> Orientation:
+            if not orientation.startswith((CONFIDENT_HEADER, UNCONFIDENT_HEADER)):
+                raise ValueError(f'response must start with "{CONFIDENT_HEADER.strip()}" '
+                                 f'or "{UNCONFIDENT_HEADER.strip()}" header line')
+            return orientation
+
+        def fallback(attempt: RetryAttempt) -> Orientation:
+            return f'{UNCONFIDENT_HEADER}{attempt.previous_output or ""}'
 
-        orientation: Orientation = ''
-        knowledge_lm_hist: LMChatHist | None = (knowledge_injection_lm_chat_msgs(knowledge=knowledge)
-                                                if knowledge
-                                                else None)
-        while not is_valid(orientation):
-            orientation: Orientation = self.lm.get_response(prompt, history=knowledge_lm_hist)
+        lm_hist: ChatHistory = (knowledge_injection_lm_chat_msgs(knowledge=knowledge, query=task.ask,
+                                                                 selector=self.knowledge_selector)
+                                if knowledge
+                                else ChatHistory())
 
-        return orientation
+        if resource_ids:
+            lm_hist: ChatHistory = lm_hist.extended(resource_overviews_lm_chat_msg(resource_ids))
+
+        return self.retry_policy.get_valid_lm_response(lm=self.lm, prompt=prompt, parse=validate,
+                                                       name='OODA ORIENTATION', history=lm_hist,
+                                                       fallback=fallback)
 
     def _decide(self, orientation: Orientation) -> Decision:
         """Decide whether to directly resolve Task."""
@@ -101,6 +231,8 @@ class OodaReasoner(BaseReasoner):
 
     def _act(self, task: Task, orientation: Orientation, decision: Decision):
         """Update Task's status and result."""
+        set_span_attributes(confident=decision)
+
         if decision:
             task.status: TaskStatus = TaskStatus.DONE
             task.result: str = orientation.split(sep=CONFIDENT_HEADER, maxsplit=1)[1]
@@ -6,6 +6,9 @@ BASE REASONER
 `SimpleReasoner` is `OpenSSA`'s basic reasoning implementation,
 which simply forwards posed problems/questions/tasks to available informational resources,
 and aggregates answers from such resources without much further analysis.
+
+By default, resources are presented compactly, i.e., referred to by short IDs in their answers,
+with their full names & overviews presented once in a single overview header block.
 """
 
 
@@ -15,15 +18,19 @@ from dataclasses import dataclass
 from typing import TYPE_CHECKING
 
 from openssa.core.reasoning.base import BaseReasoner
+from openssa.core.resource.base import resource_overviews_lm_chat_msg, short_resource_ids
 from openssa.core.knowledge._prompts import knowledge_injection_lm_chat_msgs
 from openssa.core.task.status import TaskStatus
+from openssa.core.util.lm.history import ChatHistory
 from openssa.core.util.misc import format_other_result
+from openssa.core.util.tracing import SpanKind, traced
 
 from ._prompts import (RESOURCE_QA_CONSO_PROMPT_TEMPLATE, RESOURCE_QA_AND_OTHER_RESULTS_CONSO_PROMPT_TEMPLATE,
                        OTHER_RESULTS_CONSO_PROMPT_TEMPLATE)
 
 if TYPE_CHECKING:
     from openssa.core.knowledge.base import Knowledge
+    from openssa.core.resource.base import BaseResource
     from openssa.core.task.task import Task
     from openssa.core.util.misc import AskAnsPair
 
@@ -32,6 +39,7 @@ if TYPE_CHECKING:
 class SimpleReasoner(BaseReasoner):
     """Simple Reasoner."""
 
+    @traced('reasoner.reason', SpanKind.REASONING, attributes=lambda self, task, **kwargs: {'ask': task.ask})
     def reason(self, task: Task, *,
                knowledge: set[Knowledge], other_results: list[AskAnsPair] | None = None, n_words: int = 1000) -> str:
         """Work through Task and return conclusion in string.
@@ -41,10 +49,24 @@ class SimpleReasoner(BaseReasoner):
 
         Optionally take into account given Knowledge and/or other results.
         """
+        resource_ids: dict[BaseResource, str] | None = (short_resource_ids(task.resources)
+                                                        if self.compact_resource_presentation and task.resources
+                                                        else None)
+
+        def lm_hist() -> ChatHistory:
+            # Knowledge (if any), followed by overview header block of Resources referred to by short IDs (if any)
+            knowledge_lm_hist: ChatHistory = (knowledge_injection_lm_chat_msgs(knowledge=knowledge, query=task.ask,
+                                                                               selector=self.knowledge_selector)
+                                              if knowledge
+                                              else ChatHistory())
+
+            return (knowledge_lm_hist.extended(resource_overviews_lm_chat_msg(resource_ids))
+                    if resource_ids
+                    else knowledge_lm_hist)
+
         if task.resources:
             if len(task.resources) > 1:
-                resources_and_answers_str: str = '\n\n'.join(r.present_full_answer(question=task.ask, n_words=n_words)
-                                                             for r in task.resources)
+                resources_and_answers_str: str = self._present_resources_and_answers(task, n_words, resource_ids)
 
                 task.result: str = self.lm.get_response(
                     prompt=(RESOURCE_QA_AND_OTHER_RESULTS_CONSO_PROMPT_TEMPLATE.format(
@@ -59,16 +81,15 @@ class SimpleReasoner(BaseReasoner):
                                 question=task.ask, n_words=n_words,
                                 resources_and_answers=resources_and_answers_str)),
 
-                    history=knowledge_injection_lm_chat_msgs(knowledge=knowledge) if knowledge else None)
+                    history=lm_hist())
 
             elif other_results:
                 task.result: str = self.lm.get_response(
                     prompt=RESOURCE_QA_AND_OTHER_RESULTS_CONSO_PROMPT_TEMPLATE.format(
                         question=task.ask, n_words=n_words,
-                        resources_and_answers=next(iter(task.resources)).present_full_answer(question=task.ask,
-                                                                                             n_words=n_words),
+                        resources_and_answers=self._present_resources_and_answers(task, n_words, resource_ids),
                         other_results='\n\n'.join(format_other_result(other_result) for other_result in other_results)),
-                    history=knowledge_injection_lm_chat_msgs(knowledge=knowledge) if knowledge else None)
+                    history=lm_hist())
 
             else:
                 task.result: str = next(iter(task.resources)).answer(question=task.ask, n_words=n_words)
@@ -78,14 +99,24 @@ class SimpleReasoner(BaseReasoner):
                 prompt=OTHER_RESULTS_CONSO_PROMPT_TEMPLATE.format(
                     question=task.ask, n_words=n_words,
                     other_results='\n\n'.join(format_other_result(other_result) for other_result in other_results)),
-                history=knowledge_injection_lm_chat_msgs(knowledge=knowledge) if knowledge else None)
+                history=lm_hist())
 
         else:
             task.result: str = self.lm.get_response(prompt=f'`[WITHIN {n_words:,} WORDS:]`\n{task.ask}',
-                                                    history=(knowledge_injection_lm_chat_msgs(knowledge=knowledge)
-                                                             if knowledge
-                                                             else None))
+                                                    history=lm_hist())
 
         task.status: TaskStatus = TaskStatus.DONE
 
         return task.result
+
+    @staticmethod
+    def _present_resources_and_answers(task: Task, n_words: int = 1000,
+                                       resource_ids: dict[BaseResource, str] | None = None) -> str:
+        """Present answers from Task's Resources,
+        referring to Resources by short IDs if given, or else presenting each with full name & overview.
+        """
+        if resource_ids is None:
+            return '\n\n'.join(r.present_full_answer(question=task.ask, n_words=n_words) for r in task.resources)
+
+        return '\n\n'.join(resource.present_compact_answer(question=task.ask, resource_id=resource_id, n_words=n_words)
+                           for resource, resource_id in resource_ids.items())
@@ -15,3 +15,24 @@ RESOURCE_QA_PROMPT_TEMPLATE: str = (
 DO NOT include in your answer any examples/facts/numbers not concretely mentioned in your informational resource.
 """  # noqa: E122
 )
+
+RESOURCE_ROUTING_PROMPT_TEMPLATE: str = (
+"""Consider the following question/problem/task:
+
+```
+{question}
+```
+
+and the informational resources summarized in the below dictionary,
+in which each key is a resource's unique name and the corresponding value is that resource's overview:
+
+```
+{resource_overviews}
+```
+
+Please score how relevant each resource is for answering/solving the posed question/problem/task,
+on a scale from 0 (irrelevant) to 10 (highly relevant).
+
+Return a JSON dictionary in which each key is a resource's unique name and the corresponding value is its score.
+"""  # noqa: E122
+)
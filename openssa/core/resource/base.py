@@ -8,20 +8,40 @@ INFORMATIONAL RESOURCE INTERFACE
 An informational resource is simply something that has a globally-unique name (within the running program),
 has a potentially non-unique but informationally helpful name,
 and can `.answer(...)` given questions with string responses.
+
+Calls to `.answer(...)` are traced if tracing is enabled.
+
+For prompts presenting answers from several resources, compact presentation refers to each resource by a short ID,
+with each resource's full name & overview presented only once, in a single overview header block,
+rather than repeated with every answer.
 """
 
 
 from __future__ import annotations
 
 from abc import ABC, abstractmethod
+from collections.abc import Iterable
 from functools import cached_property
 
+from openssa.core.util.tracing import SpanKind, traced
+
 from ._prompts import RESOURCE_OVERVIEW_PROMPT_TEMPLATE
 
 
+def _answer_span_attributes(resource: BaseResource, *args, **kwargs) -> dict[str, str]:
+    return {'resource': resource.unique_name, 'question': kwargs.get('question', args[0] if args else None)}
+
+
 class BaseResource(ABC):
     """Resource abstract base class."""
 
+    def __init_subclass__(cls, **kwargs):
+        """Trace calls to `.answer(...)` implementations."""
+        super().__init_subclass__(**kwargs)
+
+        if 'answer' in vars(cls):
+            cls.answer = traced('resource.answer', SpanKind.RESOURCE, attributes=_answer_span_attributes)(cls.answer)
+
     @cached_property
     @abstractmethod
     def unique_name(self) -> str:
@@ -61,3 +81,41 @@ class BaseResource(ABC):
                 f'{self.answer(question=question, n_words=n_words)}\n'
                 '--------------------------------------\n'
                 '======================================\n')
+
+    def present_compact_answer(self, question: str, resource_id: str, n_words: int = 1000) -> str:
+        """Present answer to posed question with Resource referred to by short ID
+        (see `present_resource_overviews(...)` for presenting Resources' full names & overviews once).
+        """
+        return ('======================================\n'
+                f'[{resource_id}]\n'
+                'returns the following answer/solution:\n'
+                '--------------------------------------\n'
+                f'{self.answer(question=question, n_words=n_words)}\n'
+                '--------------------------------------\n'
+                '======================================\n')
+
+
+def short_resource_ids(resources: Iterable[BaseResource]) -> dict[BaseResource, str]:
+    """Assign short IDs to Resources, in order of unique names (so that IDs are stable across prompts)."""
+    return {resource: f'R{i + 1}' for i, resource in enumerate(sorted(resources, key=lambda r: r.unique_name))}
+
+
+def present_resource_overviews(resource_ids: dict[BaseResource, str]) -> str:
+    """Present full names & overviews of Resources referred to by short IDs, in single header block."""
+    return ('======================================\n'
+            'RESOURCES (REFERRED TO BY SHORT IDS BELOW):\n'
+            '\n' +
+            '\n'.join((f'[{resource_id}] {resource.full_name}\n'
+                       'has the following overview:\n'
+                       '---------------------------\n'
+                       f'{resource.overview}\n'
+                       '---------------------------\n')
+                      for resource, resource_id in resource_ids.items()) +
+            '======================================\n')
+
+
+def resource_overviews_lm_chat_msg(resource_ids: dict[BaseResource, str]) -> dict[str, str]:
+    """Return system chat message presenting full names & overviews of Resources referred to by short IDs,
+    to be placed in chat history (e.g., following Knowledge) so that it stays byte-identical across calls.
+    """
+    return {'role': 'system', 'content': present_resource_overviews(resource_ids)}
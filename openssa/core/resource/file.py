@@ -11,16 +11,33 @@ to index such file-stored content into vector indices, and to respond to informa
 
 A file resource needs to be specified with a local or remote cloud directory/file path,
 a `LlamaIndex`-compliant embedding model and a `LlamaIndex`-compliant LM.
+The embedding model can be remote (by default, OpenAI's) or local (e.g., `LocalEmbedding` running on CPU),
+and each embedding model's index is persisted in its own hidden sub-directory named after the model.
+
+For a directory, the resource's overview is persisted next to its index,
+and reused across processes for as long as the source files remain unchanged.
+
+A directory's index can also be re-indexed incrementally,
+using a persisted manifest of source files' sizes, modification times, content hashes & document IDs
+to embed only added or changed files, and to remove nodes of deleted files.
+
+Optionally, embedding vectors can be kept in a memory-mapped `NumpyVectorStore` instead of LlamaIndex's JSON one,
+for near-instant loading of large indices and vectorized similarity search.
 """
 
 
 from collections.abc import Collection
 from dataclasses import dataclass, field, InitVar
-from functools import cached_property
+from functools import cached_property, partial
+from hashlib import sha256
+import json
 import os
 from pathlib import Path
 from tempfile import mkdtemp
-from typing import TypeVar
+from threading import RLock
+from typing import TypedDict, TypeVar
+
+from loguru import logger
 
 from fsspec.spec import AbstractFileSystem
 from fsspec.implementations.local import LocalFileSystem
@@ -33,15 +50,19 @@ from llama_index.core.indices.loading import load_index_from_storage
 from llama_index.core.indices.vector_store.base import VectorStoreIndex
 from llama_index.core.query_engine.retriever_query_engine import RetrieverQueryEngine
 from llama_index.core.readers.file.base import SimpleDirectoryReader
+from llama_index.core.schema import Document
 from llama_index.core.response_synthesizers.type import ResponseMode
 from llama_index.core.storage.storage_context import StorageContext
+from llama_index.core.vector_stores.simple import SimpleVectorStore
 from llama_index.core.vector_stores.types import VectorStoreQueryMode
 
 from openssa.core.util.lm.openai import default_llama_index_openai_embed_model, default_llama_index_openai_lm
+from openssa.core.util.retry import RetryAttempt, RetryPolicy
 
 from .base import BaseResource
 from ._global import global_register
-from ._prompts import RESOURCE_QA_PROMPT_TEMPLATE
+from .numpy_vector_store import NumpyVectorStore
+from ._prompts import RESOURCE_OVERVIEW_PROMPT_TEMPLATE, RESOURCE_QA_PROMPT_TEMPLATE
 
 
 # file suffixes: text files, plus a subset of those supported by Llama Index
@@ -69,13 +90,33 @@ _GCS_PROTOCOL_PREFIX: str = 'gcs://'
 _S3_PROTOCOL_PREFIX: str = 's3://'
 
 
+# names of files persisting document store, source file manifest & overview in index directory
+_DOCSTORE_FILE_NAME: str = 'docstore.json'
+_MANIFEST_FILE_NAME: str = 'manifest.json'
+_OVERVIEW_FILE_NAME: str = 'overview.json'
+
+
 type DirOrFileStrPath = str
 type FileStrPathSet = frozenset[DirOrFileStrPath]
 
 
+class SourceFileFingerprint(TypedDict):
+    size: int | None
+    mtime: str
+    sha256: str | None
+
+
+class IndexManifestEntry(SourceFileFingerprint):
+    doc_ids: list[str]
+
+
+# source file manifest, indexed by path relative to directory
+type IndexManifest = dict[DirOrFileStrPath, IndexManifestEntry]
+
+
 @global_register
 @dataclass
-class FileResource(BaseResource):
+class FileResource(BaseResource):  # pylint: disable=too-many-instance-attributes
     """File-stored Informational Resource."""
 
     # directory or file path to file-stored Informational Resource
@@ -93,6 +134,10 @@ class FileResource(BaseResource):
     # whether to re-index information upon initialization
     re_index: InitVar[bool] = False
 
+    # whether to incrementally re-index a directory's persisted index upon first query,
+    # embedding only added/changed files and removing deleted ones
+    incremental_re_index: InitVar[bool] = False
+
     # language model for generating answers
     lm: LlamaIndexLM = field(default_factory=default_llama_index_openai_lm,
                              init=True,
@@ -102,7 +147,33 @@ class FileResource(BaseResource):
                              metadata=None,
                              kw_only=True)
 
-    def __post_init__(self, re_index: bool):
+    # whether to keep embedding vectors in memory-mapped NumPy arrays rather than in JSON,
+    # and data type of such vectors ('float32', or 'float16' for halving memory at slight precision cost)
+    numpy_vector_store: bool = field(default=False,
+                                     init=True,
+                                     repr=False,
+                                     hash=None,
+                                     compare=True,
+                                     metadata=None,
+                                     kw_only=True)
+    numpy_vector_dtype: str = field(default='float32',
+                                    init=True,
+                                    repr=False,
+                                    hash=None,
+                                    compare=True,
+                                    metadata=None,
+                                    kw_only=True)
+
+    # policy for retrying answering while answers ask to repeat the question
+    retry_policy: RetryPolicy = field(default_factory=partial(RetryPolicy, max_attempts=9, reprompt_with_error=False),
+                                      init=True,
+                                      repr=False,
+                                      hash=None,
+                                      compare=False,
+                                      metadata=None,
+                                      kw_only=True)
+
+    def __post_init__(self, re_index: bool, incremental_re_index: bool):
         """Post-initialize file-stored Informational Resource."""
         if isinstance(self.path, Path):
             self.path: Path = self.path.resolve(strict=True)
@@ -115,11 +186,18 @@ class FileResource(BaseResource):
 
         self.embed_model_name: str = self.embed_model.model_name
 
+        # index directory name, with path separators in embedding model name (e.g., "org/model") replaced
+        index_dir_name: str = f".{self.embed_model_name.replace('/', '--').replace(os.sep, '--')}"
+
         self.to_re_index: bool = re_index
+        self.to_re_index_incrementally: bool = incremental_re_index
+
+        # lock ensuring that index & overview are created only once even if first requested concurrently
+        self._lock: RLock = RLock()
 
-        self.index_dir_str_path: DirOrFileStrPath = ((str(self.path / f'.{self.embed_model_name}')
+        self.index_dir_str_path: DirOrFileStrPath = ((str(self.path / index_dir_name)
                                                       if isinstance(self.path, Path)
-                                                      else os.path.join(self.path, f'.{self.embed_model_name}'))
+                                                      else os.path.join(self.path, index_dir_name))
                                                      if self.is_dir
                                                      else mkdtemp(suffix=None, prefix=None, dir=None))
 
@@ -195,82 +273,265 @@ class FileResource(BaseResource):
             ValueError(f'"{self.path}" not a file with suffix among {suffixes}')
         return frozenset({self.path})
 
+    @cached_property
+    def overview_fingerprint(self) -> str:
+        """Fingerprint of source files' contents, together with LM & prompt for generating overview."""
+        return sha256(json.dumps({'lm': self.lm.metadata.model_name,
+                                  'prompt': RESOURCE_OVERVIEW_PROMPT_TEMPLATE.format(name=self.name),
+                                  'files': sorted((relpath, self._source_file_sha256(f'{self.native_str_path}/{relpath}'))
+                                                  for relpath in self.file_paths(relative=True))}).encode()).hexdigest()
+
+    @cached_property
+    def overview(self) -> str:
+        """Return overview of file-stored Informational Resource.
+
+        For a directory, the overview is persisted in the index directory,
+        and reused for as long as the source files remain unchanged.
+        """
+        with self._lock:
+            if 'overview' in self.__dict__:  # already created by concurrent request
+                return self.__dict__['overview']
+
+            self.__dict__['overview']: str = self._load_or_create_overview()
+            return self.__dict__['overview']
+
+    def _load_or_create_overview(self) -> str:
+        if not self.is_dir:
+            return super().overview
+
+        overview_file_path: DirOrFileStrPath = f'{self.index_dir_str_path}/{_OVERVIEW_FILE_NAME}'
+
+        if self.fs.isfile(overview_file_path):
+            with self.fs.open(overview_file_path, mode='r', encoding='utf-8') as f:
+                persisted: dict[str, str] = json.load(f)
+
+            if persisted.get('fingerprint') == self.overview_fingerprint:
+                return persisted['overview']
+
+        overview: str = super().overview
+
+        self.fs.makedirs(self.index_dir_str_path, exist_ok=True)
+        with self.fs.open(overview_file_path, mode='w', encoding='utf-8') as f:
+            json.dump({'fingerprint': self.overview_fingerprint, 'overview': overview}, f, ensure_ascii=False, indent=2)
+
+        return overview
+
+    def directory_reader(self, input_files: list[DirOrFileStrPath] | None = None) -> SimpleDirectoryReader:
+        """Return reader of source files (optionally only specified ones)."""
+        return SimpleDirectoryReader(
+            # docs.llamaindex.ai/en/latest/examples/data_connectors/simple_directory_reader.html#full-configuration
+            input_dir=None if input_files else (self.native_str_path if self.on_remote else self.str_path),
+            input_files=input_files,
+            exclude=[
+                '.DS_Store',  # MacOS
+                '*.json',  # potential nested index files
+                '*.npy',  # potential nested NumPy vector store files
+            ],
+            exclude_hidden=False,
+            errors='strict',
+            recursive=self.is_dir,
+            encoding='utf-8',
+            filename_as_id=False,
+            required_exts=None,
+            file_extractor=None,
+            num_files_limit=None,
+            file_metadata=None,
+            fs=self.fs if self.is_dir else None,
+        )
+
+    def _source_relpath(self, file_path: DirOrFileStrPath) -> DirOrFileStrPath:
+        return str(file_path)[len(self.native_str_path) + 1:]
+
+    def _source_file_fingerprint(self, file_path: DirOrFileStrPath) -> SourceFileFingerprint:
+        info: dict = self.fs.info(file_path)
+        return {'size': info.get('size'),
+                'mtime': str(info.get('mtime') or info.get('LastModified') or info.get('updated') or ''),
+                'sha256': None}
+
+    def _source_file_sha256(self, file_path: DirOrFileStrPath) -> str:
+        file_hash = sha256()
+
+        with self.fs.open(file_path, mode='rb') as f:
+            while chunk := f.read(1 << 20):
+                file_hash.update(chunk)
+
+        return file_hash.hexdigest()
+
+    def _load_manifest(self) -> IndexManifest | None:
+        manifest_file_path: DirOrFileStrPath = f'{self.index_dir_str_path}/{_MANIFEST_FILE_NAME}'
+
+        if not self.fs.isfile(manifest_file_path):
+            return None
+
+        with self.fs.open(manifest_file_path, mode='r', encoding='utf-8') as f:
+            return json.load(f)
+
+    def _persist(self, index: VectorStoreIndex, manifest: IndexManifest):
+        fs: AFileSystem | None = self.fs if self.is_dir else None
+
+        index.storage_context.persist(
+            # docs.llamaindex.ai/en/latest/api_reference/storage.html#llama_index.core.storage.storage_context.StorageContext.persist
+            persist_dir=self.index_dir_str_path,
+            fs=fs)
+
+        if self.is_dir:
+            with self.fs.open(f'{self.index_dir_str_path}/{_MANIFEST_FILE_NAME}', mode='w', encoding='utf-8') as f:
+                json.dump(manifest, f, ensure_ascii=False, indent=2)
+
+    def _load_numpy_vector_store(self) -> NumpyVectorStore:
+        if NumpyVectorStore.exists(persist_dir=self.index_dir_str_path, fs=self.fs):
+            return NumpyVectorStore.from_persist_dir(persist_dir=self.index_dir_str_path, fs=self.fs)
+
+        # migrate index persisted with default JSON vector store, without re-embedding
+        vector_store: NumpyVectorStore = NumpyVectorStore.from_simple_vector_store(
+            SimpleVectorStore.from_persist_dir(persist_dir=self.index_dir_str_path, fs=self.fs),
+            dtype=self.numpy_vector_dtype, fs=self.fs)
+        vector_store.persist(persist_path=NumpyVectorStore.persist_path(self.index_dir_str_path), fs=self.fs)
+        logger.info(f'MIGRATED VECTORS of "{self.path}" TO NUMPY VECTOR STORE')
+
+        return vector_store
+
+    def _load_index(self) -> VectorStoreIndex:
+        return load_index_from_storage(
+            storage_context=StorageContext.from_defaults(
+                # docs.llamaindex.ai/en/latest/api_reference/storage.html#llama_index.core.storage.storage_context.StorageContext.from_defaults
+                docstore=None,
+                index_store=None,
+                vector_store=self._load_numpy_vector_store() if self.numpy_vector_store else None,
+                image_store=None,
+                vector_stores=None,
+                graph_store=None,
+                persist_dir=self.index_dir_str_path,
+                fs=self.fs),
+            index_id=None,
+
+            # other BaseIndex.__init__(...) args:
+            # docs.llamaindex.ai/en/latest/api_reference/indices.html#llama_index.core.indices.base.BaseIndex
+            nodes=None,
+            objects=None,
+            callback_manager=None,
+            transformations=None,
+            show_progress=True,
+
+            # other VectorStoreIndex.__init__(...) args, for incremental insertions:
+            embed_model=self.embed_model)
+
+    def _build_index(self) -> VectorStoreIndex:
+        reader: SimpleDirectoryReader = self.directory_reader()
+        documents: list[Document] = reader.load_data(show_progress=True, num_workers=os.cpu_count())
+
+        index: VectorStoreIndex = VectorStoreIndex.from_documents(
+            # BaseIndex.from_documents(...) args:
+            # docs.llamaindex.ai/en/latest/api_reference/indices.html#llama_index.core.indices.base.BaseIndex.from_documents
+            documents=documents,
+            storage_context=(StorageContext.from_defaults(vector_store=NumpyVectorStore(dtype=self.numpy_vector_dtype))
+                             if self.numpy_vector_store
+                             else None),
+            show_progress=True,
+            callback_manager=None,
+            transformations=None,
+
+            # other VectorStoreIndex.__init__(...) args:
+            # docs.llamaindex.ai/en/latest/api_reference/indices/vector_store.html#llama_index.core.indices.vector_store.base.VectorStoreIndex
+            use_async=False,
+            store_nodes_override=False,
+            embed_model=self.embed_model,
+            insert_batch_size=2048,
+            objects=None,
+            index_struct=None)
+
+        manifest: IndexManifest = {}
+        if self.is_dir:
+            for file_path in reader.input_files:
+                manifest[self._source_relpath(file_path)]: IndexManifestEntry = (
+                    self._source_file_fingerprint(file_path) |
+                    {'sha256': self._source_file_sha256(file_path), 'doc_ids': []})
+
+            for document in documents:
+                manifest[self._source_relpath(document.metadata['file_path'])]['doc_ids'].append(document.doc_id)
+
+        self._persist(index=index, manifest=manifest)
+
+        return index
+
+    def _update_index(self, index: VectorStoreIndex, manifest: IndexManifest) -> VectorStoreIndex:
+        """Incrementally update index, embedding only added/changed source files and removing deleted ones."""
+        current_file_paths: dict[DirOrFileStrPath, DirOrFileStrPath] = {
+            self._source_relpath(file_path): str(file_path) for file_path in self.directory_reader().input_files}
+
+        doc_ids_to_delete: list[str] = []
+        relpaths_to_embed: list[DirOrFileStrPath] = []
+
+        deleted_relpaths: set[DirOrFileStrPath] = set(manifest) - set(current_file_paths)
+        for relpath in deleted_relpaths:
+            doc_ids_to_delete.extend(manifest.pop(relpath)['doc_ids'])
+
+        for relpath, file_path in current_file_paths.items():
+            fingerprint: SourceFileFingerprint = self._source_file_fingerprint(file_path)
+
+            if (entry := manifest.get(relpath)) and ((entry['size'], entry['mtime']) ==
+                                                     (fingerprint['size'], fingerprint['mtime'])):
+                continue
+
+            fingerprint['sha256']: str = self._source_file_sha256(file_path)
+
+            if entry and (entry['sha256'] == fingerprint['sha256']):  # touched but unchanged
+                entry['mtime']: str = fingerprint['mtime']
+                continue
+
+            if entry:
+                doc_ids_to_delete.extend(entry['doc_ids'])
+
+            relpaths_to_embed.append(relpath)
+            manifest[relpath]: IndexManifestEntry = fingerprint | {'doc_ids': []}
+
+        for doc_id in doc_ids_to_delete:
+            index.delete_ref_doc(ref_doc_id=doc_id, delete_from_docstore=True)
+
+        if relpaths_to_embed:
+            reader: SimpleDirectoryReader = self.directory_reader(input_files=[current_file_paths[relpath]
+                                                                               for relpath in relpaths_to_embed])
+
+            for document in reader.load_data(show_progress=True, num_workers=os.cpu_count()):
+                index.insert(document=document)
+                manifest[self._source_relpath(document.metadata['file_path'])]['doc_ids'].append(document.doc_id)
+
+        logger.info(f'INCREMENTALLY RE-INDEXED "{self.path}": '
+                    f'{len(relpaths_to_embed)} FILE(S) ADDED/CHANGED, {len(deleted_relpaths)} FILE(S) DELETED')
+
+        # persist even if only modification times changed, to avoid re-hashing touched files next time
+        self._persist(index=index, manifest=manifest)
+
+        return index
+
     @cached_property
     def query_engine(self) -> RetrieverQueryEngine:
         """Return RAG query engine."""
+        with self._lock:
+            if 'query_engine' not in self.__dict__:  # not yet created by concurrent request
+                self.__dict__['query_engine']: RetrieverQueryEngine = self._create_query_engine()
+
+            return self.__dict__['query_engine']
+
+    def _create_query_engine(self) -> RetrieverQueryEngine:
         # TODO: get Llama Index to fix known issues:
         # - error with remote FS when using Windows:
         #   github.com/run-llama/llama_index/issues/11810
         # - loading from remote FS encounters error `.load_data() got unexpected keyword argument 'fs'`:
         #   github.com/run-llama/llama_index/issues/9793
 
-        if self.is_dir and (self.fs.isdir(path=self.index_dir_str_path) and
-                            self.fs.ls(path=self.index_dir_str_path, detail=False)) and (not self.to_re_index):
-            index: VectorStoreIndex = load_index_from_storage(
-                storage_context=StorageContext.from_defaults(
-                    # docs.llamaindex.ai/en/latest/api_reference/storage.html#llama_index.core.storage.storage_context.StorageContext.from_defaults
-                    docstore=None,
-                    index_store=None,
-                    vector_store=None,
-                    image_store=None,
-                    vector_stores=None,
-                    graph_store=None,
-                    persist_dir=self.index_dir_str_path,
-                    fs=self.fs),
-                index_id=None,
-
-                # other BaseIndex.__init__(...) args:
-                # docs.llamaindex.ai/en/latest/api_reference/indices.html#llama_index.core.indices.base.BaseIndex
-                nodes=None,
-                objects=None,
-                callback_manager=None,
-                transformations=None,
-                show_progress=True)
+        if self.is_dir and self.fs.isfile(path=f'{self.index_dir_str_path}/{_DOCSTORE_FILE_NAME}') and (not self.to_re_index):  # noqa: E501
+            index: VectorStoreIndex = self._load_index()
+
+            if self.to_re_index_incrementally:
+                if (manifest := self._load_manifest()) is None:
+                    logger.warning(f'NO INDEX MANIFEST for "{self.path}": RE-INDEXING FULLY')
+                    index: VectorStoreIndex = self._build_index()
+                else:
+                    index: VectorStoreIndex = self._update_index(index=index, manifest=manifest)
 
         else:
-            fs: AFileSystem | None = self.fs if self.is_dir else None
-
-            index: VectorStoreIndex = VectorStoreIndex.from_documents(
-                # BaseIndex.from_documents(...) args:
-                # docs.llamaindex.ai/en/latest/api_reference/indices.html#llama_index.core.indices.base.BaseIndex.from_documents
-                documents=SimpleDirectoryReader(
-                    # docs.llamaindex.ai/en/latest/examples/data_connectors/simple_directory_reader.html#full-configuration
-                    input_dir=self.native_str_path if self.on_remote else self.str_path,
-                    input_files=None,
-                    exclude=[
-                        '.DS_Store',  # MacOS
-                        '*.json',  # potential nested index files
-                    ],
-                    exclude_hidden=False,
-                    errors='strict',
-                    recursive=self.is_dir,
-                    encoding='utf-8',
-                    filename_as_id=False,
-                    required_exts=None,
-                    file_extractor=None,
-                    num_files_limit=None,
-                    file_metadata=None,
-                    fs=fs,
-                ).load_data(show_progress=True,
-                            num_workers=os.cpu_count()),
-                storage_context=None,
-                show_progress=True,
-                callback_manager=None,
-                transformations=None,
-
-                # other VectorStoreIndex.__init__(...) args:
-                # docs.llamaindex.ai/en/latest/api_reference/indices/vector_store.html#llama_index.core.indices.vector_store.base.VectorStoreIndex
-                use_async=False,
-                store_nodes_override=False,
-                embed_model=self.embed_model,
-                insert_batch_size=2048,
-                objects=None,
-                index_struct=None)
-
-            index.storage_context.persist(
-                # docs.llamaindex.ai/en/latest/api_reference/storage.html#llama_index.core.storage.storage_context.StorageContext.persist
-                persist_dir=self.index_dir_str_path,
-                fs=fs)
+            index: VectorStoreIndex = self._build_index()
 
         return index.as_query_engine(
             # docs.llamaindex.ai/en/latest/understanding/querying/querying.html
@@ -305,10 +566,12 @@ class FileResource(BaseResource):
         """Answer question by RAG from file-stored Informational Resource."""
         prompt: str = RESOURCE_QA_PROMPT_TEMPLATE.format(n_words=n_words, question=question)
 
-        for _ in range(9):
-            answer: str = self.query_engine.query(prompt).response
+        def attempt_answer(attempt: RetryAttempt) -> str:
+            attempt.previous_output = answer = self.query_engine.query(prompt).response
 
-            if not answer.strip().lower().startswith('repeat'):
-                break
+            if answer.strip().lower().startswith('repeat'):
+                raise ValueError('answer asks to repeat question')
+            return answer
 
-        return answer
+        return self.retry_policy.retry(attempt_answer, name='FILE RESOURCE ANSWER',
+                                       fallback=lambda attempt: attempt.previous_output)
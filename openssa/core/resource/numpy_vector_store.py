@@ -0,0 +1,276 @@
+"""
+=============================================
+MEMORY-MAPPED NUMPY VECTOR STORE (LlamaIndex)
+=============================================
+
+`NumpyVectorStore` is a `LlamaIndex`-compliant vector store
+keeping normalized embedding vectors in one contiguous float32 (or float16) matrix,
+with sidecar arrays of node IDs & reference document IDs.
+
+Persisted stores are saved as `.npy` files and, on local file systems, opened as memory maps,
+so that loading is near-instant and multiple processes share the same memory pages.
+
+Top-k similarity search is a single vectorized matrix-vector product,
+and Maximal Marginal Relevance (MMR) search re-ranks a prefetched pool of top candidates.
+"""
+
+
+from __future__ import annotations
+
+from io import BytesIO
+import os
+from typing import Any
+
+import fsspec
+from fsspec.implementations.local import LocalFileSystem
+from llama_index.core.bridge.pydantic import PrivateAttr
+from llama_index.core.schema import BaseNode
+from llama_index.core.vector_stores.simple import SimpleVectorStore, DEFAULT_VECTOR_STORE, NAMESPACE_SEP
+from llama_index.core.vector_stores.types import (BasePydanticVectorStore, MetadataFilters,
+                                                  VectorStoreQuery, VectorStoreQueryMode, VectorStoreQueryResult,
+                                                  DEFAULT_PERSIST_FNAME)
+import numpy as np
+
+
+_ARRAY_NAMES: tuple[str, ...] = ('embeddings', 'node_ids', 'ref_doc_ids')
+
+
+def _array_path(persist_path: str, array_name: str) -> str:
+    return f"{persist_path.removesuffix('.json')}.{array_name}.npy"
+
+
+class NumpyVectorStore(BasePydanticVectorStore):
+    """Vector store of normalized embeddings in contiguous (memory-mapped) NumPy matrix."""
+
+    stores_text: bool = False
+
+    # data type of stored embedding vectors ('float32' or 'float16')
+    dtype: str = 'float32'
+
+    # number of top candidates per requested result to prefetch for MMR re-ranking
+    mmr_prefetch_factor: int = 8
+
+    _embeddings: np.ndarray = PrivateAttr()
+    _node_ids: np.ndarray = PrivateAttr()
+    _ref_doc_ids: np.ndarray = PrivateAttr()
+    _fs: fsspec.AbstractFileSystem = PrivateAttr()
+
+    def __init__(self, dtype: str = 'float32',
+                 embeddings: np.ndarray | None = None, node_ids: np.ndarray | None = None,
+                 ref_doc_ids: np.ndarray | None = None,
+                 fs: fsspec.AbstractFileSystem | None = None, **kwargs: Any):
+        """Initialize with optional existing arrays."""
+        super().__init__(dtype=dtype, **kwargs)
+        self._embeddings: np.ndarray = embeddings if embeddings is not None else np.empty((0, 0), dtype=dtype)
+        self._node_ids: np.ndarray = node_ids if node_ids is not None else np.empty(0, dtype=str)
+        self._ref_doc_ids: np.ndarray = ref_doc_ids if ref_doc_ids is not None else np.empty(0, dtype=str)
+        self._fs: fsspec.AbstractFileSystem = fs or fsspec.filesystem('file')
+
+    @classmethod
+    def class_name(cls) -> str:
+        """Class name."""
+        return 'NumpyVectorStore'
+
+    @property
+    def client(self) -> None:
+        """Get client."""
+        return
+
+    @property
+    def n_vectors(self) -> int:
+        """Return number of stored vectors."""
+        return len(self._node_ids)
+
+    def get(self, text_id: str) -> list[float]:
+        """Get (normalized) embedding."""
+        return self._embeddings[np.flatnonzero(self._node_ids == text_id)[0]].astype(np.float32).tolist()
+
+    def add(self, nodes: list[BaseNode], **kwargs: Any) -> list[str]:
+        """Add nodes' normalized embeddings."""
+        if not nodes:
+            return []
+
+        embeddings: np.ndarray = np.asarray([node.get_embedding() for node in nodes], dtype=np.float32)
+        embeddings /= np.maximum(np.linalg.norm(embeddings, axis=1, keepdims=True), np.finfo(np.float32).tiny)
+
+        # note: appending to a memory-mapped matrix materializes it in memory until next persisting
+        self._embeddings: np.ndarray = (np.concatenate((self._embeddings, embeddings.astype(self._embeddings.dtype)))
+                                        if self.n_vectors
+                                        else embeddings.astype(self.dtype))
+        self._node_ids: np.ndarray = np.concatenate((self._node_ids, [node.node_id for node in nodes]))
+        self._ref_doc_ids: np.ndarray = np.concatenate((self._ref_doc_ids,
+                                                        [node.ref_doc_id or 'None' for node in nodes]))
+
+        return [node.node_id for node in nodes]
+
+    def get_nodes(self, node_ids: list[str] | None = None,
+                  filters: MetadataFilters | None = None) -> list[BaseNode]:
+        """Get nodes: not applicable, as nodes' texts are kept in document store rather than in vector store."""
+        raise NotImplementedError('NumpyVectorStore does not store nodes')
+
+    def _keep(self, mask: np.ndarray):
+        self._embeddings: np.ndarray = self._embeddings[mask]
+        self._node_ids: np.ndarray = self._node_ids[mask]
+        self._ref_doc_ids: np.ndarray = self._ref_doc_ids[mask]
+
+    def delete(self, ref_doc_id: str, **delete_kwargs: Any):
+        """Delete nodes of reference document."""
+        self._keep(self._ref_doc_ids != ref_doc_id)
+
+    def delete_nodes(self, node_ids: list[str] | None = None, filters: MetadataFilters | None = None,
+                     **delete_kwargs: Any):
+        """Delete nodes by IDs."""
+        if filters is not None:
+            raise NotImplementedError('NumpyVectorStore does not support metadata filters')
+
+        if node_ids is not None:
+            self._keep(~np.isin(self._node_ids, node_ids))
+
+    def clear(self):
+        """Clear store."""
+        self._keep(np.zeros(self.n_vectors, dtype=bool))
+
+    def query(self, query: VectorStoreQuery, **kwargs: Any) -> VectorStoreQueryResult:
+        """Get top-k most similar nodes, by plain similarity or by Maximal Marginal Relevance (MMR)."""
+        if query.filters is not None:
+            raise NotImplementedError('NumpyVectorStore does not support metadata filters')
+
+        candidate_indices: np.ndarray | None = None
+        if (query.node_ids is not None) or (query.doc_ids is not None):
+            mask: np.ndarray = np.ones(self.n_vectors, dtype=bool)
+            if query.node_ids is not None:
+                mask &= np.isin(self._node_ids, query.node_ids)
+            if query.doc_ids is not None:
+                mask &= np.isin(self._ref_doc_ids, query.doc_ids)
+            candidate_indices: np.ndarray = np.flatnonzero(mask)
+
+        embeddings: np.ndarray = self._embeddings if candidate_indices is None else self._embeddings[candidate_indices]
+        if not len(embeddings):  # pylint: disable=use-implicit-booleaness-not-len
+            return VectorStoreQueryResult(similarities=[], ids=[])
+
+        query_embedding: np.ndarray = np.asarray(query.query_embedding, dtype=np.float32)
+        query_embedding /= max(np.linalg.norm(query_embedding), np.finfo(np.float32).tiny)
+
+        similarities: np.ndarray = embeddings @ query_embedding.astype(embeddings.dtype)
+        top_k: int = min(query.similarity_top_k, len(similarities))
+
+        match query.mode:
+            case VectorStoreQueryMode.DEFAULT:
+                top_indices: np.ndarray = self._top_indices(similarities, top_k)
+                scores: np.ndarray = similarities[top_indices]
+
+            case VectorStoreQueryMode.MMR:
+                top_indices, scores = self._mmr(embeddings, similarities, top_k,
+                                                mmr_threshold=kwargs.get('mmr_threshold'))
+
+            case _:
+                raise ValueError(f'Invalid query mode: {query.mode}')
+
+        if candidate_indices is not None:
+            top_indices: np.ndarray = candidate_indices[top_indices]
+
+        return VectorStoreQueryResult(similarities=scores.astype(float).tolist(),
+                                      ids=self._node_ids[top_indices].tolist())
+
+    @staticmethod
+    def _top_indices(similarities: np.ndarray, k: int) -> np.ndarray:
+        top_indices: np.ndarray = np.argpartition(-similarities, k - 1)[:k]
+        return top_indices[np.argsort(-similarities[top_indices], kind='stable')]
+
+    def _mmr(self, embeddings: np.ndarray, similarities: np.ndarray, k: int,
+             mmr_threshold: float | None = None) -> tuple[np.ndarray, np.ndarray]:
+        """Select by Maximal Marginal Relevance among prefetched top candidates.
+
+        An MMR threshold of 1 only considers similarity to query,
+        while lower thresholds increasingly penalize similarity to already-selected results.
+        """
+        threshold: float = 0.5 if mmr_threshold is None else mmr_threshold
+
+        pool: np.ndarray = self._top_indices(similarities, min(k * self.mmr_prefetch_factor, len(similarities)))
+        pool_embeddings: np.ndarray = np.asarray(embeddings[pool], dtype=np.float32)
+        relevance: np.ndarray = threshold * similarities[pool].astype(np.float32)
+
+        max_overlaps: np.ndarray = np.full(len(pool), -np.inf, dtype=np.float32)
+        available: np.ndarray = np.ones(len(pool), dtype=bool)
+        selected: list[int] = []
+        scores: list[float] = []
+
+        for _ in range(k):
+            mmr_scores: np.ndarray = (relevance - (1 - threshold) * np.maximum(max_overlaps, 0)
+                                      if selected
+                                      else relevance.copy())
+            mmr_scores[~available] = -np.inf
+
+            selected.append(best := int(np.argmax(mmr_scores)))
+            scores.append(float(mmr_scores[best]))
+            available[best] = False
+            max_overlaps: np.ndarray = np.maximum(max_overlaps, pool_embeddings @ pool_embeddings[best])
+
+        return pool[selected], np.asarray(scores)
+
+    def persist(self, persist_path: str, fs: fsspec.AbstractFileSystem | None = None):
+        """Persist arrays as `.npy` files alongside given persist path."""
+        fs: fsspec.AbstractFileSystem = fs or self._fs
+        fs.makedirs(os.path.dirname(persist_path), exist_ok=True)
+
+        for array_name in _ARRAY_NAMES:
+            array_path: str = _array_path(persist_path, array_name)
+            tmp_array_path: str = f'{array_path}.tmp'
+
+            # write to temporary file then move, so as not to disturb processes memory-mapping existing file
+            with fs.open(tmp_array_path, mode='wb') as f:
+                np.save(f, getattr(self, f'_{array_name}'), allow_pickle=False)
+            fs.mv(tmp_array_path, array_path)
+
+    @staticmethod
+    def persist_path(persist_dir: str, namespace: str = DEFAULT_VECTOR_STORE) -> str:
+        """Return persist path for namespace in persist directory."""
+        return f'{persist_dir}/{namespace}{NAMESPACE_SEP}{DEFAULT_PERSIST_FNAME}'
+
+    @classmethod
+    def exists(cls, persist_dir: str, namespace: str = DEFAULT_VECTOR_STORE,
+               fs: fsspec.AbstractFileSystem | None = None) -> bool:
+        """Check if persisted store exists in persist directory."""
+        fs: fsspec.AbstractFileSystem = fs or fsspec.filesystem('file')
+        return all(fs.isfile(_array_path(cls.persist_path(persist_dir, namespace), array_name))
+                   for array_name in _ARRAY_NAMES)
+
+    @classmethod
+    def from_persist_dir(cls, persist_dir: str, namespace: str = DEFAULT_VECTOR_STORE,
+                         fs: fsspec.AbstractFileSystem | None = None) -> NumpyVectorStore:
+        """Load from persist directory, memory-mapping arrays if on local file system."""
+        return cls.from_persist_path(cls.persist_path(persist_dir, namespace), fs=fs)
+
+    @classmethod
+    def from_persist_path(cls, persist_path: str, fs: fsspec.AbstractFileSystem | None = None) -> NumpyVectorStore:
+        """Load from persist path, memory-mapping arrays if on local file system."""
+        fs: fsspec.AbstractFileSystem = fs or fsspec.filesystem('file')
+
+        def load(array_name: str) -> np.ndarray:
+            array_path: str = _array_path(persist_path, array_name)
+
+            if isinstance(fs, LocalFileSystem):
+                return np.load(fs._strip_protocol(array_path),  # pylint: disable=protected-access
+                               mmap_mode='r' if array_name == 'embeddings' else None, allow_pickle=False)
+
+            return np.load(BytesIO(fs.cat_file(array_path)), allow_pickle=False)
+
+        embeddings: np.ndarray = load('embeddings')
+
+        return cls(dtype=str(embeddings.dtype) if embeddings.size else 'float32',
+                   embeddings=embeddings, node_ids=load('node_ids'), ref_doc_ids=load('ref_doc_ids'), fs=fs)
+
+    @classmethod
+    def from_simple_vector_store(cls, simple_vector_store: SimpleVectorStore, dtype: str = 'float32',
+                                 fs: fsspec.AbstractFileSystem | None = None) -> NumpyVectorStore:
+        """Convert from LlamaIndex's default JSON-persisted `SimpleVectorStore`, without re-embedding."""
+        node_ids: list[str] = list(simple_vector_store.data.embedding_dict)
+
+        embeddings: np.ndarray = np.asarray([simple_vector_store.data.embedding_dict[node_id] for node_id in node_ids],
+                                            dtype=np.float32).reshape(len(node_ids), -1)
+        embeddings /= np.maximum(np.linalg.norm(embeddings, axis=1, keepdims=True), np.finfo(np.float32).tiny)
+
+        return cls(dtype=dtype, embeddings=embeddings.astype(dtype), node_ids=np.asarray(node_ids, dtype=str),
+                   ref_doc_ids=np.asarray([simple_vector_store.data.text_id_to_ref_doc_id.get(node_id, 'None')
+                                           for node_id in node_ids], dtype=str),
+                   fs=fs)
@@ -0,0 +1,164 @@
+"""
+=============================
+INFORMATIONAL RESOURCE ROUTER
+=============================
+
+`BaseResourceRouter` is `OpenSSA`'s abstract base class for selecting,
+among available informational resources, the top-k most relevant ones for a given question/problem/task,
+judging from the resources' overviews, so that sub-tasks do not need to query every resource.
+
+`EmbeddingResourceRouter` scores resources by embedding similarity between asks and resource overviews,
+while `LMResourceRouter` scores resources by a cheap LM call.
+
+Routing scores are cached per (ask, resource) pair.
+If resources cannot be scored (e.g., LM responses stay invalid within retry budget), all of them are kept.
+"""
+
+
+from __future__ import annotations
+
+from abc import ABC, abstractmethod
+from dataclasses import dataclass, field
+import json
+from threading import Lock
+from typing import Any, TYPE_CHECKING
+
+from llama_index.core.base.embeddings.base import BaseEmbedding as LlamaIndexEmbedModel, similarity
+from loguru import logger
+
+from openssa.core.util.lm.openai import default_llama_index_openai_embed_model, default_small_openai_lm
+from openssa.core.util.retry import RetryPolicy
+
+from ._prompts import RESOURCE_ROUTING_PROMPT_TEMPLATE
+
+if TYPE_CHECKING:
+    from openssa.core.util.lm.base import BaseLM
+    from .base import BaseResource
+
+
+@dataclass
+class BaseResourceRouter(ABC):
+    """Resource Router abstract base class."""
+
+    # number of most relevant Resources to select for each ask
+    top_k: int = 2
+
+    def __post_init__(self):
+        """Initialize routing score cache."""
+        self._scores: dict[tuple[str, str], float] = {}
+        self._lock: Lock = Lock()
+
+    @abstractmethod
+    def score(self, ask: str, resources: list[BaseResource]) -> list[float] | None:
+        """Score relevance of Resources for ask (None: Resources cannot be scored)."""
+
+    def route(self, ask: str, resources: set[BaseResource]) -> set[BaseResource]:
+        """Select top-k most relevant Resources for ask."""
+        if len(resources) <= self.top_k:
+            return resources
+
+        with self._lock:
+            unscored_resources: list[BaseResource] = [r for r in resources if (ask, r.unique_name) not in self._scores]
+
+        if unscored_resources:
+            if (scores := self.score(ask=ask, resources=unscored_resources)) is None:
+                logger.warning(f'COULD NOT ROUTE "{ask}", KEEPING ALL {len(resources)} RESOURCES')
+                return resources
+
+            with self._lock:
+                self._scores.update({(ask, r.unique_name): score for r, score in zip(unscored_resources, scores)})
+
+        selected_resources: set[BaseResource] = set(
+            sorted(resources, key=lambda r: (-self._scores[(ask, r.unique_name)], r.unique_name))[:self.top_k])
+
+        logger.debug(f'ROUTED "{ask}" to {[r.unique_name for r in selected_resources]}')
+
+        return selected_resources
+
+
+@dataclass
+class EmbeddingResourceRouter(BaseResourceRouter):
+    """Resource Router scoring Resources by embedding similarity between asks & Resource overviews."""
+
+    # embedding model for embedding asks & Resource overviews
+    embed_model: LlamaIndexEmbedModel = field(default_factory=default_llama_index_openai_embed_model,
+                                              init=True,
+                                              repr=False,
+                                              hash=None,
+                                              compare=True,
+                                              metadata=None,
+                                              kw_only=False)
+
+    def __post_init__(self):
+        """Initialize routing score cache & Resource overview embedding cache."""
+        super().__post_init__()
+        self._overview_embeddings: dict[str, list[float]] = {}
+
+    def score(self, ask: str, resources: list[BaseResource]) -> list[float]:
+        """Score relevance of Resources for ask by embedding similarity between ask & Resource overviews."""
+        if unembedded_resources := [r for r in resources if r.unique_name not in self._overview_embeddings]:
+            self._overview_embeddings.update(
+                zip((r.unique_name for r in unembedded_resources),
+                    self.embed_model.get_text_embedding_batch([r.overview for r in unembedded_resources])))
+
+        ask_embedding: list[float] = self.embed_model.get_query_embedding(ask)
+
+        return [similarity(ask_embedding, self._overview_embeddings[r.unique_name]) for r in resources]
+
+
+@dataclass
+class LMResourceRouter(BaseResourceRouter):
+    """Resource Router scoring Resources by a cheap LM call."""
+
+    # (preferably small) language model for scoring Resources
+    lm: BaseLM = field(default_factory=default_small_openai_lm,
+                       init=True,
+                       repr=True,
+                       hash=None,
+                       compare=True,
+                       metadata=None,
+                       kw_only=False)
+
+    # policy for retrying scoring until LM response is JSON dictionary of scores
+    retry_policy: RetryPolicy = field(default_factory=RetryPolicy,
+                                      init=True,
+                                      repr=False,
+                                      hash=None,
+                                      compare=False,
+                                      metadata=None,
+                                      kw_only=False)
+
+    def score(self, ask: str, resources: list[BaseResource]) -> list[float] | None:
+        """Score relevance of Resources for ask by a single LM call (retried as per retry policy if invalid)."""
+        def as_float(score: Any) -> float:
+            try:
+                return float(score)
+            except (TypeError, ValueError):
+                return 0.
+
+        def validate(response: str | dict[str, Any]) -> list[float]:
+            # note: invalid JSON raises `json.JSONDecodeError`, which is a `ValueError` to retry upon
+            scores: Any = json.loads(response) if isinstance(response, str) else response
+
+            if not isinstance(scores, dict):
+                raise ValueError('response must be JSON dictionary mapping resource unique names to scores')
+
+            return [as_float(scores.get(resource.unique_name)) for resource in resources]
+
+        unique_names: list[str] = [resource.unique_name for resource in resources]
+
+        return self.retry_policy.get_valid_lm_response(
+            lm=self.lm,
+            prompt=RESOURCE_ROUTING_PROMPT_TEMPLATE.format(
+                question=ask,
+                resource_overviews={resource.unique_name: resource.overview for resource in resources}),
+            parse=validate, name='RESOURCE ROUTING',
+            fallback=lambda _: None,
+            **({'response_format': response_format}
+               if (response_format := self.lm.json_schema_response_format(
+                   schema={'type': 'object',
+                           'properties': {unique_name: {'type': 'number'} for unique_name in unique_names},
+                           'required': unique_names,
+                           'additionalProperties': False},
+                   name='resource_scores'))
+               else {}))
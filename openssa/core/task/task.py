@@ -10,7 +10,7 @@ what is asked, what informational resources are available, the nature, the statu
 
 from __future__ import annotations
 
-from dataclasses import dataclass, asdict, field
+from dataclasses import dataclass, asdict, field, replace
 from typing import TYPE_CHECKING, TypedDict, Required, NotRequired
 
 from openssa.core.resource._global import GLOBAL_RESOURCES
@@ -57,8 +57,9 @@ class Task:
         return task
 
     def to_json_dict(self) -> dict:
-        d: TaskDict = asdict(self)
-        d['resources']: list[BaseResource] = list(d['resources'])
+        """Return JSON-serializable dictionary representation, with Resources referred to by unique names."""
+        d: dict = asdict(replace(self, resources=set()))
+        d['resources']: list[str] = sorted(resource.unique_name for resource in self.resources)
         return d
 
     @classmethod
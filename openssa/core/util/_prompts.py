@@ -0,0 +1,9 @@
+INVALID_RESPONSE_REPROMPT_TEMPLATE: str = \
+"""YOUR PREVIOUS RESPONSE IS INVALID:
+
+```
+{error}
+```
+
+Please respond to the previous request again, STRICTLY FOLLOWING ITS REQUIRED FORMAT.
+"""  # noqa: E122
@@ -2,12 +2,21 @@
 =============================
 LANGUAGE MODEL (LM) INTERFACE
 =============================
+
+LMs can be called synchronously (`call` / `get_response`) or asynchronously (`acall` / `aget_response`),
+the latter natively on async clients where LMs override them, or else by running the former in worker threads.
+
+(note: Reasoners, Programmers & Program Stores call LMs synchronously, running concurrent work on threads;
+async methods serve applications that call LMs from their own event loops)
 """
 
 
 from abc import ABC, abstractmethod
+import asyncio
+from collections.abc import Iterator, Sequence
 from dataclasses import dataclass, field
-from typing import Self as SameType
+import json
+from typing import Any, Self as SameType
 
 from openai.types.chat.chat_completion_message_param import ChatCompletionMessageParam
 # - github.com/openai/openai-python/blob/main/src/openai/types/chat/chat_completion_system_message_param.py
@@ -16,8 +25,16 @@ from openai.types.chat.chat_completion_message_param import ChatCompletionMessag
 # - github.com/openai/openai-python/blob/main/src/openai/types/chat/chat_completion_tool_message_param.py
 # - github.com/openai/openai-python/blob/main/src/openai/types/chat/chat_completion_function_message_param.py
 
+from openssa.core.util.retry import RetryAttempt, RetryPolicy
+from openssa.core.util.tracing import SpanKind, traced
+
+from .history import ChatHistory
+from .rate_limit import RateLimiter, shared_rate_limiter
+
 
-type LMChatHist = list[ChatCompletionMessageParam]
+# chat histories are read-only sequences of messages,
+# e.g., lists or immutable `ChatHistory`s sharing prefix histories (such as Knowledge injections) among calls
+type LMChatHist = Sequence[ChatCompletionMessageParam]
 
 
 @dataclass
@@ -34,15 +51,101 @@ class BaseLM(ABC):
                          metadata=None,
                          kw_only=False)
 
+    # policy for retrying until responses are valid (e.g., parseable JSON)
+    retry_policy: RetryPolicy = field(default_factory=RetryPolicy,
+                                      init=True,
+                                      repr=False,
+                                      hash=None,
+                                      compare=False,
+                                      metadata=None,
+                                      kw_only=True)
+
+    @property
+    def rate_limiter(self) -> RateLimiter:
+        """Rate limiter shared among LMs with same API base & model."""
+        return shared_rate_limiter(api_base=self.api_base, model=self.model)
+
     @classmethod
     @abstractmethod
     def from_defaults(cls) -> SameType:
         """Get LM instance with default parameters."""
 
     @abstractmethod
-    def call(self, messages: list[ChatCompletionMessageParam], **kwargs):
+    def call(self, messages: LMChatHist, **kwargs):
         """Call LM API and return response object."""
 
     @abstractmethod
     def get_response(self, prompt: str, history: LMChatHist | None = None, json_format: bool = False, **kwargs) -> str:
         """Call LM API and return response content."""
+
+    def stream_response(self, prompt: str, history: LMChatHist | None = None, **kwargs) -> Iterator[str]:
+        """Call LM API and yield response content incrementally.
+
+        (default: yield whole response content at once; to override with LM service's streaming capability)
+        """
+        yield self.get_response(prompt, history=history, **kwargs)
+
+    def json_schema_response_format(self, schema: dict[str, Any], name: str) -> dict[str, Any] | None:
+        # pylint: disable=unused-argument
+        """Return `response_format` argument constraining responses to given JSON Schema.
+
+        (default: None, i.e., LM service does not support schema-constrained responses)
+        """
+        return None
+
+    async def acall(self, messages: LMChatHist, **kwargs):
+        """Asynchronously call LM API and return response object.
+
+        (default: run blocking `.call(...)` in worker thread; to override with native async client)
+        """
+        return await asyncio.to_thread(self.call, messages, **kwargs)
+
+    async def aget_response(self, prompt: str, history: LMChatHist | None = None, json_format: bool = False,
+                            **kwargs) -> str:
+        """Asynchronously call LM API and return response content.
+
+        (default: run blocking `.get_response(...)` in worker thread; to override with native async client)
+        """
+        return await asyncio.to_thread(self.get_response, prompt, history, json_format, **kwargs)
+
+    def _get_json_response(self, messages: LMChatHist, **kwargs) -> Any:
+        """Call LM API until response content is valid JSON, retrying as per retry policy."""
+        messages: ChatHistory = ChatHistory.of(messages)
+
+        def attempt_json_response(attempt: RetryAttempt) -> Any:
+            if attempt.lm is not self:  # escalated to fallback LM
+                return attempt.lm.get_response(prompt=messages[-1]['content'], history=messages.but_last(),
+                                               json_format=True,
+                                               **{k: v for k, v in kwargs.items() if k != 'response_format'})
+
+            attempt.previous_output = self.call(self.retry_policy.reprompt_messages(messages, attempt),
+                                                **kwargs).choices[0].message.content
+            return json.loads(attempt.previous_output)
+
+        return self.retry_policy.retry(attempt_json_response, name=f'{type(self).__name__} JSON RESPONSE', lm=self)
+
+    async def _aget_json_response(self, messages: LMChatHist, **kwargs) -> Any:
+        """Asynchronously call LM API until response content is valid JSON, retrying as per retry policy."""
+        messages: ChatHistory = ChatHistory.of(messages)
+
+        async def attempt_json_response(attempt: RetryAttempt) -> Any:
+            if attempt.lm is not self:  # escalated to fallback LM
+                return await attempt.lm.aget_response(prompt=messages[-1]['content'], history=messages.but_last(),
+                                                      json_format=True,
+                                                      **{k: v for k, v in kwargs.items() if k != 'response_format'})
+
+            attempt.previous_output = (await self.acall(self.retry_policy.reprompt_messages(messages, attempt),
+                                                        **kwargs)).choices[0].message.content
+            return json.loads(attempt.previous_output)
+
+        return await self.retry_policy.aretry(attempt_json_response, name=f'{type(self).__name__} JSON RESPONSE',
+                                              lm=self)
+
+
+def lm_call_span_attributes(lm: BaseLM, messages: LMChatHist, **kwargs) -> dict[str, Any]:
+    """Return tracing span attributes of LM API call."""
+    return {'model': lm.model, 'api_base': lm.api_base, 'n_messages': len(messages), 'stream': bool(kwargs.get('stream'))}
+
+
+# decorator tracing LM API calls
+traced_lm_call = traced('lm.call', SpanKind.LM, attributes=lm_call_span_attributes)
@@ -0,0 +1,285 @@
+"""
+====================================
+LANGUAGE MODEL (LM) RESPONSE CACHING
+====================================
+
+`LMResponseCache` is a content-addressed cache of LM responses,
+keyed on a hash of model, messages, seed, temperature, response format & other call parameters.
+It has an in-memory least-recently-used (LRU) tier and an optional on-disk SQLite tier,
+both subject to time-to-live (TTL) and size-based eviction.
+
+`CachedLM` wraps any `BaseLM` so that repeated deterministic requests are served from such a cache
+(with cache hits & misses recorded on tracing spans, if tracing is enabled).
+"""
+
+
+from __future__ import annotations
+
+from collections import OrderedDict
+from collections.abc import Iterator
+from dataclasses import dataclass, field
+from hashlib import sha256
+import json
+from pathlib import Path
+import sqlite3
+from threading import RLock
+import time
+from typing import Any, TYPE_CHECKING
+
+from openssa.core.util.tracing import SpanKind, set_span_attributes, traced
+
+from .base import BaseLM
+from .config import LMConfig
+from .openai import OpenAILM
+
+if TYPE_CHECKING:
+    from .base import LMChatHist
+
+
+_SQLITE_SCHEMA: str = """
+CREATE TABLE IF NOT EXISTS lm_responses (
+    key TEXT PRIMARY KEY,
+    response TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    accessed_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS lm_responses_accessed_at ON lm_responses (accessed_at);
+"""
+
+
+@dataclass
+class LMResponseCache:  # pylint: disable=too-many-instance-attributes
+    """Content-addressed LM response cache with in-memory LRU tier & optional on-disk SQLite tier."""
+
+    # path to SQLite database file for on-disk tier
+    # (default: None, i.e., in-memory tier only)
+    path: Path | str | None = None
+
+    # maximum number of entries kept in in-memory LRU tier
+    max_memory_entries: int = 1024
+
+    # maximum number of entries kept in on-disk tier, least recently used ones being evicted first
+    # (None: unlimited)
+    max_disk_entries: int | None = 100_000
+
+    # time-to-live of entries, in seconds
+    # (None: entries never expire)
+    ttl: float | None = None
+
+    def __post_init__(self):
+        """Set up in-memory tier and, if applicable, on-disk tier."""
+        self._lock: RLock = RLock()
+        self._memory: OrderedDict[str, tuple[float, str]] = OrderedDict()
+
+        self.hits: int = 0
+        self.misses: int = 0
+
+        if self.path:
+            Path(self.path).parent.mkdir(parents=True, exist_ok=True)
+            self._db: sqlite3.Connection | None = sqlite3.connect(database=str(self.path), check_same_thread=False)
+            self._db.execute('PRAGMA journal_mode=WAL')  # allow concurrent readers across processes
+            self._db.executescript(_SQLITE_SCHEMA)
+
+        else:
+            self._db: sqlite3.Connection | None = None
+
+    @staticmethod
+    def key(**params: Any) -> str:
+        """Return content-addressed cache key for LM request parameters."""
+        return sha256(json.dumps(params, sort_keys=True, ensure_ascii=False, default=str).encode()).hexdigest()
+
+    def _expired(self, created_at: float) -> bool:
+        return (self.ttl is not None) and (time.time() - created_at > self.ttl)
+
+    def get(self, key: str) -> str | None:
+        """Return cached response, or None if absent or expired."""
+        with self._lock:
+            if (entry := self._memory.get(key)) is not None:
+                created_at, response = entry
+
+                if not self._expired(created_at):
+                    self._memory.move_to_end(key)
+                    self.hits += 1
+                    return response
+
+                del self._memory[key]
+
+            if self._db is not None:
+                row: tuple[str, float] | None = self._db.execute(
+                    'SELECT response, created_at FROM lm_responses WHERE key = ?', (key,)).fetchone()
+
+                if row is not None:
+                    response, created_at = row
+
+                    if not self._expired(created_at):
+                        with self._db:
+                            self._db.execute('UPDATE lm_responses SET accessed_at = ? WHERE key = ?', (time.time(), key))
+                        self._set_in_memory(key, created_at, response)
+                        self.hits += 1
+                        return response
+
+                    with self._db:
+                        self._db.execute('DELETE FROM lm_responses WHERE key = ?', (key,))
+
+            self.misses += 1
+            return None
+
+    def set(self, key: str, response: str):
+        """Cache response."""
+        with self._lock:
+            self._set_in_memory(key, created_at := time.time(), response)
+
+            if self._db is not None:
+                with self._db:
+                    self._db.execute('INSERT OR REPLACE INTO lm_responses VALUES (?, ?, ?, ?)',
+                                     (key, response, created_at, created_at))
+
+                    if self.max_disk_entries is not None:
+                        self._db.execute('DELETE FROM lm_responses WHERE key IN '
+                                         '(SELECT key FROM lm_responses ORDER BY accessed_at DESC LIMIT -1 OFFSET ?)',
+                                         (self.max_disk_entries,))
+
+    def _set_in_memory(self, key: str, created_at: float, response: str):
+        self._memory[key]: tuple[float, str] = created_at, response
+        self._memory.move_to_end(key)
+
+        while len(self._memory) > self.max_memory_entries:
+            self._memory.popitem(last=False)
+
+    def evict_expired(self):
+        """Evict expired entries from all tiers."""
+        if self.ttl is None:
+            return
+
+        with self._lock:
+            for key in [key for key, (created_at, _) in self._memory.items() if self._expired(created_at)]:
+                del self._memory[key]
+
+            if self._db is not None:
+                with self._db:
+                    self._db.execute('DELETE FROM lm_responses WHERE created_at < ?', (time.time() - self.ttl,))
+
+    def clear(self):
+        """Clear all tiers."""
+        with self._lock:
+            self._memory.clear()
+
+            if self._db is not None:
+                with self._db:
+                    self._db.execute('DELETE FROM lm_responses')
+
+
+@dataclass
+class CachedLM(BaseLM):
+    """LM wrapper serving repeated deterministic requests from response cache."""
+
+    # model, API base & API key are those of the wrapped LM
+    model: str = field(default='', init=False)
+    api_base: str = field(default='', init=False)
+    api_key: str = field(default='', init=False, repr=False)
+
+    # wrapped LM
+    lm: BaseLM = field(default_factory=OpenAILM.from_defaults,
+                       init=True,
+                       repr=True,
+                       hash=None,
+                       compare=True,
+                       metadata=None,
+                       kw_only=False)
+
+    # response cache
+    # (default: in-memory tier only)
+    cache: LMResponseCache = field(default_factory=LMResponseCache,
+                                   init=True,
+                                   repr=False,
+                                   hash=None,
+                                   compare=True,
+                                   metadata=None,
+                                   kw_only=False)
+
+    # whether to also cache responses to non-deterministic requests (i.e., with positive temperature or no seed)
+    cache_nondeterministic: bool = False
+
+    def __post_init__(self):
+        """Adopt wrapped LM's model, API base & API key."""
+        self.model: str = self.lm.model
+        self.api_base: str = self.lm.api_base
+        self.api_key: str = self.lm.api_key
+
+    @classmethod
+    def from_defaults(cls) -> CachedLM:
+        """Get cached default OpenAI LM instance, with in-memory cache."""
+        return cls(lm=OpenAILM.from_defaults())
+
+    def call(self, messages: LMChatHist, **kwargs):
+        """Call wrapped LM API and return (uncached) response object."""
+        return self.lm.call(messages, **kwargs)
+
+    async def acall(self, messages: LMChatHist, **kwargs):
+        """Asynchronously call wrapped LM API and return (uncached) response object."""
+        return await self.lm.acall(messages, **kwargs)
+
+    def json_schema_response_format(self, schema: dict[str, Any], name: str) -> dict[str, Any] | None:
+        """Return wrapped LM's `response_format` argument constraining responses to given JSON Schema."""
+        return self.lm.json_schema_response_format(schema=schema, name=name)
+
+    def _cache_key(self, prompt: str, history: LMChatHist | None, json_format: bool, kwargs: dict) -> str | None:
+        params: dict[str, Any] = {'seed': LMConfig.DEFAULT_SEED, 'temperature': LMConfig.DEFAULT_TEMPERATURE} | kwargs
+
+        if not (self.cache_nondeterministic or ((params['seed'] is not None) and (params['temperature'] == 0))):
+            return None
+
+        return self.cache.key(model=self.model, api_base=self.api_base,
+                              messages=[*(history or []), {'role': 'user', 'content': prompt}],
+                              json_format=json_format, **params)
+
+    @traced('lm.cached_response', SpanKind.LM, attributes=lambda self, *args, **kwargs: {'model': self.model})
+    def get_response(self, prompt: str, history: LMChatHist | None = None, json_format: bool = False, **kwargs) -> str:
+        """Return cached response content if available, otherwise call wrapped LM API and cache response content."""
+        if (key := self._cache_key(prompt, history, json_format, kwargs)) and (cached := self.cache.get(key)) is not None:
+            set_span_attributes(cache_hit=True)
+            return json.loads(cached) if json_format else cached
+
+        set_span_attributes(cache_hit=False if key else None)
+
+        response = self.lm.get_response(prompt, history=history, json_format=json_format, **kwargs)
+
+        if key:
+            self.cache.set(key, json.dumps(response) if json_format else response)
+
+        return response
+
+    def stream_response(self, prompt: str, history: LMChatHist | None = None, **kwargs) -> Iterator[str]:
+        """Yield cached response content if available,
+        otherwise stream response content from wrapped LM API and cache it once complete.
+        """
+        if (key := self._cache_key(prompt, history, False, kwargs)) and (cached := self.cache.get(key)) is not None:
+            yield cached
+            return
+
+        chunks: list[str] = []
+        for chunk in self.lm.stream_response(prompt, history=history, **kwargs):
+            chunks.append(chunk)
+            yield chunk
+
+        if key:
+            self.cache.set(key, ''.join(chunks))
+
+    @traced('lm.cached_response', SpanKind.LM, attributes=lambda self, *args, **kwargs: {'model': self.model})
+    async def aget_response(self, prompt: str, history: LMChatHist | None = None, json_format: bool = False,
+                            **kwargs) -> str:
+        """Asynchronously return cached response content if available,
+        otherwise call wrapped LM API and cache response content.
+        """
+        if (key := self._cache_key(prompt, history, json_format, kwargs)) and (cached := self.cache.get(key)) is not None:
+            set_span_attributes(cache_hit=True)
+            return json.loads(cached) if json_format else cached
+
+        set_span_attributes(cache_hit=False if key else None)
+
+        response = await self.lm.aget_response(prompt, history=history, json_format=json_format, **kwargs)
+
+        if key:
+            self.cache.set(key, json.dumps(response) if json_format else response)
+
+        return response
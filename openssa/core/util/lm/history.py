@@ -0,0 +1,101 @@
+"""
+======================
+IMMUTABLE CHAT HISTORY
+======================
+
+`ChatHistory` is an immutable sequence of LM chat messages
+made of a shared (persistent) prefix history plus its own suffix of messages,
+so that extending a history (e.g., Knowledge-injection messages shared by many calls & retries)
+with per-call messages neither copies nor mutates the prefix,
+and the same history can safely be shared among concurrent calls.
+
+Messages themselves are shared by reference, and are to be treated as read-only.
+"""
+
+
+from __future__ import annotations
+
+from collections.abc import Iterable, Iterator, Sequence
+from itertools import chain, islice
+from typing import TYPE_CHECKING, overload
+
+if TYPE_CHECKING:
+    from openai.types.chat.chat_completion_message_param import ChatCompletionMessageParam
+
+
+class ChatHistory(Sequence['ChatCompletionMessageParam']):
+    """Immutable chat history sharing its prefix history structurally."""
+
+    __slots__ = '_prefix', '_messages', '_len'
+
+    def __init__(self, messages: Iterable[ChatCompletionMessageParam] = (), prefix: ChatHistory | None = None):
+        """Create chat history of given messages following prefix history (if any)."""
+        self._prefix: ChatHistory | None = prefix or None
+        self._messages: tuple[ChatCompletionMessageParam, ...] = tuple(messages)
+        self._len: int = len(self._prefix or ()) + len(self._messages)
+
+    @classmethod
+    def of(cls, history: Iterable[ChatCompletionMessageParam] | None = None) -> ChatHistory:
+        """Return given history as `ChatHistory`, without copying if it already is one."""
+        return history if isinstance(history, ChatHistory) else cls(history or ())
+
+    def extended(self, *messages: ChatCompletionMessageParam) -> ChatHistory:
+        """Return new history of this history followed by given messages, sharing this history as prefix."""
+        return ChatHistory(messages, prefix=self) if messages else self
+
+    def _segments(self) -> list[tuple[ChatCompletionMessageParam, ...]]:
+        segments: list[tuple[ChatCompletionMessageParam, ...]] = []
+
+        history: ChatHistory | None = self
+        while history is not None:
+            segments.append(history._messages)  # pylint: disable=protected-access
+            history: ChatHistory | None = history._prefix  # pylint: disable=protected-access
+
+        return segments[::-1]
+
+    def __iter__(self) -> Iterator[ChatCompletionMessageParam]:
+        return chain.from_iterable(self._segments())
+
+    def __len__(self) -> int:
+        return self._len
+
+    @overload
+    def __getitem__(self, index: int) -> ChatCompletionMessageParam: ...
+
+    @overload
+    def __getitem__(self, index: slice) -> list[ChatCompletionMessageParam]: ...
+
+    def __getitem__(self, index: int | slice) -> ChatCompletionMessageParam | list[ChatCompletionMessageParam]:
+        if isinstance(index, slice):
+            return list(self)[index]
+
+        if not -self._len <= index < self._len:
+            raise IndexError('chat history index out of range')
+
+        # walk back from own messages, as recent messages are accessed most often
+        index: int = index % self._len
+        history: ChatHistory = self
+        while index < (prefix_len := history._len - len(history._messages)):  # pylint: disable=protected-access
+            history: ChatHistory = history._prefix  # pylint: disable=protected-access
+
+        return history._messages[index - prefix_len]  # pylint: disable=protected-access
+
+    def but_last(self) -> ChatHistory:
+        """Return history of all messages but the last one, sharing prefix history where possible."""
+        if not self._len:
+            raise IndexError('chat history is empty')
+
+        if not self._messages:
+            return self._prefix.but_last()
+
+        return ChatHistory(self._messages[:-1], prefix=self._prefix)
+
+    def __eq__(self, other: object) -> bool:
+        if isinstance(other, ChatHistory | list | tuple):
+            return (len(self) == len(other)) and all(a == b for a, b in zip(self, other))
+        return NotImplemented
+
+    __hash__ = None
+
+    def __repr__(self) -> str:
+        return f'{type(self).__name__}({list(islice(self, 3))}{"..." if self._len > 3 else ""}, n_messages={self._len})'
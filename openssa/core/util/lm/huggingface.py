@@ -7,21 +7,49 @@ HUGGINGFACE LANGUAGE MODELS (LMs)
 
 from __future__ import annotations
 
+import asyncio
+from collections.abc import Iterator
 from dataclasses import dataclass, field
-import json
-from typing import TYPE_CHECKING
+from functools import partial
+from typing import Any, TYPE_CHECKING
+from weakref import WeakKeyDictionary
 
-from loguru import logger
 from huggingface_hub.inference._client import InferenceClient
+from huggingface_hub.inference._generated._async_client import AsyncInferenceClient
+from huggingface_hub.inference._generated.types.chat_completion import ChatCompletionInputGrammarType
 
-from .base import BaseLM
+from .base import BaseLM, traced_lm_call
 from .config import LMConfig
+from .history import ChatHistory
+from .rate_limit import estimate_tokens
 
 if TYPE_CHECKING:
     from openai.types.chat.chat_completion import ChatCompletion
     from .base import LMChatHist
 
 
+# whether installed HuggingFace client uses Text Generation Inference (TGI)'s grammar format `{type, value}`
+# rather than OpenAI-compatible `{type: "json_schema", json_schema}` format for constraining responses
+_TGI_GRAMMAR_FORMAT: bool = 'value' in getattr(ChatCompletionInputGrammarType, '__dataclass_fields__', {})
+
+
+# async clients (and their connection pools) are bound to the event loop they are used in
+_ASYNC_CLIENTS: WeakKeyDictionary[asyncio.AbstractEventLoop,
+                                  dict[tuple[str, str], AsyncInferenceClient]] = WeakKeyDictionary()
+
+
+def shared_async_client(model: str, token: str) -> AsyncInferenceClient:
+    """Get async HuggingFace client for running event loop,
+    sharing connection pool among LMs with same model & token.
+    """
+    clients: dict[tuple[str, str], AsyncInferenceClient] = _ASYNC_CLIENTS.setdefault(asyncio.get_running_loop(), {})
+
+    if (key := (model, token)) not in clients:
+        clients[key]: AsyncInferenceClient = AsyncInferenceClient(model=model, token=token)
+
+    return clients[key]
+
+
 @dataclass
 class HuggingFaceLM(BaseLM):
     """HuggingFace LM."""
@@ -32,33 +60,77 @@ class HuggingFaceLM(BaseLM):
         """Initialize HuggingFace client."""
         self.client: InferenceClient = InferenceClient(model=self.model, token=self.api_key)
 
+    @property
+    def aclient(self) -> AsyncInferenceClient:
+        """Async HuggingFace client for running event loop."""
+        return shared_async_client(model=self.model, token=self.api_key)
+
     @classmethod
     def from_defaults(cls) -> HuggingFaceLM:
         """Get HuggingFace LM instance with default parameters."""
         # pylint: disable=unexpected-keyword-arg
         return cls(model=LMConfig.HF_DEFAULT_MODEL, api_key=LMConfig.HF_API_KEY, api_base=LMConfig.HF_API_URL)
 
+    def json_schema_response_format(self, schema: dict[str, Any], name: str) -> dict[str, Any]:
+        """Return `response_format` argument for grammar-constrained generation adhering to given JSON Schema."""
+        # huggingface.co/docs/text-generation-inference/en/guidance
+        if _TGI_GRAMMAR_FORMAT:
+            return {'type': 'json', 'value': schema}
+
+        return {'type': 'json_schema', 'json_schema': {'name': name, 'schema': schema}}
+
+    @traced_lm_call
     def call(self, messages: LMChatHist, **kwargs) -> ChatCompletion:
-        """Call HuggingFace LM API and return response object."""
-        return self.client.chat_completion(messages=messages,
-                                           model=self.model,
-                                           max_tokens=1500,  # TODO: identify optimal default
-                                           seed=kwargs.pop('seed', LMConfig.DEFAULT_SEED),
-                                           temperature=kwargs.pop('temperature', LMConfig.DEFAULT_TEMPERATURE),
-                                           **kwargs)
+        """Call HuggingFace LM API (within rate limits) and return response object."""
+        return self.rate_limiter.call(
+            partial(self.client.chat_completion,
+                    messages=list(messages),  # note: payloads are JSON-serialized
+                    model=self.model,
+                    max_tokens=(max_tokens := 1500),  # TODO: identify optimal default
+                    seed=kwargs.pop('seed', LMConfig.DEFAULT_SEED),
+                    temperature=kwargs.pop('temperature', LMConfig.DEFAULT_TEMPERATURE),
+                    **kwargs),
+            n_tokens=estimate_tokens(messages, max_tokens=max_tokens))
 
     def get_response(self, prompt: str, history: LMChatHist | None = None, json_format: bool = False, **kwargs) -> str:
         """Call HuggingFace LM API and return response content."""
-        messages: LMChatHist = history or []
-        messages.append({'role': 'user', 'content': prompt})
+        messages: ChatHistory = ChatHistory.of(history).extended({'role': 'user', 'content': prompt})
 
         if json_format:
-            # kwargs['response_format'] = {'type': 'json'}  # TODO: pass in JSON Schema
-
-            while True:
-                try:
-                    return json.loads(response := self.call(messages, **kwargs).choices[0].message.content)
-                except json.decoder.JSONDecodeError:
-                    logger.debug(f'INVALID JSON, TO BE RETRIED:\n{response}')  # pylint: disable=used-before-assignment
+            # note: responses are grammar-constrained only if `response_format` is passed in
+            # (see `.json_schema_response_format(...)`)
+            return self._get_json_response(messages, **kwargs)
 
         return self.call(messages, **kwargs).choices[0].message.content
+
+    def stream_response(self, prompt: str, history: LMChatHist | None = None, **kwargs) -> Iterator[str]:
+        """Call HuggingFace LM API with streaming and yield response content incrementally."""
+        for chunk in self.call(ChatHistory.of(history).extended({'role': 'user', 'content': prompt}), stream=True,
+                               **kwargs):
+            if chunk.choices and (content := chunk.choices[0].delta.content):
+                yield content
+
+    @traced_lm_call
+    async def acall(self, messages: LMChatHist, **kwargs) -> ChatCompletion:
+        """Asynchronously call HuggingFace LM API (within rate limits) and return response object."""
+        return await self.rate_limiter.acall(
+            partial(self.aclient.chat_completion,
+                    messages=list(messages),  # note: payloads are JSON-serialized
+                    model=self.model,
+                    max_tokens=(max_tokens := 1500),  # TODO: identify optimal default
+                    seed=kwargs.pop('seed', LMConfig.DEFAULT_SEED),
+                    temperature=kwargs.pop('temperature', LMConfig.DEFAULT_TEMPERATURE),
+                    **kwargs),
+            n_tokens=estimate_tokens(messages, max_tokens=max_tokens))
+
+    async def aget_response(self, prompt: str, history: LMChatHist | None = None, json_format: bool = False,
+                            **kwargs) -> str:
+        """Asynchronously call HuggingFace LM API and return response content."""
+        messages: ChatHistory = ChatHistory.of(history).extended({'role': 'user', 'content': prompt})
+
+        if json_format:
+            # note: responses are grammar-constrained only if `response_format` is passed in
+            # (see `.json_schema_response_format(...)`)
+            return await self._aget_json_response(messages, **kwargs)
+
+        return (await self.acall(messages, **kwargs)).choices[0].message.content
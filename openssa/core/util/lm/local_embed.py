@@ -0,0 +1,140 @@
+"""
+======================
+LOCAL EMBEDDING MODELS
+======================
+
+`LocalEmbedding` is a `LlamaIndex`-compliant embedding model running `sentence-transformers` models locally on CPU,
+either with PyTorch or with ONNX Runtime, so that indexing & querying (e.g., of `FileResource`s)
+need no network round trip, e.g., in air-gapped or latency-sensitive deployments:
+
+- texts are embedded in mini-batches of similar lengths, each padded only to its own longest text (dynamic padding)
+- inference uses the backend's own intra-op thread pool (by default sized to the number of CPU cores),
+  unless `num_threads` is given explicitly: note that for the PyTorch backend,
+  this sets the number of threads process-wide (`torch.set_num_threads`), affecting all other PyTorch work
+- query embeddings are cached, least recently used ones being evicted first
+
+Requires OpenSSA's `local-embed` extra.
+"""
+
+
+from __future__ import annotations
+
+import asyncio
+from collections import OrderedDict
+from threading import Lock
+from typing import Any, Literal
+
+from llama_index.core.base.embeddings.base import BaseEmbedding as LlamaIndexEmbedModel
+from pydantic import Field, PrivateAttr
+
+from .config import LMConfig
+
+
+type LocalEmbeddingBackend = Literal['torch', 'onnx']
+
+
+class LocalEmbedding(LlamaIndexEmbedModel):
+    """Local `sentence-transformers` embedding model, running on CPU."""
+
+    model_name: str = Field(default=LMConfig.LOCAL_EMBED_DEFAULT_MODEL,
+                            description='name of HuggingFace `sentence-transformers` model, or path to local model')
+
+    # note: large, so that texts are sorted by length across many mini-batches for dynamic padding
+    embed_batch_size: int = Field(default=512, gt=0,
+                                  description='number of texts passed to model at once')
+
+    backend: LocalEmbeddingBackend = Field(default='torch',
+                                           description="inference backend: 'torch' (PyTorch) or 'onnx' (ONNX Runtime)")
+
+    encode_batch_size: int = Field(default=32, gt=0,
+                                   description='number of texts per padded mini-batch of model inference')
+
+    # note: for PyTorch backend, set process-wide, hence left to PyTorch's own default unless given explicitly
+    num_threads: int | None = Field(default=None, gt=0,
+                                    description="number of intra-op inference threads (default: backend's own)")
+
+    normalize: bool = Field(default=True,
+                            description='whether to normalize embeddings to unit length')
+
+    max_cached_queries: int = Field(default=1024, ge=0,
+                                    description='maximum number of cached query embeddings')
+
+    _model: Any = PrivateAttr(default=None)
+    _lock: Lock = PrivateAttr(default_factory=Lock)
+    _query_embeddings: OrderedDict[str, list[float]] = PrivateAttr(default_factory=OrderedDict)
+
+    @classmethod
+    def class_name(cls) -> str:
+        return 'LocalEmbedding'
+
+    def _load_model(self) -> Any:
+        """Load `sentence-transformers` model with configured backend & number of threads, if any."""
+        # pylint: disable=import-outside-toplevel
+        # optional dependencies: install OpenSSA with `local-embed` extra
+        from sentence_transformers import SentenceTransformer
+
+        if self.backend == 'onnx':
+            from onnxruntime import SessionOptions
+
+            session_options: SessionOptions = SessionOptions()
+            if self.num_threads:
+                session_options.intra_op_num_threads: int = self.num_threads
+
+            return SentenceTransformer(self.model_name, device='cpu', backend='onnx',
+                                       model_kwargs={'provider': 'CPUExecutionProvider',
+                                                     'session_options': session_options})
+
+        if self.num_threads:
+            import torch
+
+            # process-wide setting, affecting all PyTorch work in process
+            torch.set_num_threads(self.num_threads)
+
+        return SentenceTransformer(self.model_name, device='cpu', backend='torch')
+
+    @property
+    def model(self) -> Any:
+        """Return model, loaded only once even if first requested concurrently."""
+        if self._model is None:
+            with self._lock:
+                if self._model is None:
+                    self._model = self._load_model()
+
+        return self._model
+
+    def _encode(self, texts: list[str]) -> list[list[float]]:
+        # `sentence-transformers` sorts texts by length before splitting them into mini-batches,
+        # and pads each mini-batch only to its longest text
+        return self.model.encode(texts, batch_size=self.encode_batch_size, show_progress_bar=False,
+                                 convert_to_numpy=True, normalize_embeddings=self.normalize).tolist()
+
+    def _get_query_embedding(self, query: str) -> list[float]:
+        with self._lock:
+            if (embedding := self._query_embeddings.get(query)) is not None:
+                self._query_embeddings.move_to_end(query)
+                return embedding
+
+        [embedding] = self._encode([query])
+
+        with self._lock:
+            self._query_embeddings[query]: list[float] = embedding
+            while len(self._query_embeddings) > self.max_cached_queries:
+                self._query_embeddings.popitem(last=False)
+
+        return embedding
+
+    async def _aget_query_embedding(self, query: str) -> list[float]:
+        return await asyncio.to_thread(self._get_query_embedding, query)
+
+    def _get_text_embedding(self, text: str) -> list[float]:
+        [embedding] = self._encode([text])
+        return embedding
+
+    def _get_text_embeddings(self, texts: list[str]) -> list[list[float]]:
+        return self._encode(texts)
+
+    async def _aget_text_embedding(self, text: str) -> list[float]:
+        return await asyncio.to_thread(self._get_text_embedding, text)
+
+    async def _aget_text_embeddings(self, texts: list[str]) -> list[list[float]]:
+        return await asyncio.to_thread(self._get_text_embeddings, texts)
@@ -7,24 +7,53 @@ OPENAI LANGUAGE MODELS (LMs)
 
 from __future__ import annotations
 
+import asyncio
+from collections.abc import Iterator
 from dataclasses import dataclass, field
-import json
+from functools import cache, partial
 from multiprocessing import cpu_count
-from typing import TYPE_CHECKING
+from typing import Any, TYPE_CHECKING
+from weakref import WeakKeyDictionary
 
-from loguru import logger
-from openai import OpenAI  # pylint: disable=import-self
+from openai import AsyncOpenAI, OpenAI  # pylint: disable=import-self
 from llama_index.embeddings.openai.base import OpenAIEmbedding, OpenAIEmbeddingMode, OpenAIEmbeddingModelType
 from llama_index.llms.openai.base import OpenAI as LlamaIndexOpenAILM
 
-from .base import BaseLM
+from .base import BaseLM, traced_lm_call
 from .config import LMConfig
+from .history import ChatHistory
+from .rate_limit import estimate_tokens
 
 if TYPE_CHECKING:
     from openai.types.chat.chat_completion import ChatCompletion
     from .base import LMChatHist
 
 
+# async clients (and their connection pools) are bound to the event loop they are used in
+_ASYNC_CLIENTS: WeakKeyDictionary[asyncio.AbstractEventLoop, dict[tuple[str, str], AsyncOpenAI]] = WeakKeyDictionary()
+
+
+@cache
+def shared_client(api_key: str, base_url: str) -> OpenAI:
+    """Get OpenAI client, sharing connection pool among LMs with same API key & base URL.
+
+    (retries are handled by LMs' rate limiters, which are aware of rate limiting & `Retry-After` headers)
+    """
+    return OpenAI(api_key=api_key, base_url=base_url, max_retries=0)
+
+
+def shared_async_client(api_key: str, base_url: str) -> AsyncOpenAI:
+    """Get async OpenAI client for running event loop,
+    sharing connection pool among LMs with same API key & base URL.
+    """
+    clients: dict[tuple[str, str], AsyncOpenAI] = _ASYNC_CLIENTS.setdefault(asyncio.get_running_loop(), {})
+
+    if (key := (api_key, base_url)) not in clients:
+        clients[key]: AsyncOpenAI = AsyncOpenAI(api_key=api_key, base_url=base_url, max_retries=0)
+
+    return clients[key]
+
+
 @dataclass
 class OpenAILM(BaseLM):
     """OpenAI LM."""
@@ -33,7 +62,12 @@ class OpenAILM(BaseLM):
 
     def __post_init__(self):
         """Initialize OpenAI client."""
-        self.client: OpenAI = OpenAI(api_key=self.api_key, base_url=self.api_base)
+        self.client: OpenAI = shared_client(api_key=self.api_key, base_url=self.api_base)
+
+    @property
+    def aclient(self) -> AsyncOpenAI:
+        """Async OpenAI client for running event loop."""
+        return shared_async_client(api_key=self.api_key, base_url=self.api_base)
 
     @classmethod
     def from_defaults(cls) -> OpenAILM:
@@ -41,30 +75,68 @@ class OpenAILM(BaseLM):
         # pylint: disable=unexpected-keyword-arg
         return cls(model=LMConfig.OPENAI_DEFAULT_MODEL, api_key=LMConfig.OPENAI_API_KEY, api_base=LMConfig.OPENAI_API_URL)
 
+    def json_schema_response_format(self, schema: dict[str, Any], name: str) -> dict[str, Any]:
+        """Return `response_format` argument for Structured Outputs strictly adhering to given JSON Schema."""
+        # platform.openai.com/docs/guides/structured-outputs
+        return {'type': 'json_schema', 'json_schema': {'name': name, 'schema': schema, 'strict': True}}
+
+    @traced_lm_call
     def call(self, messages: LMChatHist, **kwargs) -> ChatCompletion:
-        """Call OpenAI LM API and return response object."""
-        return self.client.chat.completions.create(messages=messages,
-                                                   model=self.model,
-                                                   seed=kwargs.pop('seed', LMConfig.DEFAULT_SEED),
-                                                   temperature=kwargs.pop('temperature', LMConfig.DEFAULT_TEMPERATURE),
-                                                   **kwargs)
+        """Call OpenAI LM API (within rate limits) and return response object."""
+        return self.rate_limiter.call(
+            partial(self.client.chat.completions.create,
+                    messages=messages,
+                    model=self.model,
+                    seed=kwargs.pop('seed', LMConfig.DEFAULT_SEED),
+                    temperature=kwargs.pop('temperature', LMConfig.DEFAULT_TEMPERATURE),
+                    **kwargs),
+            n_tokens=estimate_tokens(messages, max_tokens=kwargs.get('max_tokens') or kwargs.get('max_completion_tokens')))
 
     def get_response(self, prompt: str, history: LMChatHist | None = None, json_format: bool = False, **kwargs) -> str:
         """Call OpenAI LM API and return response content."""
-        messages: LMChatHist = history or []
-        messages.append({'role': 'user', 'content': prompt})
+        messages: ChatHistory = ChatHistory.of(history).extended({'role': 'user', 'content': prompt})
 
         if json_format:
-            kwargs['response_format'] = {'type': 'json_object'}
-
-            while True:
-                try:
-                    return json.loads(response := self.call(messages, **kwargs).choices[0].message.content)
-                except json.decoder.JSONDecodeError:
-                    logger.debug(f'INVALID JSON, TO BE RETRIED:\n{response}')  # pylint: disable=used-before-assignment
+            kwargs.setdefault('response_format', {'type': 'json_object'})
+            return self._get_json_response(messages, **kwargs)
 
         return self.call(messages, **kwargs).choices[0].message.content
 
+    def stream_response(self, prompt: str, history: LMChatHist | None = None, **kwargs) -> Iterator[str]:
+        """Call OpenAI LM API with streaming and yield response content incrementally."""
+        for chunk in self.call(ChatHistory.of(history).extended({'role': 'user', 'content': prompt}), stream=True,
+                               **kwargs):
+            if chunk.choices and (content := chunk.choices[0].delta.content):
+                yield content
+
+    @traced_lm_call
+    async def acall(self, messages: LMChatHist, **kwargs) -> ChatCompletion:
+        """Asynchronously call OpenAI LM API (within rate limits) and return response object."""
+        return await self.rate_limiter.acall(
+            partial(self.aclient.chat.completions.create,
+                    messages=messages,
+                    model=self.model,
+                    seed=kwargs.pop('seed', LMConfig.DEFAULT_SEED),
+                    temperature=kwargs.pop('temperature', LMConfig.DEFAULT_TEMPERATURE),
+                    **kwargs),
+            n_tokens=estimate_tokens(messages, max_tokens=kwargs.get('max_tokens') or kwargs.get('max_completion_tokens')))
+
+    async def aget_response(self, prompt: str, history: LMChatHist | None = None, json_format: bool = False,
+                            **kwargs) -> str:
+        """Asynchronously call OpenAI LM API and return response content."""
+        messages: ChatHistory = ChatHistory.of(history).extended({'role': 'user', 'content': prompt})
+
+        if json_format:
+            kwargs.setdefault('response_format', {'type': 'json_object'})
+            return await self._aget_json_response(messages, **kwargs)
+
+        return (await self.acall(messages, **kwargs)).choices[0].message.content
+
+
+def default_small_openai_lm() -> OpenAILM:
+    return OpenAILM(model=LMConfig.OPENAI_DEFAULT_SMALL_MODEL,
+                    api_key=LMConfig.OPENAI_API_KEY, api_base=LMConfig.OPENAI_API_URL)
+
 
 def default_llama_index_openai_embed_model() -> OpenAIEmbedding:
     # platform.openai.com/docs/models/embeddings
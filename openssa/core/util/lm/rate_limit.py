@@ -0,0 +1,311 @@
+"""
+================================================
+LANGUAGE MODEL (LM) API RATE LIMITING & RETRYING
+================================================
+
+`RateLimiter` enforces client-side requests-per-minute (RPM) & tokens-per-minute (TPM) budgets
+with token buckets, reserving each call's pre-estimated tokens before sending it
+and reconciling with actual token usage afterwards
+(or refunding them if the call failed without being processed, i.e., for any failure other than timing out).
+
+Calls that are rate-limited (HTTP 429) or that fail transiently are retried
+with jittered exponential backoff, honoring servers' `Retry-After` headers;
+a rate-limited call also pauses all other calls through the same limiter,
+so that concurrent callers do not set off throttling storms.
+
+Rate limiters are shared among all LMs with the same API base & model,
+and expose live metrics such as queue depth & waiting times.
+
+If tracing is enabled, each call's queueing time, number of retries & token usage are recorded on the current span.
+"""
+
+
+from __future__ import annotations
+
+import asyncio
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass
+import random
+from threading import Lock
+import time
+from typing import Any, TypedDict, TYPE_CHECKING
+
+from loguru import logger
+from openai import APIConnectionError, APITimeoutError
+
+from openssa.core.util.tracing import set_span_attributes
+
+if TYPE_CHECKING:
+    from .base import LMChatHist
+
+
+# HTTP status codes of responses worth retrying
+RETRYABLE_STATUS_CODES: frozenset[int] = frozenset({408, 409, 429, 500, 502, 503, 504})
+
+# rough number of characters per token, for cheap pre-call token estimation
+_CHARS_PER_TOKEN: int = 4
+
+# per-message token overhead of chat formatting
+_TOKENS_PER_MESSAGE: int = 4
+
+
+class RateLimiterMetrics(TypedDict):
+    queue_depth: int
+    in_flight: int
+    n_requests: int
+    n_rate_limited: int
+    n_retries: int
+    total_wait_time: float
+    max_wait_time: float
+    avg_wait_time: float
+
+
+def estimate_tokens(messages: LMChatHist, max_tokens: int | None = None) -> int:
+    """Estimate number of tokens counted against budget by call: prompt tokens plus maximum completion tokens."""
+    return (sum(len(str(message.get('content') or '')) // _CHARS_PER_TOKEN + _TOKENS_PER_MESSAGE
+                for message in messages)
+            + (max_tokens or 0))
+
+
+def _status_code(error: Exception) -> int | None:
+    return getattr(error, 'status_code', None) or getattr(getattr(error, 'response', None), 'status_code', None)
+
+
+def _retry_after(error: Exception) -> float | None:
+    """Return server-advised delay in seconds, from `Retry-After(-Ms)` response headers, if any."""
+    if (headers := getattr(getattr(error, 'response', None), 'headers', None)) is None:
+        return None
+
+    try:
+        if (retry_after_ms := headers.get('retry-after-ms')) is not None:
+            return float(retry_after_ms) / 1e3
+
+        if (retry_after := headers.get('retry-after')) is not None:
+            return float(retry_after)
+
+    except ValueError:  # e.g., HTTP-date format
+        return None
+
+    return None
+
+
+def _annotate_span(wait_time: float, n_retries: int, response: Any = None):
+    """Record call's queueing time, number of retries & token usage (if reported) on current span, if any."""
+    usage: Any = getattr(response, 'usage', None)
+    set_span_attributes(queue_wait_time=wait_time, n_retries=n_retries,
+                        prompt_tokens=getattr(usage, 'prompt_tokens', None),
+                        completion_tokens=getattr(usage, 'completion_tokens', None))
+
+
+def may_have_been_processed(error: Exception) -> bool:
+    """Check if failed call may still have been processed by server (thus using tokens), i.e., if it timed out."""
+    return isinstance(error, (APITimeoutError, TimeoutError))
+
+
+def is_retryable(error: Exception) -> bool:
+    """Check if error is transient, i.e., rate limiting, server-side or connection error."""
+    return ((_status_code(error) in RETRYABLE_STATUS_CODES) or
+            isinstance(error, (APIConnectionError, ConnectionError, TimeoutError)))
+
+
+@dataclass
+class RateLimiter:  # pylint: disable=too-many-instance-attributes
+    """Token-bucket rate limiter of requests & tokens per minute, with adaptive retrying."""
+
+    # budgets of requests & tokens per minute
+    # (None: unlimited)
+    requests_per_minute: int | None = None
+    tokens_per_minute: int | None = None
+
+    # maximum number of retries of transiently-failed calls
+    max_retries: int = 6
+
+    # initial & maximum backoff delays in seconds, before jittering
+    initial_backoff: float = 1.0
+    max_backoff: float = 60.0
+
+    def __post_init__(self):
+        """Initialize token buckets & metrics."""
+        self._lock: Lock = Lock()
+        self._updated_at: float = time.monotonic()
+        self._paused_until: float = 0.
+
+        # available budgets, going negative when reserved ahead of time
+        self._requests: float = float(self.requests_per_minute or 0)
+        self._tokens: float = float(self.tokens_per_minute or 0)
+
+        self.queue_depth: int = 0
+        self.in_flight: int = 0
+        self.n_requests: int = 0
+        self.n_rate_limited: int = 0
+        self.n_retries: int = 0
+        self.total_wait_time: float = 0.
+        self.max_wait_time: float = 0.
+
+    @property
+    def metrics(self) -> RateLimiterMetrics:
+        """Return live metrics."""
+        with self._lock:
+            return {'queue_depth': self.queue_depth,
+                    'in_flight': self.in_flight,
+                    'n_requests': self.n_requests,
+                    'n_rate_limited': self.n_rate_limited,
+                    'n_retries': self.n_retries,
+                    'total_wait_time': self.total_wait_time,
+                    'max_wait_time': self.max_wait_time,
+                    'avg_wait_time': self.total_wait_time / self.n_requests if self.n_requests else 0.}
+
+    def _refill(self, now: float):
+        elapsed_minutes: float = (now - self._updated_at) / 60
+        self._updated_at: float = now
+
+        if self.requests_per_minute:
+            self._requests: float = min(self._requests + elapsed_minutes * self.requests_per_minute,
+                                        self.requests_per_minute)
+
+        if self.tokens_per_minute:
+            self._tokens: float = min(self._tokens + elapsed_minutes * self.tokens_per_minute, self.tokens_per_minute)
+
+    def _reserve(self, n_tokens: int) -> float:
+        """Reserve budget for call, and return number of seconds to wait before making it."""
+        with self._lock:
+            self._refill(now := time.monotonic())
+            wait_time: float = max(self._paused_until - now, 0.)
+
+            if self.requests_per_minute:
+                self._requests -= 1
+                wait_time: float = max(wait_time, -60 * self._requests / self.requests_per_minute)
+
+            if self.tokens_per_minute:
+                self._tokens -= n_tokens
+                wait_time: float = max(wait_time, -60 * self._tokens / self.tokens_per_minute)
+
+            self.n_requests += 1
+            self.total_wait_time += wait_time
+            self.max_wait_time: float = max(self.max_wait_time, wait_time)
+            if wait_time:
+                self.queue_depth += 1
+
+            return wait_time
+
+    def _start(self, wait_time: float):
+        with self._lock:
+            if wait_time:
+                self.queue_depth -= 1
+            self.in_flight += 1
+
+    def _finish(self, n_estimated_tokens: int, response: Any = None, refund: bool = False):
+        """Reconcile reserved tokens with actual usage reported in response, if any,
+        or refund them if call failed without being processed.
+        """
+        with self._lock:
+            self.in_flight -= 1
+
+            if not self.tokens_per_minute:
+                return
+
+            if refund:
+                self._tokens: float = min(self._tokens + n_estimated_tokens, self.tokens_per_minute)
+
+            elif (n_tokens := getattr(getattr(response, 'usage', None), 'total_tokens', None)) is not None:
+                self._tokens -= n_tokens - n_estimated_tokens
+
+    def _backoff(self, error: Exception, attempt: int) -> float:
+        """Return jittered delay before next retry, pausing all calls through limiter if rate-limited."""
+        if (retry_after := _retry_after(error)) is not None:
+            delay: float = retry_after * random.uniform(1, 1.1)
+        else:
+            delay: float = random.uniform(0, min(self.max_backoff, self.initial_backoff * 2 ** attempt))
+
+        with self._lock:
+            self.n_retries += 1
+
+            if _status_code(error) == 429:
+                self.n_rate_limited += 1
+                self._paused_until: float = max(self._paused_until, time.monotonic() + delay)
+
+        logger.debug(f'RETRYING IN {delay:.1f}s AFTER {type(error).__name__} (STATUS {_status_code(error)})')
+        return delay
+
+    def call(self, func: Callable[[], Any], n_tokens: int = 0) -> Any:
+        """Make call within budgets, retrying transient failures."""
+        attempt: int = 0
+        total_wait_time: float = 0.
+
+        while True:
+            if wait_time := self._reserve(n_tokens):
+                time.sleep(wait_time)
+                total_wait_time += wait_time
+            self._start(wait_time)
+
+            try:
+                response: Any = func()
+
+            except Exception as err:  # pylint: disable=broad-exception-caught
+                self._finish(n_tokens, refund=not may_have_been_processed(err))
+
+                if (attempt >= self.max_retries) or not is_retryable(err):
+                    _annotate_span(total_wait_time, attempt)
+                    raise
+
+                time.sleep(self._backoff(err, attempt))
+                attempt += 1
+
+            else:
+                self._finish(n_tokens, response)
+                _annotate_span(total_wait_time, attempt, response)
+                return response
+
+    async def acall(self, func: Callable[[], Awaitable[Any]], n_tokens: int = 0) -> Any:
+        """Asynchronously make call within budgets, retrying transient failures."""
+        attempt: int = 0
+        total_wait_time: float = 0.
+
+        while True:
+            if wait_time := self._reserve(n_tokens):
+                await asyncio.sleep(wait_time)
+                total_wait_time += wait_time
+            self._start(wait_time)
+
+            try:
+                response: Any = await func()
+
+            except Exception as err:  # pylint: disable=broad-exception-caught
+                self._finish(n_tokens, refund=not may_have_been_processed(err))
+
+                if (attempt >= self.max_retries) or not is_retryable(err):
+                    _annotate_span(total_wait_time, attempt)
+                    raise
+
+                await asyncio.sleep(self._backoff(err, attempt))
+                attempt += 1
+
+            else:
+                self._finish(n_tokens, response)
+                _annotate_span(total_wait_time, attempt, response)
+                return response
+
+
+# rate limiters shared among LMs with same API base & model
+_RATE_LIMITERS: dict[tuple[str, str], RateLimiter] = {}
+_RATE_LIMITERS_LOCK: Lock = Lock()
+
+
+def shared_rate_limiter(api_base: str, model: str) -> RateLimiter:
+    """Get rate limiter shared among LMs with same API base & model."""
+    with _RATE_LIMITERS_LOCK:
+        if (key := (api_base, model)) not in _RATE_LIMITERS:
+            _RATE_LIMITERS[key]: RateLimiter = RateLimiter()
+
+        return _RATE_LIMITERS[key]
+
+
+def set_rate_limits(api_base: str, model: str, requests_per_minute: int | None = None,
+                    tokens_per_minute: int | None = None, **kwargs: Any) -> RateLimiter:
+    """Set budgets (& optionally retrying parameters) of rate limiter shared among LMs with same API base & model."""
+    with _RATE_LIMITERS_LOCK:
+        rate_limiter: RateLimiter = RateLimiter(requests_per_minute=requests_per_minute,
+                                                tokens_per_minute=tokens_per_minute,
+                                                **kwargs)
+        _RATE_LIMITERS[(api_base, model)]: RateLimiter = rate_limiter
+        return rate_limiter
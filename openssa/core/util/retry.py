@@ -0,0 +1,232 @@
+"""
+=========================
+BOUNDED RETRYING POLICIES
+=========================
+
+`RetryPolicy` bounds loops that retry until an output is valid (e.g., LM responses that need to follow a format),
+by a maximum number of attempts and/or a wall-clock deadline.
+
+Retries can escalate through increasingly strong strategies:
+
+- re-prompting the LM with the previous invalid response & the validation error
+- switching to a fallback (e.g., stronger) LM for the later attempts
+- returning a deterministic fallback result once the budget is exhausted
+
+Each policy keeps per-call-site statistics of attempts, escalations & fallbacks,
+which are also recorded on tracing spans of retried calls if tracing is enabled.
+"""
+
+
+from __future__ import annotations
+
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass, field
+import json
+from threading import Lock
+import time
+from typing import Any, TYPE_CHECKING
+
+from loguru import logger
+
+from ._prompts import INVALID_RESPONSE_REPROMPT_TEMPLATE
+from .lm.history import ChatHistory
+from .tracing import SpanKind, increment_span_attributes, traced
+
+if TYPE_CHECKING:
+    from .lm.base import BaseLM, LMChatHist
+
+
+class RetryExhaustedError(RuntimeError):
+    """Raised when retry budget is exhausted without valid result and without fallback."""
+
+
+@dataclass
+class RetryAttempt:
+    """State of an attempt, for attempted function to adapt to."""
+
+    # 1-based number of this attempt
+    number: int
+
+    # LM to use for this attempt (None if not applicable)
+    lm: BaseLM | None = None
+
+    # invalid output of previous attempt (to be recorded by attempted function), and error explaining why it is invalid
+    previous_output: Any = None
+    previous_error: Exception | None = None
+
+
+@dataclass
+class RetryStats:
+    """Statistics of retried calls from a call site."""
+
+    n_calls: int = 0
+    n_attempts: int = 0
+    n_escalations: int = 0
+    n_fallbacks: int = 0
+    n_deadlines_exceeded: int = 0
+
+    @property
+    def avg_attempts(self) -> float:
+        """Return average number of attempts per call."""
+        return self.n_attempts / self.n_calls if self.n_calls else 0.
+
+
+@dataclass
+class RetryPolicy:  # pylint: disable=too-many-instance-attributes
+    """Policy bounding & escalating retries until valid result."""
+
+    # maximum number of attempts
+    max_attempts: int = 5
+
+    # wall-clock deadline in seconds, beyond which no new attempt is started
+    # (None: no deadline)
+    deadline: float | None = None
+
+    # whether to re-prompt LM with its previous invalid response & the validation error
+    reprompt_with_error: bool = True
+
+    # fallback (e.g., stronger) LM to escalate to after given number of failed attempts
+    # (None: no escalation)
+    fallback_lm: BaseLM | None = field(default=None,
+                                       init=True,
+                                       repr=False,
+                                       hash=None,
+                                       compare=True,
+                                       metadata=None,
+                                       kw_only=False)
+    n_attempts_before_fallback_lm: int = 2
+
+    # statistics of retried calls, indexed by call-site name
+    stats: dict[str, RetryStats] = field(default_factory=dict,
+                                         init=False,
+                                         repr=False,
+                                         hash=None,
+                                         compare=False,
+                                         metadata=None,
+                                         kw_only=False)
+
+    def __post_init__(self):
+        """Initialize lock for updating statistics."""
+        self._lock: Lock = Lock()
+
+    def _record(self, name: str, **increments: int):
+        increment_span_attributes(**increments)
+
+        with self._lock:
+            stats: RetryStats = self.stats.setdefault(name, RetryStats())
+            for attr, increment in increments.items():
+                setattr(stats, attr, getattr(stats, attr) + increment)
+
+    def _exhausted(self, attempt: RetryAttempt, start_time: float) -> tuple[bool, bool]:
+        """Return whether budget is exhausted, and whether due to deadline."""
+        deadline_exceeded: bool = (self.deadline is not None) and (time.monotonic() - start_time >= self.deadline)
+        return (attempt.number >= self.max_attempts) or deadline_exceeded, deadline_exceeded
+
+    def _give_up[T](self, attempt: RetryAttempt, *, name: str, deadline_exceeded: bool,
+                    fallback: Callable[[RetryAttempt], T] | None) -> T:
+        self._record(name, n_calls=1, n_attempts=attempt.number,
+                     n_fallbacks=fallback is not None, n_deadlines_exceeded=deadline_exceeded)
+
+        logger.warning(f'{name}: NO VALID RESULT AFTER {attempt.number} ATTEMPT(S)' +
+                       (', USING FALLBACK' if fallback else ''))
+
+        if fallback is None:
+            raise RetryExhaustedError(f'{name}: no valid result after {attempt.number} attempt(s)') \
+                from attempt.previous_error
+
+        return fallback(attempt)
+
+    def _advance(self, attempt: RetryAttempt, *, name: str):
+        attempt.number += 1
+
+        if self.fallback_lm and (attempt.lm is not None) and (attempt.number == self.n_attempts_before_fallback_lm + 1):
+            logger.info(f'{name}: ESCALATING TO FALLBACK LM {self.fallback_lm.model}')
+            attempt.lm: BaseLM = self.fallback_lm
+            self._record(name, n_escalations=1)
+
+    @traced('retry', SpanKind.RETRY, attributes=lambda self, func, *args, name='', **kwargs: {'name': name})
+    def retry[T](self, func: Callable[[RetryAttempt], T], *, name: str,
+                 lm: BaseLM | None = None, fallback: Callable[[RetryAttempt], T] | None = None) -> T:
+        """Call function until it returns without raising `ValueError` (signifying invalid result),
+        within budget of attempts & deadline; then return fallback result or raise `RetryExhaustedError`.
+        """
+        start_time: float = time.monotonic()
+        attempt: RetryAttempt = RetryAttempt(number=1, lm=lm)
+
+        while True:
+            try:
+                result: T = func(attempt)
+
+            except ValueError as err:
+                logger.debug(f'{name}: INVALID RESULT IN ATTEMPT #{attempt.number}: {err}')
+                attempt.previous_error: Exception = err
+
+            else:
+                self._record(name, n_calls=1, n_attempts=attempt.number)
+                return result
+
+            exhausted, deadline_exceeded = self._exhausted(attempt, start_time)
+            if exhausted:
+                return self._give_up(attempt, name=name, deadline_exceeded=deadline_exceeded, fallback=fallback)
+
+            self._advance(attempt, name=name)
+
+    @traced('retry', SpanKind.RETRY, attributes=lambda self, func, *args, name='', **kwargs: {'name': name})
+    async def aretry[T](self, func: Callable[[RetryAttempt], Awaitable[T]], *, name: str,
+                        lm: BaseLM | None = None, fallback: Callable[[RetryAttempt], T] | None = None) -> T:
+        """Asynchronously call async function until it returns without raising `ValueError`,
+        within budget of attempts & deadline; then return fallback result or raise `RetryExhaustedError`.
+        """
+        start_time: float = time.monotonic()
+        attempt: RetryAttempt = RetryAttempt(number=1, lm=lm)
+
+        while True:
+            try:
+                result: T = await func(attempt)
+
+            except ValueError as err:
+                logger.debug(f'{name}: INVALID RESULT IN ATTEMPT #{attempt.number}: {err}')
+                attempt.previous_error: Exception = err
+
+            else:
+                self._record(name, n_calls=1, n_attempts=attempt.number)
+                return result
+
+            exhausted, deadline_exceeded = self._exhausted(attempt, start_time)
+            if exhausted:
+                return self._give_up(attempt, name=name, deadline_exceeded=deadline_exceeded, fallback=fallback)
+
+            self._advance(attempt, name=name)
+
+    def reprompt_messages(self, messages: LMChatHist, attempt: RetryAttempt) -> ChatHistory:
+        """Return chat messages for attempt,
+        extended with previous invalid response & validation error if re-prompting is applicable
+        (sharing given messages as prefix rather than copying or mutating them).
+        """
+        messages: ChatHistory = ChatHistory.of(messages)
+
+        if not (self.reprompt_with_error and (attempt.previous_error is not None)):
+            return messages
+
+        return messages.extended(
+            {'role': 'assistant', 'content': (attempt.previous_output
+                                              if isinstance(attempt.previous_output, str)
+                                              else json.dumps(attempt.previous_output, default=str))},
+            {'role': 'user', 'content': INVALID_RESPONSE_REPROMPT_TEMPLATE.format(error=attempt.previous_error)})
+
+    def get_valid_lm_response[T](self, lm: BaseLM, prompt: str, parse: Callable[[Any], T], *, name: str,
+                                 history: LMChatHist | None = None,
+                                 fallback: Callable[[RetryAttempt], T] | None = None, **kwargs: Any) -> T:
+        # pylint: disable=too-many-arguments
+        """Get LM response and parse it with function raising `ValueError` if invalid,
+        retrying as per policy (re-prompting with errors and/or escalating to fallback LM if so configured).
+        """
+        messages: ChatHistory = ChatHistory.of(history).extended({'role': 'user', 'content': prompt})
+
+        def attempt_lm_response(attempt: RetryAttempt) -> T:
+            attempt_messages: ChatHistory = self.reprompt_messages(messages, attempt)
+            attempt.previous_output = attempt.lm.get_response(prompt=attempt_messages[-1]['content'],
+                                                              history=attempt_messages.but_last(), **kwargs)
+            return parse(attempt.previous_output)
+
+        return self.retry(attempt_lm_response, name=name, lm=lm, fallback=fallback)
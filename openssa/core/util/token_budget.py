@@ -0,0 +1,230 @@
+"""
+======================
+PROMPT TOKEN BUDGETING
+======================
+
+`TokenBudget` keeps prompts assembled from many sections
+(e.g., OODA observations of Resources' answers, or HTP sub-task results & other results to synthesize)
+within a configurable number of tokens, so that prompts at upper levels of wide HTPs do not balloon:
+
+- sections are measured with a local tokenizer (by default, LlamaIndex's bundled `tiktoken` tokenizer)
+- long paragraphs repeated across sections (e.g., the same Resource overview presented with several answers)
+  are kept only at their first occurrence
+- if still over budget, lower-priority sections are compressed first, down to a minimum size each,
+  by extractive summarization (keeping the sentences most relevant to the question/task, in original order)
+  or by truncation
+"""
+
+
+from __future__ import annotations
+
+from collections.abc import Callable, Sequence
+from dataclasses import dataclass, field
+from enum import StrEnum
+import re
+
+from llama_index.core.utils import get_tokenizer
+from loguru import logger
+
+
+REPEATED_CONTENT_PLACEHOLDER: str = '(... same as above ...)'
+
+TRUNCATION_MARKER: str = ' (...)'
+
+_SENTENCE_SPLIT_PATTERN: re.Pattern = re.compile(r'(?<=[.!?:;])\s+|\n+')
+
+_WORD_PATTERN: re.Pattern = re.compile(r'\w+')
+
+
+class CompressionMethod(StrEnum):
+    """Method for compressing over-budget prompt sections."""
+
+    # keep sentences most relevant to question/task, in original order
+    EXTRACTIVE: str = 'extractive'
+
+    # keep beginning of section
+    TRUNCATE: str = 'truncate'
+
+
+@dataclass
+class PromptSection:
+    """Section of prompt to fit into token budget."""
+
+    # compressible content of section
+    content: str
+
+    # header of section, kept verbatim (e.g., question/task that content is result of)
+    header: str = ''
+
+    # priority of section, lower-priority sections being compressed first
+    priority: int = 0
+
+    @property
+    def text(self) -> str:
+        """Return header followed by content."""
+        return f'{self.header}{self.content}'
+
+
+@dataclass
+class TokenBudget:
+    """Budget of prompt tokens for sections of prompts."""
+
+    # maximum number of tokens of all sections of a prompt combined
+    max_tokens: int = 12_000
+
+    # minimum number of tokens of content kept per compressed section
+    min_section_tokens: int = 100
+
+    # method for compressing over-budget sections
+    compression: CompressionMethod = CompressionMethod.EXTRACTIVE
+
+    # minimum number of characters of paragraphs to be kept only at their first occurrence across sections
+    # (None: no deduplication)
+    min_deduplicated_chars: int | None = 200
+
+    # tokenizer for measuring sections
+    # (default: LlamaIndex's global tokenizer, working locally)
+    tokenizer: Callable[[str], Sequence] = field(default_factory=get_tokenizer,
+                                                 init=True,
+                                                 repr=False,
+                                                 hash=None,
+                                                 compare=False,
+                                                 metadata=None,
+                                                 kw_only=False)
+
+    def count(self, text: str) -> int:
+        """Count tokens of text."""
+        return len(self.tokenizer(text))
+
+    def fit(self, sections: Sequence[PromptSection], query: str = '') -> list[str]:
+        """Return texts of sections, deduplicated & compressed as needed to fit budget,
+        with extractive compression favoring sentences relevant to query (e.g., question/task) if given.
+        """
+        sections: list[PromptSection] = self._deduplicate(sections)
+        n_tokens: list[int] = [self.count(section.text) for section in sections]
+
+        if (n_excess_tokens := sum(n_tokens) - self.max_tokens) > 0:
+            logger.debug(f'TOKEN BUDGET: COMPRESSING {n_excess_tokens:,} EXCESS TOKENS '
+                         f'OF {len(sections)} SECTION(S) TOTALING {sum(n_tokens):,} TOKENS')
+
+            for priority in sorted({section.priority for section in sections}):
+                if n_excess_tokens <= 0:
+                    break
+
+                n_excess_tokens -= self._compress_priority_group(sections, n_tokens, priority, n_excess_tokens, query)
+
+        return [section.text for section in sections]
+
+    def _deduplicate(self, sections: Sequence[PromptSection]) -> list[PromptSection]:
+        """Keep long paragraphs repeated across sections only at their first occurrence."""
+        if self.min_deduplicated_chars is None:
+            return list(sections)
+
+        seen_paragraphs: set[str] = set()
+        deduplicated_sections: list[PromptSection] = []
+
+        for section in sections:
+            paragraphs: list[str] = section.content.split('\n\n')
+
+            for i, paragraph in enumerate(paragraphs):
+                if len(normalized_paragraph := paragraph.strip()) >= self.min_deduplicated_chars:
+                    if normalized_paragraph in seen_paragraphs:
+                        paragraphs[i]: str = REPEATED_CONTENT_PLACEHOLDER
+                    else:
+                        seen_paragraphs.add(normalized_paragraph)
+
+            deduplicated_sections.append(PromptSection(content='\n\n'.join(paragraphs),
+                                                       header=section.header, priority=section.priority))
+
+        return deduplicated_sections
+
+    def _compress_priority_group(self, sections: list[PromptSection], n_tokens: list[int],
+                                 priority: int, n_excess_tokens: int, query: str) -> int:
+        # pylint: disable=too-many-arguments
+        """Compress sections of given priority by up to given number of tokens, as evenly as possible,
+        and return number of tokens saved.
+        """
+        indices: list[int] = [i for i, section in enumerate(sections) if section.priority == priority]
+
+        # largest target size per section such that group sheds excess tokens (within minimum sizes)
+        content_n_tokens: dict[int, int] = {i: self.count(sections[i].content) for i in indices}
+        n_target_tokens: int = self._water_level(sorted(content_n_tokens.values()), n_excess_tokens)
+
+        n_saved_tokens: int = 0
+        for i in indices:
+            if content_n_tokens[i] > n_target_tokens:
+                sections[i].content = self._compress(sections[i].content, n_target_tokens, query)
+                n_compressed_tokens: int = self.count(sections[i].text)
+                n_saved_tokens += n_tokens[i] - n_compressed_tokens
+                n_tokens[i]: int = n_compressed_tokens
+
+        return n_saved_tokens
+
+    def _water_level(self, sorted_n_tokens: list[int], n_excess_tokens: int) -> int:
+        """Return largest cap on section sizes making capped sizes sum to at most total minus excess tokens,
+        not going below minimum section size.
+        """
+        n_target_total_tokens: int = sum(sorted_n_tokens) - n_excess_tokens
+        n_remaining_sections: int = len(sorted_n_tokens)
+
+        for n in sorted_n_tokens:
+            if n * n_remaining_sections >= n_target_total_tokens:
+                break
+            n_target_total_tokens -= n
+            n_remaining_sections -= 1
+
+        return max(n_target_total_tokens // max(n_remaining_sections, 1), self.min_section_tokens)
+
+    def _compress(self, content: str, n_target_tokens: int, query: str = '') -> str:
+        """Compress content to within target number of tokens."""
+        if self.compression == CompressionMethod.EXTRACTIVE:
+            if (summary := self._extract(content, n_target_tokens, query)) is not None:
+                return summary
+
+        return self._truncate(content, n_target_tokens)
+
+    def _extract(self, content: str, n_target_tokens: int, query: str = '') -> str | None:
+        """Keep sentences most relevant to query (earlier sentences first among equally relevant ones),
+        in original order, or return None if not even most relevant sentence fits.
+        """
+        sentences: list[str] = [sentence for sentence in _SENTENCE_SPLIT_PATTERN.split(content) if sentence.strip()]
+        query_words: set[str] = set(_WORD_PATTERN.findall(query.lower()))
+
+        def relevance(i: int) -> tuple[float, int]:
+            words: list[str] = _WORD_PATTERN.findall(sentences[i].lower())
+            return -len(query_words.intersection(words)) / (len(words) ** .5 or 1.), i
+
+        selected_indices: list[int] = []
+        n_selected_tokens: int = 0
+        for i in sorted(range(len(sentences)), key=relevance):
+            if n_selected_tokens + (n := self.count(sentences[i]) + 1) <= n_target_tokens:
+                selected_indices.append(i)
+                n_selected_tokens += n
+
+        if not selected_indices:
+            return None
+
+        return ' (...) '.join(' '.join(sentences[i] for i in run)
+                              for run in _consecutive_runs(sorted(selected_indices)))
+
+    def _truncate(self, content: str, n_target_tokens: int) -> str:
+        """Keep beginning of content, cut at word boundary."""
+        n_chars: int = len(content) * n_target_tokens // max(self.count(content), 1)
+
+        while n_chars > 0:
+            truncated_content: str = (content[:n_chars].rsplit(maxsplit=1) or [''])[0]
+            if self.count(truncated_content) + 2 <= n_target_tokens:
+                return f'{truncated_content}{TRUNCATION_MARKER}'
+            n_chars: int = n_chars * 9 // 10
+
+        return TRUNCATION_MARKER.strip()
+
+
+def _consecutive_runs(indices: list[int]) -> list[list[int]]:
+    runs: list[list[int]] = []
+    for i in indices:
+        if runs and (runs[-1][-1] == i - 1):
+            runs[-1].append(i)
+        else:
+            runs.append([i])
+    return runs
@@ -0,0 +1,270 @@
+"""
+=================
+EXECUTION TRACING
+=================
+
+`Tracer` records structured spans of work done in solving problems,
+e.g., HTP nodes, planning, Program search, Resource queries, LM calls & validation retries,
+each with its wall time and kind-specific attributes such as
+LM queueing time, prompt & completion tokens, cache hits/misses and numbers of retries.
+
+Spans are nested via context variables, and exported as they finish,
+e.g., as JSON lines or as OpenTelemetry spans (with the `tracing` extra installed).
+
+Tracing is disabled (and costs next to nothing) until a tracer is set by `set_tracer(...)`.
+
+Note: to nest spans across threads, submit work to thread pools via `contextvars.copy_context().run`.
+"""
+
+
+from __future__ import annotations
+
+from abc import ABC, abstractmethod
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import asdict, dataclass, field
+from enum import StrEnum
+from functools import wraps
+from inspect import iscoroutinefunction
+import json
+from pathlib import Path
+import secrets
+from threading import Lock
+import time
+from typing import Any, TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from collections.abc import Callable, Iterator
+
+
+class SpanKind(StrEnum):
+    """Kind of traced work."""
+
+    AGENT: str = 'agent'
+    HTP: str = 'htp'
+    PLANNING: str = 'planning'
+    PROGRAM_SEARCH: str = 'program-search'
+    REASONING: str = 'reasoning'
+    RESOURCE: str = 'resource'
+    LM: str = 'lm'
+    RETRY: str = 'retry'
+
+
+@dataclass
+class Span:  # pylint: disable=too-many-instance-attributes
+    """Span of traced work."""
+
+    name: str
+    kind: SpanKind
+    trace_id: str
+    span_id: str
+    parent_id: str | None = None
+
+    # start & end times, in nanoseconds since epoch
+    start_time: int = field(default_factory=time.time_ns)
+    end_time: int | None = None
+
+    attributes: dict[str, Any] = field(default_factory=dict)
+
+    # error raised from traced work, if any
+    error: str | None = None
+
+    @property
+    def duration(self) -> float | None:
+        """Return wall time in seconds, if finished."""
+        return None if self.end_time is None else (self.end_time - self.start_time) / 1e9
+
+    def to_dict(self) -> dict[str, Any]:
+        """Return JSON-serializable dictionary representation."""
+        return asdict(self) | {'duration': self.duration}
+
+
+class SpanExporter(ABC):
+    """Span exporter abstract base class."""
+
+    def on_start(self, span: Span):
+        """Handle started span (default: do nothing)."""
+
+    @abstractmethod
+    def on_end(self, span: Span):
+        """Export finished span."""
+
+
+@dataclass
+class InMemorySpanExporter(SpanExporter):
+    """Span exporter keeping finished spans in memory, e.g., for analysis in notebooks & tests."""
+
+    spans: list[Span] = field(default_factory=list)
+
+    def on_end(self, span: Span):
+        """Keep finished span."""
+        self.spans.append(span)
+
+
+@dataclass
+class JSONLinesSpanExporter(SpanExporter):
+    """Span exporter appending finished spans to JSON Lines file."""
+
+    path: Path | str
+
+    def __post_init__(self):
+        """Initialize lock for writing to file."""
+        Path(self.path).parent.mkdir(parents=True, exist_ok=True)
+        self._lock: Lock = Lock()
+
+    def on_end(self, span: Span):
+        """Append finished span to file."""
+        line: str = json.dumps(span.to_dict(), ensure_ascii=False, default=str)
+
+        with self._lock, open(self.path, mode='a', encoding='utf-8') as f:
+            f.write(f'{line}\n')
+
+
+class OpenTelemetrySpanExporter(SpanExporter):
+    """Span exporter re-creating spans as OpenTelemetry spans, with same nesting, timing & attributes."""
+
+    def __init__(self, tracer_provider: Any = None):
+        """Get OpenTelemetry tracer from given or global tracer provider."""
+        # pylint: disable=import-outside-toplevel
+        from opentelemetry import trace  # optional dependency: install OpenSSA with `tracing` extra
+
+        self._trace = trace
+        self._tracer = trace.get_tracer('openssa', tracer_provider=tracer_provider)
+        self._lock: Lock = Lock()
+        self._otel_spans: dict[str, Any] = {}
+
+    def on_start(self, span: Span):
+        """Start OpenTelemetry span, nested in OpenTelemetry span of parent span if any."""
+        with self._lock:
+            parent_otel_span: Any = self._otel_spans.get(span.parent_id)
+
+        otel_span: Any = self._tracer.start_span(name=span.name,
+                                                 context=(self._trace.set_span_in_context(parent_otel_span)
+                                                          if parent_otel_span is not None
+                                                          else None),
+                                                 start_time=span.start_time,
+                                                 attributes={'openssa.kind': span.kind.value})
+
+        with self._lock:
+            self._otel_spans[span.span_id] = otel_span
+
+    def on_end(self, span: Span):
+        """End OpenTelemetry span, with attributes & error status."""
+        with self._lock:
+            otel_span: Any = self._otel_spans.pop(span.span_id)
+
+        otel_span.set_attributes({f'openssa.{span.kind.value}.{key}': (value
+                                                                       if isinstance(value, (bool, int, float, str))
+                                                                       else str(value))
+                                  for key, value in span.attributes.items() if value is not None})
+
+        if span.error is not None:
+            otel_span.set_status(self._trace.Status(self._trace.StatusCode.ERROR, span.error))
+
+        otel_span.end(end_time=span.end_time)
+
+
+@dataclass
+class Tracer:
+    """Tracer recording spans of traced work and passing them to exporters."""
+
+    exporters: list[SpanExporter] = field(default_factory=list)
+
+    @contextmanager
+    def span(self, name: str, kind: SpanKind, /, **attributes: Any) -> Iterator[Span]:
+        """Trace work done within context, nested in current span if any."""
+        parent: Span | None = _CURRENT_SPAN.get()
+
+        span: Span = Span(name=name, kind=kind,
+                          trace_id=parent.trace_id if parent else secrets.token_hex(16),
+                          span_id=secrets.token_hex(8),
+                          parent_id=parent.span_id if parent else None,
+                          attributes=attributes)
+
+        for exporter in self.exporters:
+            exporter.on_start(span)
+
+        token = _CURRENT_SPAN.set(span)
+        try:
+            yield span
+
+        except BaseException as err:
+            span.error: str = repr(err)
+            raise
+
+        finally:
+            _CURRENT_SPAN.reset(token)
+            span.end_time: int = time.time_ns()
+
+            for exporter in self.exporters:
+                exporter.on_end(span)
+
+
+_CURRENT_SPAN: ContextVar[Span | None] = ContextVar('openssa_current_span', default=None)
+
+_TRACER: Tracer | None = None
+
+
+def set_tracer(tracer: Tracer | None):
+    """Set global tracer (None: disable tracing)."""
+    global _TRACER  # pylint: disable=global-statement
+    _TRACER = tracer
+
+
+def get_tracer() -> Tracer | None:
+    """Get global tracer, if tracing is enabled."""
+    return _TRACER
+
+
+@contextmanager
+def trace_span(name: str, kind: SpanKind, /, **attributes: Any) -> Iterator[Span | None]:
+    """Trace work done within context with global tracer, if tracing is enabled."""
+    if _TRACER is None:
+        yield None
+        return
+
+    with _TRACER.span(name, kind, **attributes) as span:
+        yield span
+
+
+def traced[F: Callable](name: str, kind: SpanKind, attributes: Callable[..., dict[str, Any]] | None = None,
+                        ) -> Callable[[F], F]:
+    """Decorate (sync or async) function so that its calls are traced with global tracer, if tracing is enabled,
+    with span attributes optionally derived from call arguments.
+    """
+    def decorator(func: F) -> F:
+        if iscoroutinefunction(func):
+            @wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                if _TRACER is None:
+                    return await func(*args, **kwargs)
+
+                with _TRACER.span(name, kind, **(attributes(*args, **kwargs) if attributes else {})):
+                    return await func(*args, **kwargs)
+
+            return async_wrapper
+
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            if _TRACER is None:
+                return func(*args, **kwargs)
+
+            with _TRACER.span(name, kind, **(attributes(*args, **kwargs) if attributes else {})):
+                return func(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+def set_span_attributes(**attributes: Any):
+    """Set attributes of current span, if any."""
+    if (span := _CURRENT_SPAN.get()) is not None:
+        span.attributes.update(attributes)
+
+
+def increment_span_attributes(**increments: int | float):
+    """Increment numerical attributes of current span, if any."""
+    if (span := _CURRENT_SPAN.get()) is not None:
+        for key, increment in increments.items():
+            span.attributes[key] = span.attributes.get(key, 0) + increment
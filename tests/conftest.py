@@ -0,0 +1,166 @@
+from collections.abc import Callable
+from dataclasses import dataclass, field
+from functools import cached_property
+from threading import Lock
+import time
+from typing import Any
+
+from llama_index.core.base.embeddings.base import BaseEmbedding
+import pytest
+
+from openssa.core.reasoning.base import BaseReasoner
+from openssa.core.resource.base import BaseResource
+from openssa.core.task.status import TaskStatus
+from openssa.core.util.lm.base import BaseLM
+
+
+VOCAB: list[str] = ['margin', 'revenue', 'etch', 'yield']
+
+
+@dataclass
+class FakeLM(BaseLM):
+    """LM double returning scripted responses (or else echoing prompts), and recording prompts & histories."""
+
+    model: str = 'fake'
+    api_base: str = ''
+
+    # responses to return in turn, callable ones being called with prompt
+    responses: list[Any] = field(default_factory=list)
+
+    # response function of prompt & JSON format flag, once scripted responses are used up
+    respond: Callable[[str, bool], Any] | None = field(default=None, repr=False)
+
+    prompts: list[str] = field(default_factory=list)
+    histories: list[list[dict]] = field(default_factory=list)
+
+    def __post_init__(self):
+        self._lock: Lock = Lock()
+
+    @classmethod
+    def from_defaults(cls):
+        return cls()
+
+    @property
+    def n_calls(self) -> int:
+        return len(self.prompts)
+
+    def call(self, messages, **kwargs):
+        raise NotImplementedError
+
+    def get_response(self, prompt, history=None, json_format=False, **kwargs):
+        with self._lock:
+            self.prompts.append(prompt)
+            self.histories.append(list(history or []))
+            n_calls: int = self.n_calls
+            response: Any = self.responses.pop(0) if self.responses else None
+
+        if response is not None:
+            return response(prompt) if callable(response) else response
+
+        if self.respond is not None:
+            return self.respond(prompt, json_format)
+
+        return {'prompt': prompt} if json_format else f'{prompt} #{n_calls}'
+
+
+class KeywordEmbedding(BaseEmbedding):
+    """Embedding double with one dimension per vocabulary word, counting embedded texts."""
+
+    n_embedded_texts: int = 0
+
+    def _embed(self, text: str) -> list[float]:
+        return [float(word in text.lower()) + 1e-3 for word in VOCAB]
+
+    def _get_query_embedding(self, query: str) -> list[float]:
+        return self._embed(query)
+
+    async def _aget_query_embedding(self, query: str) -> list[float]:
+        return self._embed(query)
+
+    def _get_text_embedding(self, text: str) -> list[float]:
+        self.n_embedded_texts += 1
+        return self._embed(text)
+
+
+class FakeResource(BaseResource):
+    """Resource double answering from a function of questions (by default, naming itself), counting answers."""
+
+    def __init__(self, n: int, answer: Callable[[str], str] | None = None):
+        self.n: int = n
+        self._answer: Callable[[str], str] | None = answer
+        self.n_answers: int = 0
+
+    @cached_property
+    def unique_name(self) -> str:
+        return f'doc-{self.n}'
+
+    @cached_property
+    def name(self) -> str:
+        return f'Document {self.n}'
+
+    def answer(self, question: str, n_words: int = 1000) -> str:
+        self.n_answers += 1
+
+        if 'overview' in question.lower():
+            return f'Overview of document {self.n}.'
+
+        return self._answer(question) if self._answer else f'Answer from document {self.n}.'
+
+
+@dataclass
+class FakeReasoner(BaseReasoner):
+    """Reasoner double resolving Tasks after given delay, recording calls & peak concurrency."""
+
+    lm: BaseLM = field(default_factory=FakeLM)
+
+    # function of asks returning whether Tasks are resolved confidently
+    confident: Callable[[str], bool] = field(default=lambda _: True, repr=False)
+
+    # function of asks returning delays (in seconds) before resolving Tasks
+    delay: Callable[[str], float] = field(default=lambda _: 0., repr=False)
+
+    # (ask, other results) of each call, in order of calls
+    calls: list[tuple[str, list | None]] = field(default_factory=list)
+
+    n_running: int = 0
+    max_running: int = 0
+
+    def __post_init__(self):
+        self._lock: Lock = Lock()
+
+    def reason(self, task, *, knowledge, other_results=None, n_words=1000):
+        with self._lock:
+            self.calls.append((task.ask, None if other_results is None else list(other_results)))
+            self.n_running += 1
+            self.max_running = max(self.max_running, self.n_running)
+
+        try:
+            time.sleep(self.delay(task.ask))
+
+        finally:
+            with self._lock:
+                self.n_running -= 1
+
+        task.result = f'result of {task.ask}'
+        task.status = TaskStatus.DONE if self.confident(task.ask) else TaskStatus.NEEDING_DECOMPOSITION
+        return task.result
+
+
+@pytest.fixture
+def fake_lm() -> type[FakeLM]:
+    return FakeLM
+
+
+@pytest.fixture
+def keyword_embed_model() -> KeywordEmbedding:
+    return KeywordEmbedding()
+
+
+@pytest.fixture
+def fake_reasoner() -> type[FakeReasoner]:
+    return FakeReasoner
+
+
+@pytest.fixture
+def fake_resource() -> type[FakeResource]:
+    return FakeResource
@@ -0,0 +1,101 @@
+from threading import Lock
+import time
+
+from openssa.core.agent.dana import DANA
+from openssa.core.program_store.program_store import ProgramStore
+from openssa.core.programming.hierarchical.events import HTPEventType
+from openssa.core.programming.hierarchical.planner import HTPlanner
+
+
+def respond(prompt: str, _json_format: bool) -> str:
+    time.sleep(.05)
+
+    if 'top-level question/problem/task' in prompt:
+        return '[SUB-QUESTION/PROBLEM/TASK]\nA?\n[SUB-QUESTION/PROBLEM/TASK]\nB?'
+
+    return '[CONFIDENT]\nanswer'
+
+
+def dana(fake_lm, lm, max_depth: int = 1, **kwargs) -> DANA:
+    return DANA(program_store=ProgramStore(lm=fake_lm(respond=lambda *_: 'NONE')),
+                programmer=HTPlanner(lm=lm, max_depth=max_depth), **kwargs)
+
+
+def test_solve_stream_yields_events_ending_with_solution(fake_lm):
+    events = list(dana(fake_lm, fake_lm(respond=respond)).solve_stream('What?'))
+
+    assert [(event.type, event.ask.strip()) for event in events if event.type != HTPEventType.SYNTHESIS_TOKEN] == [
+        (HTPEventType.TASK_STARTED, 'What?'), (HTPEventType.PLAN_CREATED, 'What?'),
+        (HTPEventType.TASK_STARTED, 'A?'), (HTPEventType.TASK_FINISHED, 'A?'),
+        (HTPEventType.TASK_STARTED, 'B?'), (HTPEventType.TASK_FINISHED, 'B?'),
+        (HTPEventType.TASK_FINISHED, 'What?')]
+
+    # only the top-level result synthesis is streamed, as sub-tasks are solved directly
+    tokens = [event for event in events if event.type == HTPEventType.SYNTHESIS_TOKEN]
+    assert {event.ask for event in tokens} == {'What?'}
+    assert ''.join(event.data for event in tokens) == events[-1].data
+
+
+def test_solve_stream_is_cancelled_when_consumer_stops_early(fake_lm):
+    lm = fake_lm(respond=respond)
+    events = dana(fake_lm, lm).solve_stream('What?')
+
+    assert next(events).type == HTPEventType.TASK_STARTED
+    events.close()
+
+    # decomposition & top-level direct attempt, but neither sub-tasks nor synthesis
+    time.sleep(1)
+    assert lm.n_calls <= 2
+
+
+class ConcurrencyTracker:
+    def __init__(self, delay: float = .1):
+        self.delay: float = delay
+        self.n_running = self.max_running = 0
+        self.lock: Lock = Lock()
+
+    def __call__(self):
+        with self.lock:
+            self.n_running += 1
+            self.max_running = max(self.max_running, self.n_running)
+
+        time.sleep(self.delay)
+
+        with self.lock:
+            self.n_running -= 1
+
+
+def test_solve_many_solves_problems_with_bounded_concurrency(fake_lm, fake_resource):
+    tracker = ConcurrencyTracker()
+
+    def respond_tracking_concurrency(prompt: str, _json_format: bool) -> str:
+        tracker()
+        if 'FAIL?' in prompt:
+            raise RuntimeError('LM unavailable')
+        return '[CONFIDENT]\nanswer'
+
+    agent = dana(fake_lm, fake_lm(respond=respond_tracking_concurrency), max_depth=0, resources={fake_resource(0)})
+    results = dict(agent.solve_many(['Q0?', 'Q1?', 'FAIL?', 'Q3?'], max_concurrency=2, return_exceptions=True))
+
+    assert {problem: result for problem, result in results.items() if problem != 'FAIL?'} == \
+        {'Q0?': 'answer', 'Q1?': 'answer', 'Q3?': 'answer'}
+    assert isinstance(results['FAIL?'], RuntimeError)
+    assert tracker.max_running == 2
+
+
+def test_solve_many_creates_resource_overviews_once_and_concurrently(fake_lm, fake_resource):
+    tracker = ConcurrencyTracker()
+
+    class SlowOverviewResource(fake_resource):
+        def answer(self, question: str, n_words: int = 1000) -> str:
+            if 'overview' in question.lower():
+                tracker()
+            return super().answer(question, n_words=n_words)
+
+    resources = {SlowOverviewResource(n) for n in range(3)}
+    agent = dana(fake_lm, fake_lm(respond=lambda *_: '[CONFIDENT]\nanswer'), max_depth=0,
+                 resources=resources)
+    _ = list(agent.solve_many(['Q0?', 'Q1?'], max_concurrency=3))
+
+    assert tracker.max_running == 3
+    assert all(resource.n_answers == 1 + 2 for resource in resources)  # 1 overview + 1 answer per problem
@@ -0,0 +1,31 @@
+from openssa.core.knowledge._prompts import knowledge_injection_lm_chat_msgs
+from openssa.core.knowledge.selection import KnowledgeSelector, chunk_knowledge
+
+
+LONG_KNOWLEDGE: str = '\n\n'.join([f'Gross margin note {i}.' for i in range(5)] +
+                                  [f'Etch yield note {i}.' for i in range(5)])
+
+
+def test_chunk_knowledge_respects_chunk_size_and_paragraphs():
+    chunks = chunk_knowledge(LONG_KNOWLEDGE, chunk_size=40)
+    assert all(len(chunk) <= 40 for chunk in chunks)
+    assert '\n\n'.join(chunks) == LONG_KNOWLEDGE
+
+
+def test_selector_injects_short_pieces_in_full_and_relevant_chunks_in_canonical_order(keyword_embed_model):
+    selector = KnowledgeSelector(embed_model=keyword_embed_model, chunk_size=40, n_selected_chunks=2)
+    knowledge = {LONG_KNOWLEDGE, 'Always report in USD.'}
+
+    selected = selector.select(knowledge, query='What is the etch yield?')
+    assert selected[0] == 'Always report in USD.'
+    assert all('Etch' in chunk for chunk in selected[1:]) and (len(selected) == 3)
+
+    n_embedded_texts = keyword_embed_model.n_embedded_texts
+    assert selector.select(knowledge, query='What is the gross margin?') != selected
+    assert keyword_embed_model.n_embedded_texts == n_embedded_texts
+
+    msgs = knowledge_injection_lm_chat_msgs(knowledge, query='What is the etch yield?', selector=selector)
+    assert msgs == knowledge_injection_lm_chat_msgs(sorted(knowledge, reverse=True),
+                                                    query='What is the etch yield?', selector=selector)
+    assert [msg['content'] for msg in knowledge_injection_lm_chat_msgs(knowledge)] == \
+        [msg['content'] for msg in knowledge_injection_lm_chat_msgs(sorted(knowledge, reverse=True))]
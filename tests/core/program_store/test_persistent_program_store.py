@@ -0,0 +1,37 @@
+from openssa.core.program_store.persistent_program_store import PersistentProgramStore
+from openssa.core.programming.hierarchical.plan import HTP
+from openssa.core.resource._global import GLOBAL_RESOURCES
+from openssa.core.task.task import Task
+
+
+def test_persistent_program_store_versions_and_lazy_loading(tmp_path):
+    path = tmp_path / 'program-store.db'
+
+    program_store = PersistentProgramStore(path=path)
+    program_store.add_or_update_program(name='margin', description='compute margin',
+                                        program=HTP.from_dict({'task': 'margin?', 'sub-htps': [{'task': 'revenue?'}]}))
+    program_store.add_or_update_program(name='margin', description='compute margin',
+                                        program=HTP.from_dict({'task': 'margin?', 'sub-htps': [{'task': 'revenue?'}]}))
+    program_store.add_or_update_program(name='margin', description='compute net margin',
+                                        program=HTP.from_dict({'task': 'net margin?'}))
+    assert program_store.versions('margin') == [1, 2]
+
+    reloaded_program_store = PersistentProgramStore(path=path)
+    assert reloaded_program_store.descriptions == {'margin': 'compute net margin'}
+    assert not dict(reloaded_program_store.programs)  # nothing deserialized yet
+
+    assert reloaded_program_store.programs['margin'].task.ask == 'net margin?'
+    assert reloaded_program_store.get_program('margin', version=1).sub_htps[0].task.ask == 'revenue?'
+
+
+def test_persistent_program_store_persists_programs_with_resources(tmp_path, fake_resource, monkeypatch):
+    resource = fake_resource(0)
+    monkeypatch.setitem(GLOBAL_RESOURCES, resource.unique_name, resource)
+
+    PersistentProgramStore(path=tmp_path / 'program-store.db').add_or_update_program(
+        name='margin', description='compute margin',
+        program=HTP(task=Task(ask='margin?', resources={resource}),
+                    sub_htps=[HTP(task=Task(ask='revenue?', resources={resource}))]))
+
+    program = PersistentProgramStore(path=tmp_path / 'program-store.db').programs['margin']
+    assert program.task.resources == program.sub_htps[0].task.resources == {resource}
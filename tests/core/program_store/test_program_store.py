@@ -0,0 +1,22 @@
+from openssa.core.program_store.program_store import ProgramStore
+from openssa.core.programming.hierarchical.plan import HTP
+from openssa.core.task.task import Task
+
+
+def test_indexed_program_search(fake_lm, keyword_embed_model):
+    lm = fake_lm(responses=['margin-program'])
+    program_store = ProgramStore(lm=lm, embed_model=keyword_embed_model,
+                                 n_shortlisted_programs=2, lm_skipping_similarity=0.99)
+    for name, description in [('margin-program', 'compute net margin'),
+                              ('revenue-program', 'compute revenue growth'),
+                              ('etch-program', 'estimate etch yield')]:
+        program_store.add_or_update_program(name=name, description=description, program=HTP(task=Task(ask=name)))
+
+    # LM only adjudicates among shortlisted Programs
+    assert program_store.find_program(Task(ask='margin & revenue?')).task.ask == 'margin & revenue?'
+    assert len(lm.prompts) == 1
+    assert 'margin-program' in lm.prompts[0] and 'etch-program' not in lm.prompts[0]
+
+    # LM is skipped for sufficiently similar Program
+    assert program_store.find_program(Task(ask='etch yield?')) is not None
+    assert len(lm.prompts) == 1
@@ -0,0 +1,136 @@
+from threading import Event, Thread
+import time
+
+import pytest
+
+from openssa.core.programming.hierarchical.memo import SubTaskMemo
+from openssa.core.programming.hierarchical.plan import HTP
+from openssa.core.task.task import Task
+
+
+def test_sub_task_memo_matches_normalized_asks():
+    memo = SubTaskMemo()
+    memo.put(Task(ask='What was total revenue in FY2022?'), '$1B')
+
+    assert memo.get(Task(ask='what was total  revenue in FY2022')) == '$1B'
+    assert memo.get(Task(ask='What was net income in FY2022?')) is None
+    assert (memo.hits, memo.misses) == (1, 1)
+
+
+def test_concurrent_occurrences_of_sub_task_wait_for_first_computation():
+    memo, task = SubTaskMemo(), Task(ask='What was total revenue in FY2022?')
+    claimed, results = Event(), []
+
+    def compute_first():
+        with memo.claim(task) as result:
+            assert result is None
+            claimed.set()
+            time.sleep(.2)
+            memo.put(task, '$1B')
+
+    def reuse():
+        claimed.wait(5)
+        with memo.claim(task) as result:
+            results.append(result)
+
+    threads = [Thread(target=target, daemon=True) for target in (compute_first, reuse, reuse)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(timeout=5)
+
+    assert results == ['$1B', '$1B']
+    assert (memo.hits, memo.misses) == (2, 1)
+
+
+def test_sub_task_is_reclaimed_if_first_computation_fails():
+    memo, task = SubTaskMemo(), Task(ask='What was total revenue in FY2022?')
+    claimed, results = Event(), []
+
+    def compute_failing():
+        with memo.claim(task):
+            claimed.set()
+            time.sleep(.1)
+            raise RuntimeError('LM unavailable')
+
+    def fail():
+        with pytest.raises(RuntimeError, match='LM unavailable'):
+            compute_failing()
+
+    def retry():
+        claimed.wait(5)
+        with memo.claim(task) as result:
+            results.append(result)
+
+    threads = [Thread(target=target, daemon=True) for target in (fail, retry)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(timeout=5)
+
+    assert results == [None]
+
+
+def test_sub_task_recurring_among_its_own_sub_tasks_is_computed_independently():
+    memo, task = SubTaskMemo(), Task(ask='What was total revenue in FY2022?')
+
+    with memo.claim(task) as result:
+        assert result is None
+        with memo.claim(Task(ask='what was total revenue in FY2022')) as nested_result:
+            assert nested_result is None
+
+
+def test_mutually_awaiting_sub_tasks_do_not_deadlock():
+    memo, task_a, task_b = SubTaskMemo(), Task(ask='A'), Task(ask='B')
+    a_claimed, b_claimed, results = Event(), Event(), {}
+
+    def solve_a():
+        with memo.claim(task_a):
+            a_claimed.set()
+            b_claimed.wait(5)
+            with memo.claim(task_b) as result:  # waits for B's computation
+                results['B within A'] = result
+            memo.put(task_a, 'a')
+
+    def solve_b():
+        a_claimed.wait(5)
+        with memo.claim(task_b):
+            b_claimed.set()
+            time.sleep(.2)  # let A wait for B
+            with memo.claim(task_a) as result:  # waiting for A would deadlock
+                results['A within B'] = result
+            memo.put(task_b, 'b')
+
+    threads = [Thread(target=target, daemon=True) for target in (solve_a, solve_b)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(timeout=5)
+
+    assert results == {'A within B': None, 'B within A': 'b'}
+
+
+def test_duplicate_sibling_sub_tasks_are_solved_once(fake_reasoner):
+    reasoner = fake_reasoner(delay=lambda _: .1)
+    htp = HTP(task=Task(ask='ROOT'), reasoner=reasoner,
+              sub_htps=[HTP(task=Task(ask=ask), reasoner=reasoner) for ask in ('A', 'A?', 'B')])
+
+    result: str = htp.execute(max_workers=3, sequential_sharing=False, sub_task_memo=SubTaskMemo())
+
+    # either one of duplicate siblings is solved, the other reusing its result
+    assert sorted(ask.rstrip('?') for ask, _ in reasoner.calls) == ['A', 'B', 'ROOT']
+    assert result.count('result of A') == 2
+
+
+def test_sub_task_recurring_among_its_own_sub_htps_is_solved_without_deadlock(fake_reasoner):
+    reasoner = fake_reasoner()
+    htp = HTP(task=Task(ask='What was revenue?'), reasoner=reasoner,
+              sub_htps=[HTP(task=Task(ask='What was revenue?'), reasoner=reasoner)])
+    results = []
+
+    thread = Thread(target=lambda: results.append(htp.execute(sub_task_memo=SubTaskMemo())), daemon=True)
+    thread.start()
+    thread.join(timeout=5)
+
+    assert not thread.is_alive()
+    assert 'result of What was revenue?' in results[0]
@@ -0,0 +1,127 @@
+from openssa.core.programming.hierarchical.plan import DirectAttemptPolicy, HTP
+from openssa.core.programming.hierarchical.planner import HTPlanner
+from openssa.core.task.task import Task
+
+
+def htp_tree(reasoner, asks: list[str], n_sub_htps: int = 0) -> HTP:
+    return HTP(task=Task(ask='ROOT'), reasoner=reasoner,
+               sub_htps=[HTP(task=Task(ask=ask), reasoner=reasoner,
+                             sub_htps=[HTP(task=Task(ask=f'{ask}.{i}'), reasoner=reasoner) for i in range(n_sub_htps)])
+                         for ask in asks])
+
+
+def test_concurrent_sub_htps_results_are_synthesized_in_sibling_order(fake_reasoner):
+    # later siblings finish first
+    reasoner = fake_reasoner(delay=lambda ask: {'A': .3, 'B': .2, 'C': .1}.get(ask, 0.))
+    htp = htp_tree(reasoner, asks=['A', 'B', 'C'])
+
+    result: str = htp.execute(max_workers=3, sequential_sharing=False)
+
+    assert reasoner.max_running == 3
+    assert result.index('result of A') < result.index('result of B') < result.index('result of C')
+    assert all(other_results is None for ask, other_results in reasoner.calls if ask != 'ROOT')
+
+
+def test_concurrency_is_bounded_per_solve_across_depth_levels(fake_reasoner):
+    reasoner = fake_reasoner(delay=lambda _: .05)
+    htp_tree(reasoner, asks=['A', 'B', 'C'], n_sub_htps=3).execute(max_workers=3, sequential_sharing=False)
+
+    assert len(reasoner.calls) == 1 + 3 + 9
+    assert 1 < reasoner.max_running <= 3
+
+
+def test_sequential_sharing_passes_earlier_siblings_results_to_later_ones(fake_reasoner):
+    reasoner = fake_reasoner()
+    htp_tree(reasoner, asks=['A', 'B', 'C']).execute(max_workers=3)
+
+    other_results = dict(reasoner.calls)
+    assert other_results['A'] == []
+    assert other_results['B'] == [('A', 'result of A')]
+    assert other_results['C'] == [('A', 'result of A'), ('B', 'result of B')]
+
+
+def decomposing_planner(lm) -> HTPlanner:
+    return HTPlanner(lm=lm, max_depth=1, structured_output=True)
+
+
+def respond_with_decomposition(prompt: str, _json_format: bool) -> str:
+    return '{"sub-tasks": ["ROOT.1"]}' if 'top-level question/problem/task' in prompt else prompt
+
+
+def test_unconfident_tasks_are_not_decomposed_by_default(fake_lm, fake_reasoner):
+    lm, reasoner = fake_lm(respond=respond_with_decomposition), fake_reasoner(confident=lambda _: False)
+
+    result: str = HTP(task=Task(ask='ROOT'), programmer=decomposing_planner(lm), reasoner=reasoner).execute()
+
+    assert result == 'result of ROOT'
+    assert lm.n_calls == 0
+
+
+def test_unconfident_tasks_are_decomposed_dynamically_if_enabled(fake_lm, fake_reasoner):
+    lm, reasoner = fake_lm(respond=respond_with_decomposition), fake_reasoner(confident=lambda ask: ask != 'ROOT')
+
+    HTP(task=Task(ask='ROOT'), programmer=decomposing_planner(lm), reasoner=reasoner).execute(
+        dynamic_decomposition=True)
+
+    assert lm.n_calls == 1
+    assert [ask for ask, _ in reasoner.calls] == ['ROOT', 'ROOT.1']
+
+
+def test_speculative_decomposition_is_used_for_unconfident_tasks(fake_lm, fake_reasoner):
+    lm, reasoner = fake_lm(respond=respond_with_decomposition), fake_reasoner(confident=lambda ask: ask != 'ROOT')
+
+    HTP(task=Task(ask='ROOT'), programmer=decomposing_planner(lm), reasoner=reasoner).execute(
+        max_workers=2, dynamic_decomposition=True, speculative_decomposition_depth=1)
+
+    assert lm.n_calls == 1
+    assert [ask for ask, _ in reasoner.calls] == ['ROOT', 'ROOT.1']
+
+
+def test_speculative_decomposition_is_discarded_for_confident_tasks(fake_lm, fake_reasoner):
+    lm, reasoner = fake_lm(respond=respond_with_decomposition), fake_reasoner()
+
+    result: str = HTP(task=Task(ask='ROOT'), programmer=decomposing_planner(lm), reasoner=reasoner).execute(
+        max_workers=2, dynamic_decomposition=True, speculative_decomposition_depth=1)
+
+    # discarded plan's LM call is still made if already started
+    assert result == 'result of ROOT'
+    assert lm.n_calls <= 1
+    assert [ask for ask, _ in reasoner.calls] == ['ROOT']
+
+
+def test_direct_attempt_always_precedes_sub_htps(fake_reasoner):
+    reasoner = fake_reasoner()
+    result: str = htp_tree(reasoner, asks=['A', 'B']).execute()
+
+    assert [ask for ask, _ in reasoner.calls] == ['ROOT', 'A', 'B']
+    assert 'result of ROOT' in result
+
+
+def test_parallel_direct_attempt_runs_concurrently_with_sub_htps(fake_reasoner):
+    reasoner = fake_reasoner(delay=lambda ask: .2 if ask == 'ROOT' else .05)
+    result: str = htp_tree(reasoner, asks=['A', 'B']).execute(max_workers=2, direct_attempt=DirectAttemptPolicy.PARALLEL)
+
+    assert reasoner.max_running == 2
+    assert sorted(ask for ask, _ in reasoner.calls) == ['A', 'B', 'ROOT']
+    assert 'result of ROOT' in result
+
+
+def test_skipped_direct_attempt_synthesizes_from_sub_htps_only(fake_reasoner):
+    reasoner = fake_reasoner()
+    result: str = htp_tree(reasoner, asks=['A', 'B']).execute(direct_attempt='skip')
+
+    assert [ask for ask, _ in reasoner.calls] == ['A', 'B']
+    assert ('result of A' in result) and ('result of ROOT' not in result)
+    assert reasoner.lm.n_calls == 1  # synthesis only
+
+
+def test_speculative_direct_attempt_only_asks_lm(fake_reasoner):
+    reasoner = fake_reasoner()
+    result: str = htp_tree(reasoner, asks=['A', 'B']).execute(direct_attempt=DirectAttemptPolicy.SPECULATIVE)
+
+    assert [ask for ask, _ in reasoner.calls] == ['A', 'B']
+    speculative_prompt, synthesis_prompt = reasoner.lm.prompts
+    assert speculative_prompt.startswith('Without consulting any informational resources') and \
+        ('ROOT' in speculative_prompt)
+    assert f'{speculative_prompt} #1' in synthesis_prompt
+    assert 'result of ROOT' not in result
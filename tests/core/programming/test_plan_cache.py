@@ -0,0 +1,47 @@
+from openssa.core.programming.hierarchical.plan import HTP
+from openssa.core.programming.hierarchical.plan_cache import PlanCache
+from openssa.core.task.task import Task
+
+
+def test_plan_cache_adapts_cached_htp_to_similarly_shaped_problem(tmp_path):
+    htp = HTP(task=Task(ask='What is the net margin of 3M in FY2018?'),
+              sub_htps=[HTP(task=Task(ask='What was 3M revenue in FY2018?')),
+                        HTP(task=Task(ask='What was 3M {net} income in FY2018?'))])
+
+    plan_cache = PlanCache(path=tmp_path / 'plan-cache.json')
+    plan_cache.put(problem=htp.task.ask, htp=htp, scope='test')
+
+    cached_htp = PlanCache(path=tmp_path / 'plan-cache.json').get(
+        problem='What is the net margin of Johnson & Johnson in FY2022?', scope='test')
+    assert [sub_htp.task.ask for sub_htp in cached_htp.sub_htps] == \
+        ['What was Johnson & Johnson revenue in FY2022?', 'What was Johnson & Johnson {net} income in FY2022?']
+
+    assert plan_cache.get(problem='What is the net margin of Apple in FY2020?', scope='other') is None
+
+
+def test_plan_cache_fills_reordered_slots_by_value_class(keyword_embed_model):
+    htp = HTP(task=Task(ask='What is the net margin of 3M in FY2018?'),
+              sub_htps=[HTP(task=Task(ask='What was 3M revenue in FY2018?'))])
+
+    plan_cache = PlanCache(embed_model=keyword_embed_model)
+    plan_cache.put(problem=htp.task.ask, htp=htp)
+
+    cached_htp = plan_cache.get(problem='In FY2022, what is the net margin of Johnson & Johnson?')
+    assert [sub_htp.task.ask for sub_htp in cached_htp.sub_htps] == ['What was Johnson & Johnson revenue in FY2022?']
+    assert plan_cache.similar_hits == 1
+
+
+def test_plan_cache_only_matches_similar_problems_with_same_slots(keyword_embed_model):
+    htp = HTP(task=Task(ask='What is the net margin of 3M in FY2018?'),
+              sub_htps=[HTP(task=Task(ask='What was 3M revenue in FY2018?'))])
+
+    plan_cache = PlanCache(embed_model=keyword_embed_model)
+    plan_cache.put(problem=htp.task.ask, htp=htp)
+
+    assert plan_cache.get(problem='What is the net margin of 3M in FY2018 vs. FY2017?') is None
+    assert plan_cache.get(problem='What is the net margin of Apple?') is None
+
+
+def test_metric_terms_are_not_slots():
+    assert PlanCache().slots('What was the Free Cash Flow & Net Income of Apple in FY2020?') == \
+        {'_name_0': 'Apple', '_period_0': 'FY2020'}
@@ -0,0 +1,26 @@
+from openssa.core.programming.hierarchical.planner import HTPlanner
+from openssa.core.task.task import Task
+from openssa.core.util.retry import RetryExhaustedError, RetryPolicy
+
+
+def respond_with_invalid_json(_prompt: str, json_format: bool) -> str:
+    if json_format:  # LMs' own JSON retrying would give up with `RetryExhaustedError`
+        raise RetryExhaustedError('no valid JSON')
+    return 'Sure! The sub-tasks are: revenue, then net income.'
+
+
+def test_structured_decomposition_retries_once_per_attempt_then_falls_back(fake_lm):
+    lm = fake_lm(respond=respond_with_invalid_json)
+    htp = HTPlanner(lm=lm, max_depth=1, structured_output=True,
+                    retry_policy=RetryPolicy(max_attempts=3)).create_htp(Task(ask='What is the net margin?'))
+
+    assert not htp.sub_htps
+    assert lm.n_calls == 3
+
+
+def test_structured_decomposition(fake_lm):
+    lm = fake_lm(responses=['{"sub-tasks": ["What is revenue?", "What is net income?"]}'])
+    htp = HTPlanner(lm=lm, max_depth=1, structured_output=True).create_htp(Task(ask='What is the net margin?'))
+
+    assert [sub_htp.task.ask for sub_htp in htp.sub_htps] == ['What is revenue?', 'What is net income?']
+    assert lm.n_calls == 1
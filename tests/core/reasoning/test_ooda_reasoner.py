@@ -0,0 +1,50 @@
+from threading import Event
+import time
+
+from openssa.core.reasoning.ooda.ooda_reasoner import OodaReasoner
+from openssa.core.task.status import TaskStatus
+from openssa.core.task.task import Task
+
+
+def fail(_question: str) -> str:
+    raise RuntimeError('resource unavailable')
+
+
+def test_hung_and_failing_resources_are_left_out_of_observations(fake_lm, fake_resource):
+    release: Event = Event()
+    try:
+        lm = fake_lm(responses=['[CONFIDENT]\nanswer'])
+        resources = {fake_resource(0), fake_resource(1),
+                     fake_resource(2, answer=lambda _: release.wait(10) and 'late answer'),
+                     fake_resource(3, answer=fail)}
+
+        task = Task(ask='What?', resources=resources)
+        OodaReasoner(lm=lm, observation_timeout=.5).reason(task, knowledge=set())
+
+        [prompt], [history] = lm.prompts, lm.histories
+        assert ('Answer from document 0' in prompt) and ('Answer from document 1' in prompt)
+        assert ('late answer' not in prompt) and ('unavailable' not in prompt)
+        overviews: str = history[-1]['content']
+        assert ('"doc-0"' in overviews) and ('"doc-1"' in overviews)
+        assert ('"doc-2"' not in overviews) and ('"doc-3"' not in overviews)
+        assert task.status == TaskStatus.DONE
+
+    finally:
+        release.set()
+
+
+def test_resources_queued_behind_hung_ones_time_out(fake_lm, fake_resource):
+    release: Event = Event()
+    try:
+        lm = fake_lm(responses=['[UNCONFIDENT]\nno information'])
+        resources = {fake_resource(n, answer=lambda _: release.wait(10) and 'late answer') for n in range(3)}
+
+        start_time: float = time.monotonic()
+        OodaReasoner(lm=lm, max_concurrent_observations=1, observation_timeout=.3).reason(
+            Task(ask='What?', resources=resources), knowledge=set())
+
+        assert time.monotonic() - start_time < 2
+        assert 'late answer' not in lm.prompts[0]
+
+    finally:
+        release.set()
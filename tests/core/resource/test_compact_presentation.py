@@ -0,0 +1,22 @@
+from openssa.core.reasoning.simple.simple_reasoner import SimpleReasoner
+from openssa.core.resource.base import short_resource_ids
+from openssa.core.task.task import Task
+
+
+def test_short_resource_ids_follow_unique_names(fake_resource):
+    resources = [fake_resource(n) for n in (2, 0, 1)]
+    assert {r.unique_name: resource_id for r, resource_id in short_resource_ids(resources).items()} == \
+        {'doc-0': 'R1', 'doc-1': 'R2', 'doc-2': 'R3'}
+
+
+def test_overviews_are_presented_once_in_history_not_in_prompt(fake_lm, fake_resource):
+    lm = fake_lm(responses=['consolidated answer'])
+    SimpleReasoner(lm=lm).reason(Task(ask='What?', resources={fake_resource(n) for n in range(3)}), knowledge=set())
+
+    [prompt], [history] = lm.prompts, lm.histories
+    assert all(f'[R{i + 1}]\nreturns the following answer/solution:' in prompt for i in range(3))
+    assert 'Overview of document' not in prompt
+
+    [overviews_msg] = history
+    assert overviews_msg['role'] == 'system'
+    assert all(overviews_msg['content'].count(f'Overview of document {n}.') == 1 for n in range(3))
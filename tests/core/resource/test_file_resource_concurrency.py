@@ -0,0 +1,39 @@
+from threading import Barrier, Thread
+import time
+
+from llama_index.core.llms import MockLLM
+
+from openssa.core.resource.file import FileResource
+
+
+def test_concurrent_first_queries_build_index_and_overview_once(tmp_path, keyword_embed_model, monkeypatch):
+    (tmp_path / 'a.txt').write_text('Revenue was $10B.', encoding='utf-8')
+    (tmp_path / 'b.txt').write_text('Net margin was 5%.', encoding='utf-8')
+
+    build_index = FileResource._build_index  # pylint: disable=protected-access
+
+    def slow_build_index(self):
+        time.sleep(.2)
+        return build_index(self)
+
+    monkeypatch.setattr(FileResource, '_build_index', slow_build_index)
+
+    file_resource = FileResource(path=tmp_path, embed_model=keyword_embed_model, lm=MockLLM(max_tokens=5))
+    barrier: Barrier = Barrier(2)
+    query_engines, overviews = [], []
+
+    def first_query():
+        barrier.wait(timeout=5)
+        query_engines.append(file_resource.query_engine)
+        overviews.append(file_resource.overview)
+
+    threads = [Thread(target=first_query, daemon=True) for _ in range(2)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(timeout=10)
+
+    assert len(query_engines) == len(overviews) == 2
+    assert query_engines[0] is query_engines[1]
+    assert overviews[0] == overviews[1]
+    assert keyword_embed_model.n_embedded_texts == 2  # each file embedded once
@@ -0,0 +1,63 @@
+import json
+import os
+
+from llama_index.core.llms import MockLLM
+
+from openssa.core.resource.file import FileResource
+
+
+def write_files(dir_path, **contents: str):
+    for name, content in contents.items():
+        (dir_path / f'{name}.txt').write_text(content, encoding='utf-8')
+
+
+def test_directory_overview_is_reused_until_files_change(tmp_path, keyword_embed_model, monkeypatch):
+    write_files(tmp_path, a='Revenue was $10B.', b='Net margin was 5%.')
+
+    n_overviews: int = 0
+
+    def answer(*_args, **_kwargs):
+        nonlocal n_overviews
+        n_overviews += 1
+        return f'Overview #{n_overviews}'
+
+    monkeypatch.setattr(FileResource, 'answer', answer)
+
+    def overview() -> str:
+        return FileResource(path=tmp_path, embed_model=keyword_embed_model, lm=MockLLM()).overview
+
+    assert overview() == overview() == 'Overview #1'
+
+    os.utime(tmp_path / 'a.txt', (1, 1))  # touched but unchanged
+    assert overview() == 'Overview #1'
+
+    write_files(tmp_path, b='Net margin was 6%.')
+    assert overview() == overview() == 'Overview #2'
+
+
+def test_incremental_re_index_only_embeds_added_and_changed_files(tmp_path, keyword_embed_model):
+    write_files(tmp_path, a='Revenue was $10B.', b='Net margin was 5%.', c='Etch yield was 90%.')
+
+    _ = FileResource(path=tmp_path, embed_model=keyword_embed_model, lm=MockLLM()).query_engine
+    assert keyword_embed_model.n_embedded_texts == 3
+
+    write_files(tmp_path, a='Revenue was $12B.', d='Etch yield was 95%.')  # changed & added
+    (tmp_path / 'b.txt').unlink()  # deleted
+    os.utime(tmp_path / 'c.txt')  # touched but unchanged
+
+    def re_indexed_file_names(embed_model) -> set[str]:
+        query_engine = FileResource(path=tmp_path, embed_model=embed_model, lm=MockLLM(),
+                                    incremental_re_index=True).query_engine
+        docstore = query_engine.retriever._index.docstore  # pylint: disable=protected-access
+        return {node.metadata['file_name'] for node in docstore.docs.values()}
+
+    embed_model = type(keyword_embed_model)()
+    assert re_indexed_file_names(embed_model) == {'a.txt', 'c.txt', 'd.txt'}
+    assert embed_model.n_embedded_texts == 2
+
+    with open(tmp_path / f'.{embed_model.model_name}' / 'manifest.json', encoding='utf-8') as f:
+        assert set(json.load(f)) == {'a.txt', 'c.txt', 'd.txt'}
+
+    embed_model = type(keyword_embed_model)()
+    assert re_indexed_file_names(embed_model) == {'a.txt', 'c.txt', 'd.txt'}
+    assert embed_model.n_embedded_texts == 0
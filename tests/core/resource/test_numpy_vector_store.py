@@ -0,0 +1,31 @@
+import numpy as np
+from llama_index.core.schema import NodeRelationship, RelatedNodeInfo, TextNode
+from llama_index.core.vector_stores.simple import SimpleVectorStore
+from llama_index.core.vector_stores.types import VectorStoreQuery
+
+from openssa.core.resource.numpy_vector_store import NumpyVectorStore
+
+
+def test_numpy_vector_store_matches_simple_vector_store_and_persists(tmp_path):
+    rng = np.random.default_rng(seed=0)
+    nodes = [TextNode(id_=f'node-{i}', text='', embedding=rng.normal(size=16).tolist(),
+                      relationships={NodeRelationship.SOURCE: RelatedNodeInfo(node_id=f'doc-{i % 3}')})
+             for i in range(100)]
+
+    simple_vector_store, numpy_vector_store = SimpleVectorStore(), NumpyVectorStore()
+    simple_vector_store.add(nodes)
+    numpy_vector_store.add(nodes)
+
+    query = VectorStoreQuery(query_embedding=rng.normal(size=16).tolist(), similarity_top_k=5)
+    expected = simple_vector_store.query(query)
+    result = numpy_vector_store.query(query)
+    assert result.ids == expected.ids
+    assert np.allclose(result.similarities, expected.similarities, atol=1e-5)
+
+    numpy_vector_store.delete(ref_doc_id='doc-0')
+    numpy_vector_store.persist(persist_path=NumpyVectorStore.persist_path(str(tmp_path)))
+
+    loaded_vector_store = NumpyVectorStore.from_persist_dir(persist_dir=str(tmp_path))
+    assert loaded_vector_store.n_vectors == 66
+    assert loaded_vector_store.query(query).ids == numpy_vector_store.query(query).ids
+    assert not {f'node-{i}' for i in range(0, 100, 3)} & set(loaded_vector_store.query(query).ids)
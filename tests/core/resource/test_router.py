@@ -0,0 +1,41 @@
+from openssa.core.resource.router import EmbeddingResourceRouter, LMResourceRouter
+from openssa.core.util.retry import RetryPolicy
+
+
+def resources_with_overviews(fake_resource, *overviews: str) -> set:
+    resources = {fake_resource(n) for n in range(len(overviews))}
+    for resource in resources:
+        resource.overview = overviews[resource.n]
+    return resources
+
+
+def test_embedding_router_selects_most_similar_resources(fake_resource, keyword_embed_model):
+    resources = resources_with_overviews(fake_resource, 'Etch process yield data.', 'Annual revenue & margin report.',
+                                         'Quarterly revenue report.')
+    router = EmbeddingResourceRouter(top_k=2, embed_model=keyword_embed_model)
+
+    assert {r.unique_name for r in router.route(ask='What was the revenue?', resources=resources)} == \
+        {'doc-1', 'doc-2'}
+
+    router.route(ask='What was the revenue?', resources=resources)
+    router.route(ask='What was the margin?', resources=resources)
+    assert keyword_embed_model.n_embedded_texts == 3  # overviews embedded once
+
+
+def test_lm_router_selects_top_scored_resources_and_caches_scores(fake_lm, fake_resource):
+    lm = fake_lm(responses=['{"doc-0": 2, "doc-1": 9, "doc-2": "n/a"}'])
+    resources = {fake_resource(n) for n in range(3)}
+    router = LMResourceRouter(top_k=1, lm=lm)
+
+    assert {r.unique_name for r in router.route(ask='What?', resources=resources)} == {'doc-1'}
+    assert {r.unique_name for r in router.route(ask='What?', resources=resources)} == {'doc-1'}
+    assert lm.n_calls == 1
+
+
+def test_lm_router_keeps_all_resources_if_scores_stay_invalid(fake_lm, fake_resource):
+    lm = fake_lm(respond=lambda *_: '[9, 2, 0]')
+    resources = {fake_resource(n) for n in range(3)}
+    router = LMResourceRouter(top_k=1, lm=lm, retry_policy=RetryPolicy(max_attempts=2))
+
+    assert router.route(ask='What?', resources=resources) == resources
+    assert lm.n_calls == 2
@@ -0,0 +1,16 @@
+import json
+
+from openssa.core.resource._global import GLOBAL_RESOURCES
+from openssa.core.task.task import Task
+
+
+def test_task_with_resources_round_trips_through_json(fake_resource, monkeypatch):
+    resources = {fake_resource(1), fake_resource(0)}
+    for resource in resources:
+        monkeypatch.setitem(GLOBAL_RESOURCES, resource.unique_name, resource)
+
+    task_dict = json.loads(json.dumps(Task(ask='What?', resources=resources).to_json_dict()))
+    assert task_dict['resources'] == ['doc-0', 'doc-1']
+
+    task = Task.from_dict(task_dict)
+    assert (task.ask, task.resources) == ('What?', resources)
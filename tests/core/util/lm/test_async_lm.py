@@ -0,0 +1,49 @@
+import asyncio
+from types import SimpleNamespace
+
+from openssa.core.util.lm import openai
+from openssa.core.util.lm.openai import OpenAILM
+
+
+class FakeAsyncOpenAI:
+    def __init__(self, contents: list[str] | None = None):
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self.create))
+        self.contents = contents or []
+        self.n_running = self.max_running = 0
+
+    async def create(self, messages, **_kwargs):
+        self.n_running += 1
+        self.max_running = max(self.max_running, self.n_running)
+        await asyncio.sleep(.05)
+        self.n_running -= 1
+
+        content: str = self.contents.pop(0) if self.contents else f're: {messages[-1]["content"]}'
+        return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=content))])
+
+
+def openai_lm(monkeypatch, aclient: FakeAsyncOpenAI) -> OpenAILM:
+    monkeypatch.setattr(openai, 'shared_async_client', lambda **_kwargs: aclient)
+    return OpenAILM(model='gpt-test', api_key='test', api_base='http://localhost')
+
+
+def test_openai_lm_responses_are_awaited_concurrently_on_event_loop(monkeypatch):
+    aclient = FakeAsyncOpenAI()
+    lm = openai_lm(monkeypatch, aclient)
+
+    async def get_responses() -> list[str]:
+        return await asyncio.gather(*(lm.aget_response(prompt=f'Q{i}') for i in range(5)))
+
+    assert asyncio.run(get_responses()) == [f're: Q{i}' for i in range(5)]
+    assert aclient.max_running == 5
+
+
+def test_openai_lm_async_json_responses_are_retried_until_valid(monkeypatch):
+    lm = openai_lm(monkeypatch, FakeAsyncOpenAI(contents=['not JSON', '{"answer": 42}']))
+
+    assert asyncio.run(lm.aget_response(prompt='Q', json_format=True)) == {'answer': 42}
+
+
+def test_base_lm_async_response_defaults_to_blocking_response_in_worker_thread(fake_lm):
+    lm = fake_lm()
+
+    assert asyncio.run(lm.aget_response(prompt='Q')) == 'Q #1'
@@ -0,0 +1,33 @@
+import time
+
+from openssa.core.util.lm.cache import CachedLM, LMResponseCache
+
+
+def test_cached_lm_serves_repeated_deterministic_requests(tmp_path, fake_lm):
+    lm = fake_lm()
+    cached_lm = CachedLM(lm=lm, cache=LMResponseCache(path=tmp_path / 'lm-responses.db'))
+
+    assert cached_lm.get_response('a') == cached_lm.get_response('a') == 'a #1'
+    assert cached_lm.get_response('a', json_format=True) == {'prompt': 'a'}
+    assert cached_lm.get_response('a', temperature=0.7) == 'a #3'
+    assert cached_lm.get_response('a', temperature=0.7) == 'a #4'
+    assert lm.n_calls == 4
+
+    # on-disk tier persists across cache instances
+    assert CachedLM(lm=lm, cache=LMResponseCache(path=tmp_path / 'lm-responses.db')).get_response('a') == 'a #1'
+    assert lm.n_calls == 4
+
+
+def test_lm_response_cache_eviction(tmp_path):
+    cache = LMResponseCache(path=tmp_path / 'lm-responses.db', max_memory_entries=1, max_disk_entries=2)
+    for key in 'abc':
+        cache.set(key, key.upper())
+
+    assert cache.get('a') is None
+    assert cache.get('b') == 'B'
+    assert cache.get('c') == 'C'
+
+    expiring_cache = LMResponseCache(ttl=0.01)
+    expiring_cache.set('a', 'A')
+    time.sleep(0.02)
+    assert expiring_cache.get('a') is None
@@ -0,0 +1,42 @@
+from types import SimpleNamespace
+
+from openssa.core.util.lm.history import ChatHistory
+from openssa.core.util.lm.openai import OpenAILM
+from openssa.core.util.retry import RetryPolicy
+
+
+class RecordingOpenAILM(OpenAILM):
+    def __init__(self, responses: list[str]):
+        super().__init__(model='recording', api_base='', api_key='unused')
+        self.responses = responses
+        self.sent_messages = []
+
+    def call(self, messages, **kwargs):
+        self.sent_messages.append(list(messages))
+        return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=self.responses.pop(0)))])
+
+
+def test_chat_history_shares_prefix_without_mutation():
+    prefix = ChatHistory([{'role': 'system', 'content': 'k'}])
+    a = prefix.extended({'role': 'user', 'content': 'a'})
+    b = prefix.extended({'role': 'user', 'content': 'b'}, {'role': 'assistant', 'content': 'c'})
+
+    assert len(prefix) == 1 and len(a) == 2 and len(b) == 3
+    assert b == [{'role': 'system', 'content': 'k'}, {'role': 'user', 'content': 'b'}, {'role': 'assistant', 'content': 'c'}]
+    assert (b[0] is prefix[0]) and (b[-1]['content'] == 'c') and (b[-2]['content'] == 'b')
+    assert b.but_last() == b[:-1] and ChatHistory.of(b) is b
+
+
+def test_get_response_does_not_grow_shared_history_across_retries():
+    history = [{'role': 'system', 'content': 'k'}]
+    lm = RecordingOpenAILM(responses=['x', 'y', '1', 'z'])
+
+    def parse(response: str) -> int:
+        return int(response)
+
+    assert RetryPolicy(reprompt_with_error=False).get_valid_lm_response(lm, 'n?', parse, name='TEST', history=history) == 1
+    assert history == [{'role': 'system', 'content': 'k'}]
+    assert [len(messages) for messages in lm.sent_messages] == [2, 2, 2]
+
+    lm.get_response('again', history=history)
+    assert history == [{'role': 'system', 'content': 'k'}]
@@ -0,0 +1,44 @@
+from pathlib import Path
+
+import numpy as np
+
+from openssa import FileResource
+from openssa.core.util.lm.local_embed import LocalEmbedding
+
+
+class FakeSentenceTransformer:
+    def __init__(self):
+        self.encoded: list[list[str]] = []
+
+    def encode(self, texts, **_kwargs):
+        self.encoded.append(list(texts))
+        return np.array([[len(text), 1.] for text in texts])
+
+
+class FakeLocalEmbedding(LocalEmbedding):
+    def _load_model(self):
+        return FakeSentenceTransformer()
+
+
+def test_query_embeddings_are_cached_up_to_limit():
+    embed_model = FakeLocalEmbedding(max_cached_queries=2)
+
+    assert embed_model.get_query_embedding('abc') == [3., 1.]
+    embed_model.get_query_embedding('abc')
+    embed_model.get_query_embedding('de')
+    embed_model.get_query_embedding('f')
+    embed_model.get_query_embedding('abc')
+
+    assert embed_model.model.encoded == [['abc'], ['de'], ['f'], ['abc']]
+
+
+def test_texts_are_embedded_in_batches():
+    embed_model = FakeLocalEmbedding(embed_batch_size=2)
+
+    assert embed_model.get_text_embedding_batch(['a', 'bb', 'ccc']) == [[1., 1.], [2., 1.], [3., 1.]]
+    assert embed_model.model.encoded == [['a', 'bb'], ['ccc']]
+
+
+def test_file_resource_index_dir_name_has_no_path_separators(tmp_path: Path):
+    file_resource = FileResource(path=tmp_path, embed_model=FakeLocalEmbedding(model_name='org/model'))
+    assert file_resource.index_dir_str_path == str(tmp_path / '.org--model')
@@ -0,0 +1,65 @@
+import asyncio
+
+import httpx
+import pytest
+
+from openssa.core.util.lm.rate_limit import RateLimiter
+
+
+class RateLimitedError(Exception):
+    status_code = 429
+
+    def __init__(self):
+        super().__init__('rate limited')
+        self.response = httpx.Response(429, headers={'retry-after-ms': '50'})
+
+
+def test_rate_limiter_retries_rate_limited_calls_honoring_retry_after():
+    n_attempts = 0
+
+    def flaky_call():
+        nonlocal n_attempts
+        n_attempts += 1
+        if n_attempts < 3:
+            raise RateLimitedError
+        return 'ok'
+
+    rate_limiter = RateLimiter(requests_per_minute=6000, tokens_per_minute=100_000)
+    assert rate_limiter.call(flaky_call, n_tokens=10) == 'ok'
+    assert rate_limiter.metrics['n_rate_limited'] == rate_limiter.metrics['n_retries'] == 2
+
+    with pytest.raises(ZeroDivisionError):
+        rate_limiter.call(lambda: 1 / 0)
+    assert rate_limiter.metrics['n_retries'] == 2
+    assert rate_limiter.metrics['in_flight'] == rate_limiter.metrics['queue_depth'] == 0
+
+
+def test_rate_limiter_refunds_tokens_of_calls_failing_unprocessed():
+    n_attempts = 0
+
+    def flaky_call():
+        nonlocal n_attempts
+        n_attempts += 1
+        if n_attempts < 3:
+            raise RateLimitedError
+        return 'ok'
+
+    async def aflaky_call():
+        await asyncio.sleep(0)
+        return flaky_call()
+
+    # without refunds, the 3rd attempt would wait for over-reserved tokens to be refilled
+    rate_limiter = RateLimiter(tokens_per_minute=1000)
+    assert rate_limiter.call(flaky_call, n_tokens=400) == 'ok'
+    assert rate_limiter.metrics['max_wait_time'] < 1
+
+    n_attempts = 0
+    rate_limiter = RateLimiter(tokens_per_minute=1000)
+    assert asyncio.run(rate_limiter.acall(aflaky_call, n_tokens=400)) == 'ok'
+    assert rate_limiter.metrics['max_wait_time'] < 1
+
+    rate_limiter = RateLimiter(tokens_per_minute=1000)
+    with pytest.raises(ZeroDivisionError):
+        rate_limiter.call(lambda: 1 / 0, n_tokens=900)
+    assert rate_limiter.call(lambda: 'ok', n_tokens=900) == 'ok'
+    assert rate_limiter.metrics['max_wait_time'] < 1
@@ -0,0 +1,27 @@
+import pytest
+
+from openssa.core.util.retry import RetryExhaustedError, RetryPolicy
+
+
+def parse_int(response: str) -> int:
+    return int(response)
+
+
+def test_retry_policy_reprompts_escalates_and_falls_back(fake_lm):
+    weak_lm = fake_lm(responses=['one', 'two'])
+    strong_lm = fake_lm(model='strong', responses=['3'])
+    retry_policy = RetryPolicy(max_attempts=3, fallback_lm=strong_lm, n_attempts_before_fallback_lm=2)
+
+    assert retry_policy.get_valid_lm_response(lm=weak_lm, prompt='number?', parse=parse_int, name='NUMBER') == 3
+    assert weak_lm.prompts[0] == 'number?'
+    assert 'INVALID' in weak_lm.prompts[1] and 'INVALID' in strong_lm.prompts[0]
+    assert (retry_policy.stats['NUMBER'].n_attempts, retry_policy.stats['NUMBER'].n_escalations) == (3, 1)
+
+    retry_policy = RetryPolicy(max_attempts=2)
+    assert retry_policy.get_valid_lm_response(lm=fake_lm(responses=['a', 'b']), prompt='number?', parse=parse_int,
+                                              name='NUMBER', fallback=lambda _: -1) == -1
+    assert retry_policy.stats['NUMBER'].n_fallbacks == 1
+
+    with pytest.raises(RetryExhaustedError):
+        retry_policy.get_valid_lm_response(lm=fake_lm(responses=['a', 'b']), prompt='number?', parse=parse_int,
+                                           name='NUMBER')
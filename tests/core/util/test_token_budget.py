@@ -0,0 +1,43 @@
+from openssa.core.util.token_budget import (CompressionMethod, PromptSection, TokenBudget,
+                                            REPEATED_CONTENT_PLACEHOLDER, TRUNCATION_MARKER)
+
+
+OVERVIEW: str = 'This Resource is the annual report of ACME Corp, covering revenue, margins, segments and risks.'
+
+
+def answer(i: int) -> str:
+    return ' '.join(f'Filler sentence number {j} of answer {i}.' for j in range(20)) + f' Revenue was ${i}B.'
+
+
+def test_sections_within_budget_are_kept_as_is():
+    sections = [PromptSection(content='a b c', header='H: ')]
+    assert TokenBudget(max_tokens=10, tokenizer=str.split).fit(sections) == ['H: a b c']
+
+
+def test_repeated_paragraphs_are_deduplicated():
+    sections = [PromptSection(content=f'{OVERVIEW}\n\nanswer {i}') for i in range(3)]
+    texts = TokenBudget(tokenizer=str.split, min_deduplicated_chars=50).fit(sections)
+
+    assert texts[0] == f'{OVERVIEW}\n\nanswer 0'
+    assert texts[1:] == [f'{REPEATED_CONTENT_PLACEHOLDER}\n\nanswer {i}' for i in (1, 2)]
+
+
+def test_lower_priority_sections_are_compressed_first_to_fit_budget():
+    budget = TokenBudget(max_tokens=350, min_section_tokens=20, tokenizer=str.split)
+    sections = [PromptSection(content=answer(i), header=f'RESULT #{i}:\n', priority=i % 2) for i in range(4)]
+    texts = budget.fit(sections, query='What was revenue?')
+
+    assert sum(budget.count(text) for text in texts) <= 350
+    assert [text.startswith(f'RESULT #{i}:\n') for i, text in enumerate(texts)] == [True] * 4
+    assert (texts[1], texts[3]) == (sections[1].text, sections[3].text)
+    # extractive compression keeps most relevant sentence
+    assert all(f'Revenue was ${i}B.' in texts[i] for i in (0, 2))
+
+
+def test_truncation():
+    budget = TokenBudget(max_tokens=30, min_section_tokens=10, compression=CompressionMethod.TRUNCATE,
+                         tokenizer=str.split)
+    [text] = budget.fit([PromptSection(content=answer(0))])
+
+    assert text.endswith(TRUNCATION_MARKER) and answer(0).startswith(text.removesuffix(TRUNCATION_MARKER))
+    assert budget.count(text) <= 30
@@ -0,0 +1,57 @@
+from concurrent.futures import ThreadPoolExecutor
+from contextvars import copy_context
+import json
+
+import pytest
+
+from openssa.core.util.tracing import (InMemorySpanExporter, JSONLinesSpanExporter, SpanKind, Tracer,
+                                       set_span_attributes, set_tracer, trace_span, traced)
+
+
+@traced('work', SpanKind.REASONING, attributes=lambda n: {'n': n})
+def work(n: int) -> int:
+    set_span_attributes(doubled=2 * n)
+    if n < 0:
+        raise ValueError(n)
+    return 2 * n
+
+
+@pytest.fixture
+def exporter():
+    exporter = InMemorySpanExporter()
+    set_tracer(Tracer(exporters=[exporter]))
+    yield exporter
+    set_tracer(None)
+
+
+def test_spans_nest_across_threads(exporter):
+    with trace_span('root', SpanKind.AGENT) as root, ThreadPoolExecutor(max_workers=2) as executor:
+        futures = [executor.submit(copy_context().run, work, n) for n in (1, 2)]
+        assert [future.result() for future in futures] == [2, 4]
+
+    children = [span for span in exporter.spans if span.name == 'work']
+    assert len(children) == 2
+    assert {span.parent_id for span in children} == {root.span_id}
+    assert {span.trace_id for span in exporter.spans} == {root.trace_id}
+    assert sorted(span.attributes['doubled'] for span in children) == [2, 4]
+    assert all(span.duration is not None for span in exporter.spans)
+
+
+def test_errors_recorded_and_exported_as_json_lines(exporter, tmp_path):
+    path = tmp_path / 'trace.jsonl'
+    set_tracer(Tracer(exporters=[exporter, JSONLinesSpanExporter(path)]))
+
+    with pytest.raises(ValueError, match='-1'):
+        work(-1)
+
+    assert 'ValueError' in exporter.spans[-1].error
+    record = json.loads(path.read_text(encoding='utf-8').splitlines()[-1])
+    assert (record['name'], record['kind']) == ('work', 'reasoning')
+    assert record['attributes'] == {'n': -1, 'doubled': -2}
+
+
+def test_tracing_disabled_by_default():
+    set_tracer(None)
+    with trace_span('noop', SpanKind.AGENT) as span:
+        assert span is None
+    assert work(3) == 6